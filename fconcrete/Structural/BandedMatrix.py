@@ -0,0 +1,187 @@
+import numpy as np
+
+try:
+    from scipy.linalg import cholesky_banded, cho_solve_banded
+except ImportError:
+    cholesky_banded = cho_solve_banded = None
+
+
+class BandedMatrix:
+    """
+        Symmetric banded matrix, stored by its lower band.
+        The global rigidity matrix of a beam has half bandwidth 3, so the memory and the solution time are linear with its size.
+
+        Attributes
+        ----------
+        data : np.array
+            Array with shape (bandwidth+1, size) where data[k, j] = A[j+k, j].
+            It is the lower format used by LAPACK (and scipy.linalg.solveh_banded).
+
+        bandwidth : int
+            Number of diagonals below the main diagonal.
+
+        size : int
+            Number of rows (and columns) of the matrix.
+    """
+    def __init__(self, data):
+        """
+            Creates a symmetric banded matrix from its lower band.
+
+                Call signatures:
+
+                    fc.BandedMatrix(data)
+
+                >>> matrix = fc.BandedMatrix([[4, 4, 4], [1, 1, 0]])
+                >>> matrix.toDense()
+                array([[4., 1., 0.],
+                       [1., 4., 1.],
+                       [0., 1., 4.]])
+
+            Parameters
+            ----------
+            data : list of list of number
+                data[k][j] is the value in the row j+k and column j.
+        """
+        data = np.array(data, dtype=float, ndmin=2)
+        self.data = data
+        self.bandwidth = data.shape[0]-1
+        self.size = data.shape[1]
+        self._cholesky = None
+
+    @classmethod
+    def zeros(cls, size, bandwidth):
+        """
+            Creates a banded matrix of zeros.
+        """
+        return cls(np.zeros((bandwidth+1, size)))
+
+    @classmethod
+    def fromDense(cls, matrix, bandwidth):
+        """
+            Creates the banded matrix from the lower band of a dense symmetric matrix.
+        """
+        matrix = np.asarray(matrix, dtype=float)
+        size = len(matrix)
+        data = np.zeros((bandwidth+1, size))
+        for k in range(min(bandwidth+1, size)):
+            data[k, :size-k] = np.diagonal(matrix, -k)
+        return cls(data)
+
+    def toDense(self):
+        """
+            Returns the matrix as a np.array with shape (size, size).
+        """
+        matrix = np.diag(self.data[0])
+        for k in range(1, self.bandwidth+1):
+            diagonal = np.diag(self.data[k, :self.size-k], -k)
+            matrix += diagonal + diagonal.T
+        return matrix
+
+    def addBlock(self, position, block):
+        """
+            Adds the lower part of a dense symmetric block whose first row (and column) is position.
+        """
+        block_size = len(block)
+        for k in range(min(block_size, self.bandwidth+1)):
+            self.data[k, position:position+block_size-k] += np.diagonal(block, -k)
+        self._cholesky = None
+
+    def addBlocks(self, positions, blocks):
+        """
+            Same as addBlock, but for many blocks at once.
+            blocks has shape (number of blocks, block size, block size) and the blocks can overlap.
+        """
+        positions = np.asarray(positions, dtype=int)
+        blocks = np.asarray(blocks, dtype=float)
+        block_size = blocks.shape[1]
+        for k in range(min(block_size, self.bandwidth+1)):
+            for column in range(block_size-k):
+                np.add.at(self.data[k], positions+column, blocks[:, column+k, column])
+        self._cholesky = None
+
+    def submatrix(self, condition):
+        """
+            Returns the BandedMatrix with only the rows and columns where condition is True.
+            Removing rows and columns never makes the band wider.
+        """
+        index = np.flatnonzero(condition)
+        size = len(index)
+        data = np.zeros((self.bandwidth+1, size))
+        for k in range(min(self.bandwidth+1, size)):
+            columns = index[:size-k]
+            offset = index[k:] - columns
+            is_inside = offset <= self.bandwidth
+            data[k, :size-k][is_inside] = self.data[offset[is_inside], columns[is_inside]]
+        return BandedMatrix(data)
+
+    def __matmul__(self, vector):
+        """
+            Product with a vector (size,) or a matrix (size, number of vectors).
+        """
+        vector = np.asarray(vector, dtype=float)
+        data = self.data if vector.ndim == 1 else self.data[..., np.newaxis]
+        result = data[0]*vector
+        for k in range(1, self.bandwidth+1):
+            result[k:] += data[k, :self.size-k]*vector[:self.size-k]
+            result[:self.size-k] += data[k, :self.size-k]*vector[k:]
+        return result
+
+    def cholesky(self):
+        """
+            Lower band of L, where A = L @ L.T. The factorization is made only once.
+            Raises np.linalg.LinAlgError if the matrix is not positive definite (a hypostatic beam, for example).
+        """
+        if self._cholesky is not None: return self._cholesky
+        if cholesky_banded is not None:
+            try:
+                self._cholesky = cholesky_banded(self.data, lower=True)
+            except np.linalg.LinAlgError:
+                raise np.linalg.LinAlgError("Matrix is not positive definite")
+            return self._cholesky
+
+        factor = self.data.copy()
+        size, bandwidth = self.size, self.bandwidth
+        # Position in the band of each pair (row, column) of the trailing block updated by a column
+        rows, columns = np.tril_indices(bandwidth)
+        for j in range(size):
+            pivot = factor[0, j]
+            if not pivot > 0: raise np.linalg.LinAlgError("Matrix is not positive definite")
+            pivot = np.sqrt(pivot)
+            factor[0, j] = pivot
+            m = min(bandwidth, size-1-j)
+            if m == 0: continue
+            column = factor[1:m+1, j]/pivot
+            factor[1:m+1, j] = column
+            is_inside = rows < m
+            r, c = rows[is_inside], columns[is_inside]
+            factor[r-c, j+1+c] -= column[r]*column[c]
+        self._cholesky = factor
+        return factor
+
+    def solve(self, vector):
+        """
+            Solves A @ x = vector by the banded Cholesky factorization.
+            vector can have shape (size,) or (size, number of vectors), so the factorization is reused for many right hand sides.
+        """
+        vector = np.array(vector, dtype=float)
+        factor = self.cholesky()
+        if self.size == 0: return vector
+        if cho_solve_banded is not None:
+            return cho_solve_banded((factor, True), vector)
+
+        size, bandwidth = self.size, self.bandwidth
+        factor = factor if vector.ndim == 1 else factor[..., np.newaxis]
+        # L @ y = vector
+        for j in range(size):
+            vector[j] /= factor[0, j]
+            m = min(bandwidth, size-1-j)
+            vector[j+1:j+1+m] -= factor[1:m+1, j]*vector[j]
+        # L.T @ x = y
+        for j in range(size-1, -1, -1):
+            m = min(bandwidth, size-1-j)
+            vector[j] -= (factor[1:m+1, j]*vector[j+1:j+1+m]).sum(axis=0)
+            vector[j] /= factor[0, j]
+        return vector
+
+    def __repr__(self):
+        return str(self.__dict__)
@@ -1,9 +1,12 @@
 from fconcrete.Structural.BeamElement import BeamElement, BeamElements
 from fconcrete.Structural.Load import Load, Loads
-from fconcrete.Structural.Node import Nodes
-from fconcrete.helpers import cond, make_dxf, getAxis
-from fconcrete.config import e
+from fconcrete.Structural.Node import Node
+from fconcrete.Structural.PiecewisePolynomial import PiecewisePolynomial
+from fconcrete.Structural.BeamModel import BeamModel
+from fconcrete.helpers import cond, cond_array, make_dxf, getAxis, save_columns, load_columns, adaptive_sampling, Profiler, profiled
+from fconcrete.config import e, max_broadcast_size, diagram_chunk_size
 import copy
+from math import factorial
 import numpy as np
 import warnings
 import matplotlib.pyplot as plt
@@ -18,6 +21,7 @@ class Beam:
         ----------
         U: list of number
             Displacement in the nodes.
+            With the condensed option, the middle nodes are recovered from the other ones when it is used for the first time.
 
         beam_elements: BeamElements
             BeamElements instance of beam_elements, not only the ones provided by the initial beam_Elements.
@@ -37,12 +41,34 @@ class Beam:
         loads: Loads
             Loads instance with all efforts in the beam. Including the load given by the supports.
             
+        model: BeamModel
+            Linear system of the beam. Can be used to solve other load cases with the same beam_elements.
+            
+        condensed_model: BeamModel or None
+            With the condensed option, linear system of the initial_beam_elements, without the middle nodes created in the limits of the loads.
+            It is the one solved by the beam. None without the condensed option.
+            
         nodal_efforts: list of number
             The nodal efforts that happens in all nodes, not only the ones provided by the initial beam_Elements.
 
         nodes: Nodes
             Nodes instance of the beam, not only the ones provided by the initial beam_Elements.
             
+        profiler: Profiler
+            Time, calls and memory of the stages "structural" and "displacement" (and the ones of the subclasses).
+            
+        shear_polynomial: PiecewisePolynomial
+            Exact shear diagram, created by beam.solve_structural.
+            
+        momentum_polynomial: PiecewisePolynomial
+            Exact momentum diagram, created by beam.solve_structural.
+            
+        rotation_polynomial: PiecewisePolynomial
+            Exact rotation diagram, created by beam.solve_displacement.
+            
+        displacement_polynomial: PiecewisePolynomial
+            Exact displacement diagram, created by beam.solve_displacement.
+            
         x_begin: number
             Where the beam starts, in cm.
 
@@ -76,7 +102,17 @@ class Beam:
             
             beam_elements : [BeamElement], optional
                 Define the beam_elements that, together, makes the whole Beam. 
+            
+            **options
+                
+                ``condensed``:
+                    If True, the middle nodes created in the limits of the loads are condensed out (`bool`).
+                    Only the nodes of the initial beam_elements are solved, with the closed form efforts of the loads inside them,
+                    so the linear system grows with the number of supports instead of the number of loads. Default is False.
+                ``profiler``:
+                    Profiler that records the stages of the solution (`Profiler`). Can be shared by many beams. Default is a new one.
         """
+        self.profiler = options.get("profiler") or Profiler()
         beam_elements = BeamElements.create(beam_elements)
         external_loads = Loads.create(loads)
         self.initial_beam_elements = beam_elements
@@ -85,6 +121,10 @@ class Beam:
         
         self.external_loads = external_loads
         self.beam_elements = beam_elements
+        self.model = BeamModel(beam_elements)
+        is_condensed = options.get("condensed", False) and len(self.initial_beam_elements) < len(beam_elements)
+        self.condensed_model = BeamModel(self.initial_beam_elements) if is_condensed else None
+        self._U = None
         
         self.length = sum(beam_elements.length)
         self.beams_quantity = len(beam_elements)
@@ -94,99 +134,115 @@ class Beam:
             if options.get("solve_displacement") != False:
                 self.solve_displacement()
         
+    @profiled("structural")
     def solve_structural(self):
         """
             Starts the process of solution for the structural beam.
         """
         nodal_efforts = self._getSupportReactions()
         self.nodal_efforts = nodal_efforts
-        nodes = Nodes(self.beam_elements.nodes)
-        self.nodes = nodes
-        loads = self.external_loads
-        for index, node in enumerate(nodes.nodes):
-            loads = loads.add(
-                [Load(nodal_efforts[index*2], nodal_efforts[index*2+1], node.x, node.x)]
-                )
-        self.loads = loads
+        self.nodes = self.beam_elements.nodes
+        self.loads = self.external_loads.add(self._getSupportLoads(nodal_efforts))
+        
+        breakpoints = self._getBreakpoints()
+        self.shear_polynomial = PiecewisePolynomial.fromSingularityTerms(breakpoints, *self._getSingularityTerms(0))
+        self.momentum_polynomial = PiecewisePolynomial.fromSingularityTerms(breakpoints, *self._getSingularityTerms(1))
+    
+    def _getSupportLoads(self, nodal_efforts):
+        """
+            Loads that represent the nodal efforts (support reactions) in each node.
+        """
+        nodes_x = self.beam_elements.nodes.x
+        return Loads.fromArrays(nodal_efforts[0::2], nodal_efforts[1::2], nodes_x, nodes_x)
+    
+    def _getBreakpoints(self):
+        """
+            Positions where the diagrams can change their polynomial: the nodes and the limits of the loads.
+        """
+        breakpoints = np.concatenate((self.beam_elements.nodes.x, self.loads.x_begin, self.loads.x_end))
+        return np.unique(breakpoints[(breakpoints >= self.x_begin) & (breakpoints <= self.x_end)])
                    
     @staticmethod
     def _createIntermediateBeams(loads, bars):
-        for load in loads.loads:
-            bars = bars.split(load.x_begin)
-            bars = bars.split(load.x_end)
+        """
+            Splits the bars in the limits of the loads, so each load begins and ends in a node.
+            The limits are sorted only once and each bar is split in all the limits inside it at the same time.
+        """
+        limits = np.unique(np.concatenate((loads.x_begin, loads.x_end)))
+        # The limits strictly inside the bar i are limits[first[i]:last[i]]
+        first = np.searchsorted(limits, bars.x_start, side="right")
+        last = np.searchsorted(limits, bars.x_end, side="left")
+        if (first >= last).all(): return bars
         
-        return bars
+        new_bars = []
+        for bar, start, stop in zip(bars.bar_elements, first, last):
+            if start >= stop:
+                new_bars.append(bar)
+                continue
+            nodes = [bar.n1, *[ Node.MiddleNode(x=x) for x in limits[start:stop] ], bar.n2]
+            new_bars += [ BeamElement(nodes=[n1, n2], section=bar.section, material=bar.material)
+                          for n1, n2 in zip(nodes[:-1], nodes[1:]) ]
+        return BeamElements(new_bars)
 
     def matrix_rigidity_global(self):
         """
             Returns the global rigidity matrix. Also known by the letter "K". 
         """
-        matrix_rigidity_row = 2*self.beams_quantity+2
-        matrix_rigidity_global = np.zeros(
-            (matrix_rigidity_row, matrix_rigidity_row))
-        for beam_n, beam in enumerate(self.beam_elements):
-            matrix_rigidity_global[beam_n*2:beam_n*2+4,
-                                   beam_n*2:beam_n*2+4] += beam.get_matrix_rigidity_unitary()
-        return matrix_rigidity_global
+        return self.model.matrix_rigidity_global()
+    
+    def matrix_rigidity_global_banded(self):
+        """
+            Returns the global rigidity matrix as a BandedMatrix with half bandwidth 3.
+            Same as beam.matrix_rigidity_global, but with memory linear with the number of beam_elements.
+        """
+        return self.model.matrix_rigidity_global_banded()
 
     def _get_beams_efforts(self):
-        beams_efforts = np.zeros(self.beams_quantity*4)
-
-        for load in self.external_loads.loads:
-            if (load.x == self.x_end):
-                load.x = self.x_end - e
-                
-            # In case the same load passes through multiple beam_elements
-            if(load.order==0):
-                x_loads = [(load.x_begin, load.x_end, 1)]
-            else:
-                x_loads = [ (be.n1.x,be.n2.x, (be.n2.x-be.n1.x)/(load.x_end-load.x_begin)) for be in self.beam_elements if (be.n1.x>=load.x_begin and be.n2.x<=load.x_end)]
-    
-            loads = [ Load(prop*load.force, load.momentum, x_b, x_e,
-                            q=load.q,
-                            order=load.order,
-                            displacement=load.displacement)
-                    for x_b, x_e, prop in x_loads ]
-            
-            for load in loads:
-                force_beam, beam_element = self.getBeamElementInX(load.x)
-                beams_efforts[4*force_beam:4*force_beam+4] += BeamElement.get_efforts_from_bar_element(
-                    beam_element,
-                    load
-                )
-
-        # join separate beams into a node vector
-        bn = self.beams_quantity
-        b = 2*np.arange(0, 2*bn+2, 1)
-        b[1::2] = b[0::2]+1
-        b[1] = b[-1] = b[-2] = 0
-        mult_b = b != 0
-
-        a = 2*(np.arange(0, 2*bn+2, 1)-1)
-        a[0] = 0
-        a[1::2] = a[0::2]+1
-
-        return beams_efforts[a] + beams_efforts[b]*mult_b
+        return self.model.getNodalLoads(self.external_loads)
 
     def _getSupportReactions(self):
-        condition_boundary = self.beam_elements.condition_boundary
-        beams_efforts = self._get_beams_efforts()
-        matrix_rigidity_global = self.matrix_rigidity_global()
-
-        matrix_rigidity_global_determinable = matrix_rigidity_global[condition_boundary, :][:, condition_boundary]
-        beams_efforts_determinable = beams_efforts[condition_boundary]
-
-        U = np.zeros(len(condition_boundary))
-        U[condition_boundary] = np.linalg.solve(matrix_rigidity_global_determinable, beams_efforts_determinable)
-        self.U = U
-        F = matrix_rigidity_global @ U
-
-        return beams_efforts - F
+        if self.condensed_model is None:
+            nodal_efforts, U = self.model.solve(self._get_beams_efforts())
+            self._U = U
+            return nodal_efforts
+        nodal_efforts, U = self._solveLoadCases([self.external_loads])
+        self._U, self._condensed_U = None, U[:, 0]
+        return nodal_efforts[:, 0]
+    
+    def _getCondensedDegreesOfFreedom(self):
+        """
+            Degrees of freedom of beam.model that are also in beam.condensed_model: the ones of the nodes of the initial beam_elements.
+        """
+        index = np.searchsorted(self.model.beam_elements.nodes.x, self.condensed_model.beam_elements.nodes.x)
+        return (2*index[:, np.newaxis] + np.arange(2)).ravel()
+    
+    def _solveLoadCases(self, load_cases):
+        """
+            Same as beam.model.solveLoadCases, but solved by beam.condensed_model if there is one.
+            The middle nodes have no nodal effort and their displacements are not solved (U is the one of beam.condensed_model).
+        """
+        if self.condensed_model is None: return self.model.solveLoadCases(load_cases)
+        condensed_nodal_efforts, U = self.condensed_model.solveLoadCases(load_cases)
+        nodal_efforts = np.zeros((len(self.model.condition_boundary), len(load_cases)))
+        nodal_efforts[self._getCondensedDegreesOfFreedom()] = condensed_nodal_efforts
+        return nodal_efforts, U
+    
+    @property
+    def U(self):
+        if self._U is None:
+            # Static condensation recovery: only the middle nodes are solved, with the other ones as known displacements
+            is_known = np.zeros(len(self.model.condition_boundary), dtype=bool)
+            is_known[self._getCondensedDegreesOfFreedom()] = True
+            U = np.zeros(len(is_known))
+            U[is_known] = self._condensed_U
+            self._U = self.model.recoverDisplacements(self._get_beams_efforts(), U, is_known)
+        return self._U
     
 
     def getBeamElementInX(self, x):
         """
-            Get the beam element in x (in cm).
+            Get the beam element in x (in cm) or in multiple positions.
+            The element is found by a binary search over the sorted x of the nodes (beam.beam_elements.nodes.x).
 
                 Call signatures:
 
@@ -194,22 +250,36 @@ class Beam:
             
             Parameters
             ----------
-            x : number
+            x : number or list of number
                 Position in the beam, in cm.
             
             Returns
             -------
-            index : int
+            index : int or np.array of int
                 The order of the beam_element in the structure.
                 
-            beam_element
+            beam_element : BeamElement or np.array of BeamElement
                 beam_element located in x.
                 
         """
-        index = 0 if x<=self.x_begin else -1 if x>=self.x_end else np.where(
-        np.array([node.x for node in self.beam_elements.nodes]) <= x)[0][-1]
+        if isinstance(x, np.ndarray) or isinstance(x, list):
+            index = self.getBeamElementIndexInX(x)
+            return index, self.beam_elements.bar_elements[index]
+        index = 0 if x<=self.x_begin else -1 if x>=self.x_end else int(
+            np.searchsorted(self.beam_elements.nodes.x, x, side="right") - 1)
         bar_element = self.beam_elements[index]
         return index, bar_element
+    
+    def getBeamElementIndexInX(self, x):
+        """
+            Same index as beam.getBeamElementInX, for all the positions of an array at once.
+            The positions after the end of the beam have the index of the last beam element (instead of -1).
+        """
+        index = np.searchsorted(self.beam_elements.nodes.x, x, side="right") - 1
+        return np.clip(index, 0, len(self.beam_elements)-1)
+    
+    def _getFlexuralRigidityInX(self, x):
+        return self.beam_elements.flexural_rigidity[self.getBeamElementIndexInX(x)]
         
     def getInternalShearStrength(self, x):
         """
@@ -241,7 +311,7 @@ class Beam:
                     x-load.x_end, order=load.order) if load.x_begin != load.x_end else 0
             return f_value
         elif isinstance(x, np.ndarray) or isinstance(x, list):
-            return np.array([ self.getInternalShearStrength(x_element) for x_element in x ])
+            return self._evaluateSingularityTerms(x, self._getSingularityTerms(0))
         
     def getShearDiagram(self, **options):
         """
@@ -252,11 +322,17 @@ class Beam:
             **options
                 
                 ``division``:
-                    Number of divisions equally spaced (`int`).
+                    Number of divisions equally spaced (`int`). With adaptive, the maximum number of divisions.
                 ``x_begin``:
                     Begin of the x_axis (`number`).
                 ``x_end``:
                     End of the x_axis (`number`).
+                ``adaptive``:
+                    If True, x is not equally spaced: it has the nodes and the limits of the loads (both sides of each one)
+                    and more divisions only where the diagram is curved (`bool`). Default is False.
+                ``tolerance``:
+                    With adaptive, maximum distance between the diagram and the straight line between two divisions,
+                    relative to the maximum absolute value of the diagram (`number`). Default is 1e-3.
                 
                 
             Returns
@@ -304,7 +380,58 @@ class Beam:
                             load.q*cond(x-load.x_end, order=load.order+1))/(load.order+1)
             return f_value
         elif isinstance(x, np.ndarray) or isinstance(x, list):
-            return np.array([ self.getInternalMomentumStrength(x_element) for x_element in x ])
+            return self._evaluateSingularityTerms(x, self._getSingularityTerms(1))
+    
+    def _getSingularityTerms(self, n, loads=None):
+        """
+            Represents the n-th integral of the loads as a sum of singularity functions:
+            sum(weights*cond(x-positions, order=orders)).
+            n=0 is the shear, n=1 is the momentum, n=2 and n=3 are the rotation and displacement multiplied by the flexural rigidity.
+            loads must include the support reactions. Default is beam.loads.
+            
+            Returns
+            -------
+            weights, positions, orders : np.array
+                Each term of the sum.
+        """
+        loads = self.loads if loads is None else loads
+        is_pontual = loads.x_begin == loads.x_end
+        order = loads.order
+        if n == 0:
+            weights = (np.where(is_pontual, loads.force, loads.q), np.where(is_pontual, 0, -loads.q))
+            positions = (loads.x_begin, loads.x_end)
+            orders = (np.where(is_pontual, 0, order), order)
+        else:
+            distributed_factor = 1/np.prod([order+i for i in range(1, n+1)], axis=0)
+            weights = (np.where(is_pontual, -loads.momentum, 0)/factorial(n-1),
+                       np.where(order == 0, loads.force, 0)/factorial(n),
+                       loads.q*distributed_factor,
+                       -loads.q*distributed_factor)
+            positions = (loads.x_begin, loads.x_begin, loads.x_begin, loads.x_end)
+            orders = (np.repeat(n-1, len(loads)), np.repeat(n, len(loads)), order+n, order+n)
+        return np.concatenate(weights), np.concatenate(positions), np.concatenate(orders)
+    
+    def _getRotationTerms(self):
+        # Each load uses the flexural rigidity of the beam element where it begins
+        weights, positions, orders = self._getSingularityTerms(2)
+        flexural_rigidity = self._getFlexuralRigidityInX(self.loads.x_begin+e)
+        return weights/np.tile(flexural_rigidity, len(weights)//len(flexural_rigidity)), positions, orders
+    
+    def _evaluateSingularityTerms(self, x, terms):
+        """
+            Sum the singularity terms for each position in x.
+            The terms are evaluated in a single (positions x terms) broadcast.
+            When it would be bigger than config.max_broadcast_size (many loads or a big division in the diagrams),
+            the terms are accumulated by prefix sums instead, with time and memory linear with len(x)+len(terms).
+        """
+        weights, positions, orders = terms
+        x = np.asarray(x, dtype=float)
+        if len(x)*len(weights) > max_broadcast_size:
+            f_value = PiecewisePolynomial.sumSingularityTerms(x, weights, positions, orders)[:, 0]
+        else:
+            f_value = (weights*cond_array(x[:, np.newaxis]-positions, order=orders)).sum(axis=1)
+        f_value[(x < self.x_begin) | (x > self.x_end)] = 0
+        return f_value
         
     def getMomentumDiagram(self, **options):
         """
@@ -315,11 +442,17 @@ class Beam:
             **options
                 
                 ``division``:
-                    Number of divisions equally spaced (`int`).
+                    Number of divisions equally spaced (`int`). With adaptive, the maximum number of divisions.
                 ``x_begin``:
                     Begin of the x_axis (`number`).
                 ``x_end``:
                     End of the x_axis (`number`).
+                ``adaptive``:
+                    If True, x is not equally spaced: it has the nodes and the limits of the loads (both sides of each one)
+                    and more divisions only where the diagram is curved (`bool`). Default is False.
+                ``tolerance``:
+                    With adaptive, maximum distance between the diagram and the straight line between two divisions,
+                    relative to the maximum absolute value of the diagram (`number`). Default is 1e-3.
             
             Returns
             -------
@@ -331,6 +464,7 @@ class Beam:
         """
         return self._createDiagram(self.getInternalMomentumStrength, **options)
     
+    @profiled("displacement")
     def solve_displacement(self):
         """
             Starts the process of solution for the structural beam displacement.
@@ -355,6 +489,20 @@ class Beam:
         
         self._c1 = c1
         self._c2 = c2
+        
+        breakpoints = self._getBreakpoints()
+        segments_begin = breakpoints[:-1]
+        flexural_rigidity = self._getFlexuralRigidityInX((breakpoints[:-1]+breakpoints[1:])/2)
+        
+        rotation_polynomial = PiecewisePolynomial.fromSingularityTerms(breakpoints, *self._getRotationTerms())
+        rotation_polynomial.coefficients[:, 0] += c1/flexural_rigidity
+        self.rotation_polynomial = rotation_polynomial
+        
+        displacement_polynomial = PiecewisePolynomial.fromSingularityTerms(breakpoints, *self._getSingularityTerms(3))
+        displacement_polynomial.coefficients /= flexural_rigidity[:, np.newaxis]
+        displacement_polynomial.coefficients[:, 0] += (c1*segments_begin+c2)/flexural_rigidity
+        displacement_polynomial.coefficients[:, 1] += c1/flexural_rigidity
+        self.displacement_polynomial = displacement_polynomial
     
     def getDisplacement(self, x):
         """
@@ -378,10 +526,9 @@ class Beam:
         if isinstance(x, int) or isinstance(x, float):
             if x < self.x_begin or x > self.x_end: return 0
             f_value = 0
-            _, single_beam_element_init = self.getBeamElementInX(x)
+            _, single_beam_element = self.getBeamElementInX(x)
             
             for load in self.loads:
-                _, single_beam_element = self.getBeamElementInX(x) #load.x_begin+e)
                 l_value = -load.momentum * \
                     cond(x-load.x_begin, order=2)/2 if load.x_begin == load.x_end else 0
                 l_value += load.force * \
@@ -391,12 +538,20 @@ class Beam:
                 f_value += l_value/single_beam_element.flexural_rigidity
             
             if not hasattr(self, "_c1"):
-                return f_value*single_beam_element_init.flexural_rigidity
+                return f_value*single_beam_element.flexural_rigidity
             
-            return f_value + (self._c1*x+self._c2)/single_beam_element_init.flexural_rigidity
+            return f_value + (self._c1*x+self._c2)/single_beam_element.flexural_rigidity
         
         elif isinstance(x, np.ndarray) or isinstance(x, list):
-            return np.array([ self.getDisplacement(x_element) for x_element in x ])
+            x = np.asarray(x, dtype=float)
+            flexural_rigidity = self._getFlexuralRigidityInX(x)
+            f_value = self._evaluateSingularityTerms(x, self._getSingularityTerms(3))/flexural_rigidity
+            if not hasattr(self, "_c1"):
+                f_value = f_value*flexural_rigidity
+            else:
+                f_value = f_value + (self._c1*x+self._c2)/flexural_rigidity
+            f_value[(x < self.x_begin) | (x > self.x_end)] = 0
+            return f_value
         
         
     def getDisplacementDiagram(self, **options):
@@ -408,11 +563,17 @@ class Beam:
             **options
                 
                 ``division``:
-                    Number of divisions equally spaced (`int`).
+                    Number of divisions equally spaced (`int`). With adaptive, the maximum number of divisions.
                 ``x_begin``:
                     Begin of the x_axis (`number`).
                 ``x_end``:
                     End of the x_axis (`number`).
+                ``adaptive``:
+                    If True, x is not equally spaced: it has the nodes and the limits of the loads (both sides of each one)
+                    and more divisions only where the diagram is curved (`bool`). Default is False.
+                ``tolerance``:
+                    With adaptive, maximum distance between the diagram and the straight line between two divisions,
+                    relative to the maximum absolute value of the diagram (`number`). Default is 1e-3.
                 
             Returns
             -------
@@ -462,7 +623,14 @@ class Beam:
             return f_value + self._c1/single_beam_element_init.flexural_rigidity
         
         elif isinstance(x, np.ndarray) or isinstance(x, list):
-            return np.array([ self.getRotation(x_element) for x_element in x ])
+            x = np.asarray(x, dtype=float)
+            f_value = self._evaluateSingularityTerms(x, self._getRotationTerms())
+            if not hasattr(self, "_c1"):
+                f_value = f_value*self._getFlexuralRigidityInX(self.loads.x_begin[-1]+e)
+            else:
+                f_value = f_value + self._c1/self._getFlexuralRigidityInX(x)
+            f_value[(x < self.x_begin) | (x > self.x_end)] = 0
+            return f_value
     
     def getRotationDiagram(self, **options):
         """
@@ -473,11 +641,17 @@ class Beam:
             **options
                 
                 ``division``:
-                    Number of divisions equally spaced (`int`).
+                    Number of divisions equally spaced (`int`). With adaptive, the maximum number of divisions.
                 ``x_begin``:
                     Begin of the x_axis (`number`).
                 ``x_end``:
                     End of the x_axis (`number`).
+                ``adaptive``:
+                    If True, x is not equally spaced: it has the nodes and the limits of the loads (both sides of each one)
+                    and more divisions only where the diagram is curved (`bool`). Default is False.
+                ``tolerance``:
+                    With adaptive, maximum distance between the diagram and the straight line between two divisions,
+                    relative to the maximum absolute value of the diagram (`number`). Default is 1e-3.
                 
             Returns
             -------
@@ -489,13 +663,311 @@ class Beam:
         """
         return self._createDiagram(self.getRotation, **options)
     
-    def _createDiagram(self, function, division=1000, x_begin="begin", x_end="end", **options):
+    def getMaximumAbsoluteShear(self, x_begin="begin", x_end="end"):
+        """
+            Get the exact maximum absolute value of the shear between x_begin and x_end (in cm), without sampling.
+            Both sides of a discontinuity (such as a support) are considered.
+            
+                Call signatures:
+                    
+                    beam.getMaximumAbsoluteShear(x_begin="begin", x_end="end")
+            
+            Parameters
+            ----------
+            x_begin : number, optional
+                Begin of the interval. Default is the begin of the beam.
+                
+            x_end : number, optional
+                End of the interval. Default is the end of the beam.
+            
+            Returns
+            -------
+            shear : number
+                The maximum absolute value of the shear in kN.
+        """
+        return self._getMaximumAbsolute(self.shear_polynomial, x_begin, x_end)
+    
+    def getMaximumAbsoluteMomentum(self, x_begin="begin", x_end="end"):
+        """
+            Get the exact maximum absolute value of the momentum between x_begin and x_end (in cm), without sampling.
+            The extrema are found in the roots of the shear.
+            
+                Call signatures:
+                    
+                    beam.getMaximumAbsoluteMomentum(x_begin="begin", x_end="end")
+            
+            Parameters
+            ----------
+            x_begin : number, optional
+                Begin of the interval. Default is the begin of the beam.
+                
+            x_end : number, optional
+                End of the interval. Default is the end of the beam.
+            
+            Returns
+            -------
+            momentum : number
+                The maximum absolute value of the momentum in kNcm.
+        """
+        return self._getMaximumAbsolute(self.momentum_polynomial, x_begin, x_end)
+    
+    def getMaximumAbsoluteDisplacement(self, x_begin="begin", x_end="end"):
+        """
+            Get the exact maximum absolute value of the vertical displacement between x_begin and x_end (in cm), without sampling.
+            The extrema are found in the roots of the rotation.
+            Needs beam.solve_displacement to be called before.
+            
+                Call signatures:
+                    
+                    beam.getMaximumAbsoluteDisplacement(x_begin="begin", x_end="end")
+            
+            Parameters
+            ----------
+            x_begin : number, optional
+                Begin of the interval. Default is the begin of the beam.
+                
+            x_end : number, optional
+                End of the interval. Default is the end of the beam.
+            
+            Returns
+            -------
+            displacement : number
+                The maximum absolute value of the vertical displacement in cm.
+        """
+        return self._getMaximumAbsolute(self.displacement_polynomial, x_begin, x_end)
+    
+    def _getMaximumAbsolute(self, polynomial, x_begin="begin", x_end="end"):
+        x_begin = self.x_begin if x_begin=="begin" else x_begin
+        x_end = self.x_end if x_end=="end" else x_end
+        minimum, maximum = polynomial.getExtrema(x_begin, x_end)
+        return max(abs(minimum), abs(maximum))
+    
+    def _createDiagram(self, function, division=1000, x_begin="begin", x_end="end", adaptive=False, tolerance=1e-3, **options):
         x_begin = self.x_begin+e if x_begin=="begin" else x_begin
         x_end = self.x_end-e if x_end=="end" else x_end
+        if adaptive:
+            breakpoints = self._getBreakpoints()
+            breakpoints = breakpoints[(breakpoints > x_begin) & (breakpoints < x_end)]
+            return adaptive_sampling(function, np.concatenate(([x_begin], breakpoints, [x_end])), division, tolerance)
         x = np.linspace(x_begin, x_end, division)
-        y = np.array([function(x_i) for x_i in x])
+        y = function(x)
         return x, y
     
+    def iterShearDiagram(self, chunk_size=diagram_chunk_size, **options):
+        """
+            Same as beam.getShearDiagram, but yields the (x, y) in chunks of chunk_size points,
+            so the diagram can be exported or reduced without having all of it in memory.
+            
+                Call signatures:
+                    
+                    beam.iterShearDiagram(chunk_size=diagram_chunk_size, **options)
+                
+                >>> maximum = max(y.max() for x, y in beam.iterShearDiagram(division=10**7))
+            
+            Parameters
+            ----------
+            chunk_size : int, optional
+                Maximum number of points of each chunk. Default is config.diagram_chunk_size.
+            
+            **options
+                
+                ``division``:
+                    Number of divisions equally spaced (`int`).
+                ``x_begin``:
+                    Begin of the x_axis (`number`).
+                ``x_end``:
+                    End of the x_axis (`number`).
+            
+            Yields
+            ------
+            x : np.array
+                The x position of the divisions of the chunk in cm.
+            
+            y : np.array
+                The value of shear for each x.
+        """
+        return self._iterDiagram(self.getInternalShearStrength, chunk_size, **options)
+    
+    def iterMomentumDiagram(self, chunk_size=diagram_chunk_size, **options):
+        """
+            Same as beam.getMomentumDiagram, but yields the (x, y) in chunks of chunk_size points,
+            so the diagram can be exported or reduced without having all of it in memory.
+            
+                Call signatures:
+                    
+                    beam.iterMomentumDiagram(chunk_size=diagram_chunk_size, **options)
+                
+                >>> maximum = max(y.max() for x, y in beam.iterMomentumDiagram(division=10**7))
+            
+            Parameters
+            ----------
+            chunk_size : int, optional
+                Maximum number of points of each chunk. Default is config.diagram_chunk_size.
+            
+            **options
+                
+                ``division``:
+                    Number of divisions equally spaced (`int`).
+                ``x_begin``:
+                    Begin of the x_axis (`number`).
+                ``x_end``:
+                    End of the x_axis (`number`).
+            
+            Yields
+            ------
+            x : np.array
+                The x position of the divisions of the chunk in cm.
+            
+            y : np.array
+                The value of momentum for each x.
+        """
+        return self._iterDiagram(self.getInternalMomentumStrength, chunk_size, **options)
+    
+    def iterDisplacementDiagram(self, chunk_size=diagram_chunk_size, **options):
+        """
+            Same as beam.getDisplacementDiagram, but yields the (x, y) in chunks of chunk_size points,
+            so the diagram can be exported or reduced without having all of it in memory.
+            
+                Call signatures:
+                    
+                    beam.iterDisplacementDiagram(chunk_size=diagram_chunk_size, **options)
+                
+                >>> maximum = max(y.max() for x, y in beam.iterDisplacementDiagram(division=10**7))
+            
+            Parameters
+            ----------
+            chunk_size : int, optional
+                Maximum number of points of each chunk. Default is config.diagram_chunk_size.
+            
+            **options
+                
+                ``division``:
+                    Number of divisions equally spaced (`int`).
+                ``x_begin``:
+                    Begin of the x_axis (`number`).
+                ``x_end``:
+                    End of the x_axis (`number`).
+            
+            Yields
+            ------
+            x : np.array
+                The x position of the divisions of the chunk in cm.
+            
+            y : np.array
+                The value of displacement for each x.
+        """
+        return self._iterDiagram(self.getDisplacement, chunk_size, **options)
+    
+    def iterRotationDiagram(self, chunk_size=diagram_chunk_size, **options):
+        """
+            Same as beam.getRotationDiagram, but yields the (x, y) in chunks of chunk_size points,
+            so the diagram can be exported or reduced without having all of it in memory.
+            
+                Call signatures:
+                    
+                    beam.iterRotationDiagram(chunk_size=diagram_chunk_size, **options)
+                
+                >>> maximum = max(y.max() for x, y in beam.iterRotationDiagram(division=10**7))
+            
+            Parameters
+            ----------
+            chunk_size : int, optional
+                Maximum number of points of each chunk. Default is config.diagram_chunk_size.
+            
+            **options
+                
+                ``division``:
+                    Number of divisions equally spaced (`int`).
+                ``x_begin``:
+                    Begin of the x_axis (`number`).
+                ``x_end``:
+                    End of the x_axis (`number`).
+            
+            Yields
+            ------
+            x : np.array
+                The x position of the divisions of the chunk in cm.
+            
+            y : np.array
+                The value of rotation for each x.
+        """
+        return self._iterDiagram(self.getRotation, chunk_size, **options)
+    
+    def _iterDiagram(self, function, chunk_size=diagram_chunk_size, division=1000, x_begin="begin", x_end="end", **options):
+        x_begin = self.x_begin+e if x_begin=="begin" else x_begin
+        x_end = self.x_end-e if x_end=="end" else x_end
+        chunk_size = max(1, int(chunk_size))
+        # Same points of np.linspace(x_begin, x_end, division), created one chunk at a time
+        step = (x_end-x_begin)/(division-1) if division > 1 else 0
+        for start in range(0, division, chunk_size):
+            stop = min(start+chunk_size, division)
+            x = np.arange(start, stop)*step + x_begin
+            if stop == division and division > 1: x[-1] = x_end
+            yield x, function(x)
+    
+    def saveDiagrams(self, file, **options):
+        """
+            Saves x and the shear, momentum, rotation and displacement diagrams in a single .npy file, one column each.
+            Each column is stored contiguous, so it can be read alone with memory mapping by beam.loadDiagrams.
+            
+                Call signatures:
+                    
+                    beam.saveDiagrams(file, **options)
+                
+                >>> beam.saveDiagrams("beam.npy", division=10**6)
+                >>> momentum = fc.Beam.loadDiagrams("beam.npy")["momentum"]
+            
+            Parameters
+            ----------
+            file : str or file
+                Where to save. The extension .npy is added to a str without it.
+            
+            **options
+                
+                ``division``:
+                    Number of divisions equally spaced (`int`).
+                ``x_begin``:
+                    Begin of the x_axis (`number`).
+                ``x_end``:
+                    End of the x_axis (`number`).
+        """
+        save_columns(file, self._getDiagramColumns(**options))
+    
+    def _getDiagramColumns(self, **options):
+        # All the columns share the same x
+        options["adaptive"] = False
+        x, shear = self.getShearDiagram(**options)
+        columns = { "x": x, "shear": shear, "momentum": self.getInternalMomentumStrength(x) }
+        if hasattr(self, "displacement_polynomial"):
+            columns["rotation"] = self.getRotation(x)
+            columns["displacement"] = self.getDisplacement(x)
+        return columns
+    
+    @staticmethod
+    def loadDiagrams(file, mmap_mode="r"):
+        """
+            Loads the diagrams saved by beam.saveDiagrams.
+            
+                Call signatures:
+                    
+                    fc.Beam.loadDiagrams(file, mmap_mode="r")
+            
+            Parameters
+            ----------
+            file : str or file
+                The saved file.
+            
+            mmap_mode : str, optional
+                Memory mapping mode of np.load. Default is "r": the columns are views of the file, read only when used.
+                None loads all the columns in memory.
+            
+            Returns
+            -------
+            columns : dict of np.array
+                The columns "x", "shear", "momentum", "rotation" and "displacement", in cm, kN and kNcm.
+        """
+        return load_columns(file, mmap_mode)
+    
     def plotMomentumDiagram(self, **options):
         """
             Simply applies the beam.getMomentumDiagram method results (x,y) to a plot with plt.plot(x, y).\n
@@ -2,12 +2,15 @@ import numpy as np
 from fconcrete.Structural.Node import Node, Nodes
 from fconcrete.Structural.Section import unitary_section
 from fconcrete.Structural.Material import unitary_material
+from fconcrete.helpers import slots_dict, ColumnarList
 import copy
 
 class BeamElement:
     """
         Class that defines a primitive elements of a beam.
     """
+    __slots__ = ("section", "material", "x", "E", "I", "n1", "n2", "length", "flexural_rigidity")
+    
     def __init__(self, nodes, section=unitary_section, material=unitary_material):
         """
             Define the beam_elements that, together, makes the whole Beam. 
@@ -95,41 +98,47 @@ class BeamElement:
         return [bar1, bar2]
         
     def __repr__(self):
-        return str(self.__dict__)
+        return str(slots_dict(self))
 
 
-class BeamElements:
+class BeamElements(ColumnarList):
     """
         Class that defines a primitive elements of a beam list with easy to work properties and methods.
     """
+    _columns = (("materials", "material"), ("sections", "section"), ("x_start", "n1.x"), ("x_end", "n2.x"),
+                ("length", "length"), ("I", "I"), ("flexural_rigidity", "flexural_rigidity"))
+    _elements_name = "bar_elements"
+    
     def __init__(self, bar_elements):
-        self.bar_elements = np.array(bar_elements)
-        self.materials = np.array([ bar_element.material for bar_element in bar_elements ])
-        self.sections = np.array([ bar_element.section for bar_element in bar_elements ])
-        self.x_start = np.array([ bar_element.n1.x for bar_element in bar_elements ])
-        self.x_end = np.array([ bar_element.n2.x for bar_element in bar_elements ])
-        self.length = np.array([ bar_element.length for bar_element in bar_elements ])
-        self.flexural_rigidity = np.array([ bar_element.flexural_rigidity for bar_element in bar_elements ])
-        self.nodes = Nodes(np.concatenate((
-                [ beam.n1 for beam in bar_elements ],
-                [bar_elements[-1].n2 ] 
-        )))
-        condition_boundary = np.vstack((
-            [ beam.n1.condition_boundary for beam in bar_elements ],
-            bar_elements[-1].n2.condition_boundary
-        ))
-        self.condition_boundary = (condition_boundary.reshape((1, condition_boundary.size))==1)[0]
+        self._setColumns(bar_elements)
+    
+    def _setDerived(self):
+        bar_elements = self.bar_elements
+        self.nodes = Nodes([ *[ beam.n1 for beam in bar_elements ], bar_elements[-1].n2 ] if len(bar_elements) else [])
+        self.condition_boundary = self.nodes.condition_boundary.reshape(-1)==1
     
     @classmethod
     def create(cls, beam_elements):
         """
             Recommended way to create a BeamElements class.
         """
-        if str(type(beam_elements)) == "<class 'fconcrete.Structural.BeamElement.BeamElements'>": return beam_elements
-        beam_elements = np.array(beam_elements)
-        x_start = np.array([ beam_element.n1.x for beam_element in beam_elements ])
-        bar_sort_position = np.argsort(x_start)
-        return cls(beam_elements[bar_sort_position])
+        if isinstance(beam_elements, BeamElements): return beam_elements
+        beam_elements = cls(beam_elements)
+        return beam_elements.take(np.argsort(beam_elements.x_start))
+    
+    def get_matrix_rigidity_unitary(self):
+        """
+            Returns the unitary rigidity matrix of all beam elements, as an array with shape (number of beam elements, 4, 4).
+        """
+        length = self.length
+        ones = np.ones_like(length)
+        matrix = np.array([
+            [12*ones, 6*length, -12*ones, 6*length],
+            [6*length, 4*length**2, -6*length, 2*length**2],
+            [-12*ones, -6*length, 12*ones, -6*length],
+            [6*length, 2*length**2, -6*length, 4*length**2]
+        ]).transpose(2, 0, 1)
+        return (self.flexural_rigidity/length**3)[:, np.newaxis, np.newaxis]*matrix
     
     def split(self, x):
         """
@@ -0,0 +1,292 @@
+from fconcrete.Structural.BeamElement import BeamElements
+from fconcrete.Structural.Load import Loads
+from fconcrete.Structural.BandedMatrix import BandedMatrix
+from fconcrete.config import banded_solver_minimum_size
+import numpy as np
+
+try:
+    from scipy.linalg import cho_factor, cho_solve
+except ImportError:
+    cho_factor = cho_solve = None
+
+
+class BeamModel:
+    """
+        Linear system of a beam with fixed beam_elements and supports.
+        The rigidity matrix is assembled and factorized only once, so many load cases can be solved at the cost of a substitution each.
+
+        Attributes
+        ----------
+        beam_elements: BeamElements
+            BeamElements of the model. The loads can begin and end inside them,
+            so the beam.initial_beam_elements of a Beam can be solved without the middle nodes of beam.beam_elements.
+
+        condition_boundary: np.array of bool
+            True for the degrees of freedom that are free to move.
+
+        x_begin: number
+            Where the beam starts, in cm.
+
+        x_end: number
+            Where the beam ends, in cm.
+    """
+    def __init__(self, beam_elements):
+        """
+            Creates the linear system of a beam.
+
+                Call signatures:
+
+                    fc.BeamModel(beam_elements)
+
+                >>> n1 = fc.Node.SimpleSupport(x=0)
+                >>> n2 = fc.Node.SimpleSupport(x=400)
+                >>> model = fc.BeamModel([fc.BeamElement([n1, n2])])
+                >>> nodal_efforts, U = model.solveLoadCases([
+                >>>     [fc.Load.PontualLoad(-1, x=100)],
+                >>>     [fc.Load.PontualLoad(-1, x=200)],
+                >>> ])
+
+            Parameters
+            ----------
+            beam_elements : [BeamElement] or BeamElements
+                Define the beam_elements that, together, makes the whole Beam.
+        """
+        beam_elements = BeamElements.create(beam_elements)
+        self.beam_elements = beam_elements
+        self.condition_boundary = beam_elements.condition_boundary
+        self.x_begin, self.x_end = beam_elements.nodes[0].x, beam_elements.nodes[-1].x
+        self._matrix_rigidity_global = None
+        self._factorizations = {}
+
+    def matrix_rigidity_global(self):
+        """
+            Returns the global rigidity matrix. Also known by the letter "K".
+        """
+        matrix_rigidity_row = 2*len(self.beam_elements)+2
+        matrix_rigidity_global = np.zeros(
+            (matrix_rigidity_row, matrix_rigidity_row))
+        # The beam element n acts in the degrees of freedom 2n to 2n+3
+        degrees_of_freedom = 2*np.arange(len(self.beam_elements))[:, np.newaxis] + np.arange(4)
+        np.add.at(matrix_rigidity_global,
+                  (degrees_of_freedom[:, :, np.newaxis], degrees_of_freedom[:, np.newaxis, :]),
+                  self.beam_elements.get_matrix_rigidity_unitary())
+        return matrix_rigidity_global
+
+    def matrix_rigidity_global_banded(self):
+        """
+            Returns the global rigidity matrix as a BandedMatrix with half bandwidth 3.
+            Same as model.matrix_rigidity_global, but with memory linear with the number of beam_elements.
+        """
+        matrix_rigidity_global = BandedMatrix.zeros(2*len(self.beam_elements)+2, 3)
+        matrix_rigidity_global.addBlocks(2*np.arange(len(self.beam_elements)), self.beam_elements.get_matrix_rigidity_unitary())
+        return matrix_rigidity_global
+
+    @property
+    def is_banded(self):
+        """
+            True if the system is big enough to use the banded solver.
+            The banded solver is linear with the size of the system, but has a bigger overhead for small ones.
+        """
+        return len(self.condition_boundary) >= banded_solver_minimum_size
+
+    def _getMatrixRigidity(self):
+        """
+            Returns the global rigidity matrix, assembled only once. It is a BandedMatrix if model.is_banded.
+        """
+        if self._matrix_rigidity_global is None:
+            self._matrix_rigidity_global = self.matrix_rigidity_global_banded() if self.is_banded else self.matrix_rigidity_global()
+        return self._matrix_rigidity_global
+
+    def _getFactorization(self, condition):
+        """
+            Returns the factorization of the rigidity matrix with only the rows and columns where condition is True,
+            made only once for each condition.
+        """
+        key = np.asarray(condition, dtype=bool).tobytes()
+        if key not in self._factorizations:
+            self._factorizations[key] = self._factorize(condition)
+        return self._factorizations[key]
+
+    def _factorize(self, condition):
+        """
+            Cholesky factorization of the rigidity matrix with only the rows and columns where condition is True.
+            The small systems use the dense one of scipy, if it is installed. Otherwise, the banded one of BandedMatrix (half bandwidth 3).
+        """
+        matrix_rigidity_global = self._getMatrixRigidity()
+        if self.is_banded:
+            factorization = matrix_rigidity_global.submatrix(condition)
+        elif cho_factor is not None:
+            return cho_factor(matrix_rigidity_global[condition, :][:, condition], lower=True)
+        else:
+            factorization = BandedMatrix.fromDense(matrix_rigidity_global[condition, :][:, condition], 3)
+        factorization.cholesky()
+        return factorization
+
+    def _solveFactorized(self, condition, vector):
+        """
+            Solves the rigidity matrix with only the rows and columns where condition is True, by its factorization.
+        """
+        factorization = self._getFactorization(condition)
+        if isinstance(factorization, BandedMatrix): return factorization.solve(vector)
+        return cho_solve(factorization, vector)
+
+    def getBeamElementIndexInX(self, x):
+        """
+            Same index as beam.getBeamElementInX, for one or many positions (in cm).
+        """
+        index = np.searchsorted(self.beam_elements.nodes.x, x, side="right") - 1
+        return np.clip(index, 0, len(self.beam_elements)-1)
+
+    def getNodalLoads(self, loads):
+        """
+            Returns the nodal load vector (efforts of double crimped beam elements joined by node) of the loads.
+            All the loads are processed at once from the columns of Loads:
+            the pontual loads by the closed form efforts of the beam element where they are
+            and the distributed loads by the sum of q in each beam element they fully cover,
+            plus the closed form efforts of the beam elements where they begin and end.
+
+            Parameters
+            ----------
+            loads : [Load] or Loads
+                Loads applied to the beam. They can begin and end inside the beam elements, which must be prismatic.
+        """
+        loads = Loads.create(loads)
+        beam_elements = self.beam_elements
+        efforts = np.zeros((len(beam_elements), 4))
+
+        is_pontual = loads.order == 0
+        if is_pontual.any():
+            force = loads.force[is_pontual]
+            x = loads.x[is_pontual]
+            index = self.getBeamElementIndexInX(x)
+            length = beam_elements.length[index]
+            distance_a = x - beam_elements.x_start[index]
+            if (distance_a > length).any(): raise Exception("Distance from node cannot exceed the beam size.")
+            distance_b = length - distance_a
+            ma = force*distance_a*distance_b**2/length**2
+            mb = -force*distance_b*distance_a**2/length**2
+            ra = (force*distance_b+ma+mb)/length
+            np.add.at(efforts, index, -np.stack((ra, ma, force-ra, mb), axis=1))
+
+        is_distributed = ~is_pontual
+        if is_distributed.any():
+            q = loads.q[is_distributed]
+            x_begin = np.maximum(loads.x_begin[is_distributed], self.x_begin)
+            x_end = np.minimum(loads.x_end[is_distributed], self.x_end)
+            is_inside = x_begin < x_end
+            q, x_begin, x_end = q[is_inside], x_begin[is_inside], x_end[is_inside]
+            # Beam elements where each load begins and ends
+            nodes_x = beam_elements.nodes.x
+            first = np.clip(np.searchsorted(nodes_x, x_begin, side="right") - 1, 0, len(beam_elements)-1)
+            last = np.clip(np.searchsorted(nodes_x, x_end, side="left") - 1, 0, len(beam_elements)-1)
+            
+            # The beam elements between first and last are fully covered, summed by the difference of q after the first and after the last one
+            is_covering = first+1 < last
+            q_difference = np.zeros(len(beam_elements)+1)
+            np.add.at(q_difference, first[is_covering]+1, q[is_covering])
+            np.add.at(q_difference, last[is_covering], -q[is_covering])
+            q_covering = np.cumsum(q_difference[:-1])
+            length = beam_elements.length
+            efforts -= np.stack((q_covering*length/2, q_covering*length**2/12, q_covering*length/2, -q_covering*length**2/12), axis=1)
+            
+            # The first and the last ones can be partially covered
+            is_same = first == last
+            index = np.concatenate((first, last[~is_same]))
+            begin = np.concatenate((x_begin, beam_elements.x_start[last[~is_same]])) - beam_elements.x_start[index]
+            end = np.concatenate((np.where(is_same, x_end, beam_elements.x_end[first]), x_end[~is_same])) - beam_elements.x_start[index]
+            np.add.at(efforts, index, self._getPartialDistributedEfforts(beam_elements.length[index], begin, end, np.concatenate((q, q[~is_same]))))
+
+        # join separate beams into a node vector
+        nodal_loads = np.zeros(2*len(beam_elements)+2)
+        degrees_of_freedom = 2*np.arange(len(beam_elements))[:, np.newaxis] + np.arange(4)
+        np.add.at(nodal_loads, degrees_of_freedom, efforts)
+        return nodal_loads
+
+    @staticmethod
+    def _getPartialDistributedEfforts(length, begin, end, q):
+        """
+            Efforts of a double crimped prismatic beam element with a distributed load q from begin to end (distances from its first node).
+            Same as the efforts of a pontual load, integrated from begin to end.
+        """
+        def integral(function):
+            return function(end) - function(begin)
+        ma = q*integral(lambda x: length**2*x**2/2 - 2*length*x**3/3 + x**4/4)/length**2
+        mb = -q*integral(lambda x: length*x**3/3 - x**4/4)/length**2
+        ra = (q*integral(lambda x: length*x - x**2/2)+ma+mb)/length
+        return -np.stack((ra, ma, q*(end-begin)-ra, mb), axis=1)
+
+    def solve(self, nodal_loads):
+        """
+            Solves the system for one or many nodal load vectors.
+
+            Parameters
+            ----------
+            nodal_loads : np.array
+                Nodal load vector with shape (degrees of freedom,) or many of them as columns of an array with shape (degrees of freedom, number of cases).
+
+            Returns
+            -------
+            nodal_efforts : np.array
+                The nodal efforts (support reactions) with the same shape of nodal_loads.
+
+            U : np.array
+                Displacement and rotation in the nodes with the same shape of nodal_loads.
+        """
+        nodal_loads = np.asarray(nodal_loads, dtype=float)
+        condition_boundary = self.condition_boundary
+        U = np.zeros(nodal_loads.shape)
+        U[condition_boundary] = self._solveFactorized(condition_boundary, nodal_loads[condition_boundary])
+        F = self._getMatrixRigidity() @ U
+        return nodal_loads - F, U
+
+    def recoverDisplacements(self, nodal_loads, U, is_known):
+        """
+            Solves only the degrees of freedom where is_known is False, given U in the other ones.
+            Used to recover the middle nodes condensed out by a model with less nodes (see Beam condensed option).
+
+            Parameters
+            ----------
+            nodal_loads : np.array
+                Nodal load vector of this model.
+
+            U : np.array
+                Displacement and rotation in the nodes. Only the values where is_known is True are used.
+
+            is_known : np.array of bool
+                True for the degrees of freedom with known displacement.
+
+            Returns
+            -------
+            U : np.array
+                Displacement and rotation in all the nodes.
+        """
+        is_unknown = self.condition_boundary & ~is_known
+        U = np.where(is_known, U, 0)
+        residual = nodal_loads - self._getMatrixRigidity() @ U
+        U[is_unknown] = self._solveFactorized(is_unknown, residual[is_unknown])
+        return U
+
+    def solveLoadCases(self, load_cases):
+        """
+            Solves many load cases at once, with a single factorization.
+
+            Parameters
+            ----------
+            load_cases : list of [Load]
+                Each item is the list of loads of a case.
+
+            Returns
+            -------
+            nodal_efforts : np.array
+                Array with shape (degrees of freedom, number of cases). The column i has the nodal efforts of the case i.
+
+            U : np.array
+                Array with shape (degrees of freedom, number of cases). The column i has the displacement and rotation in the nodes of the case i.
+        """
+        nodal_loads = np.zeros((len(self.condition_boundary), len(load_cases)))
+        for index, loads in enumerate(load_cases):
+            if len(loads): nodal_loads[:, index] = self.getNodalLoads(loads)
+        return self.solve(nodal_loads)
+
+    def __repr__(self):
+        return str(self.__dict__)
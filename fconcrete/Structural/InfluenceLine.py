@@ -0,0 +1,229 @@
+from fconcrete.Structural.BeamElement import BeamElements
+from fconcrete.Structural.Load import Loads
+from fconcrete.Structural.BeamModel import BeamModel
+from fconcrete.helpers import cond_array
+from fconcrete.config import e, max_broadcast_size
+import numpy as np
+
+
+class InfluenceLine:
+    """
+        Influence lines of a beam: the effort in a section caused by a PontualLoad with force 1 in each position.
+        All the positions are solved with the same factorization of the rigidity matrix,
+        so moving loads (cranes, vehicles) can be checked in thousands of positions without creating a Beam for each one.
+
+        Attributes
+        ----------
+        beam_elements: BeamElements
+            BeamElements of the beam. Can be the beam.initial_beam_elements of a Beam.
+
+        model: BeamModel
+            Linear system of the beam.
+
+        x_begin: number
+            Where the beam starts, in cm.
+
+        x_end: number
+            Where the beam ends, in cm.
+    """
+    def __init__(self, beam_elements):
+        """
+            Creates the influence lines of a beam.
+
+                Call signatures:
+
+                    fc.InfluenceLine(beam_elements)
+
+                >>> n1 = fc.Node.SimpleSupport(x=0)
+                >>> n2 = fc.Node.SimpleSupport(x=400)
+                >>> n3 = fc.Node.SimpleSupport(x=800)
+                >>> influence_line = fc.InfluenceLine([fc.BeamElement([n1, n2]), fc.BeamElement([n2, n3])])
+                >>> positions, momentum = influence_line.getInfluenceLineDiagram(200, effort="momentum")
+                >>> truck = [fc.Load.PontualLoad(-60, x=0), fc.Load.PontualLoad(-60, x=150)]
+                >>> x, minimum, maximum = influence_line.getMovingLoadEnvelopeDiagram(truck, effort="momentum")
+
+            Parameters
+            ----------
+            beam_elements : [BeamElement] or BeamElements
+                Define the beam_elements that, together, makes the whole Beam.
+        """
+        beam_elements = BeamElements.create(beam_elements)
+        self.beam_elements = beam_elements
+        self.model = BeamModel(beam_elements)
+        self.x_begin, self.x_end = self.model.x_begin, self.model.x_end
+
+    def _getNodalLoads(self, positions):
+        """
+            Nodal load vectors of a PontualLoad with force 1 in each position, as an array with shape (degrees of freedom, len(positions)).
+            Same as model.getNodalLoads, but for all the positions at once.
+        """
+        index = self.model.getBeamElementIndexInX(positions)
+        length = self.beam_elements.length[index]
+        distance_a = positions - self.beam_elements.nodes.x[index]
+        distance_b = length - distance_a
+        ma = distance_a*distance_b**2/length**2
+        mb = -distance_b*distance_a**2/length**2
+        ra = (distance_b+ma+mb)/length
+        nodal_loads = np.zeros((len(self.model.condition_boundary), len(positions)))
+        columns = np.arange(len(positions))
+        for degree_of_freedom, effort in enumerate((ra, ma, 1-ra, mb)):
+            nodal_loads[2*index+degree_of_freedom, columns] -= effort
+        return nodal_loads
+
+    def getInfluenceLine(self, x, positions, effort="momentum"):
+        """
+            Influence line of the effort in the sections x.
+
+                Call signatures:
+
+                    influence_line.getInfluenceLine(x, positions, effort="momentum")
+
+            Parameters
+            ----------
+            x : number or list of number
+                Position of the sections, in cm.
+
+            positions : list of number
+                Positions of the PontualLoad with force 1, in cm. A load outside the beam causes no effort.
+
+            effort : str
+                "shear", "momentum" or "displacement". Default value is "momentum".
+
+            Returns
+            -------
+            values : np.array
+                Effort in each section for the load in each position, with shape (len(x), len(positions)).
+                If x is a number, it has shape (len(positions),).
+        """
+        if effort not in ("shear", "momentum", "displacement"): raise Exception('effort must be "shear", "momentum" or "displacement"')
+        sections = np.atleast_1d(np.asarray(x, dtype=float))
+        positions = np.asarray(positions, dtype=float)
+        values = np.zeros((len(sections), len(positions)))
+        is_inside = (positions >= self.x_begin) & (positions <= self.x_end)
+        inside_positions = positions[is_inside]
+
+        # Each chunk of positions is solved at once, bounded by config.max_broadcast_size
+        chunk_size = max(1, max_broadcast_size//max(len(self.model.condition_boundary), len(sections)*len(self.beam_elements.nodes)))
+        inside_values = np.zeros((len(sections), len(inside_positions)))
+        for start in range(0, len(inside_positions), chunk_size):
+            chunk = inside_positions[start:start+chunk_size]
+            nodal_efforts, U = self.model.solve(self._getNodalLoads(chunk))
+            inside_values[:, start:start+chunk_size] = self._getEffort(sections, chunk, effort, nodal_efforts, U)
+        values[:, is_inside] = inside_values
+
+        values[(sections < self.x_begin) | (sections > self.x_end)] = 0
+        return values[0] if np.ndim(x) == 0 else values
+
+    def _getEffort(self, sections, positions, effort, nodal_efforts, U):
+        """
+            Effort in the sections for a PontualLoad with force 1 in each position and its nodal efforts and displacements.
+        """
+        if effort == "displacement": return self._getDisplacement(sections, positions, U)
+        nodes_x = self.beam_elements.nodes.x
+        force, momentum = nodal_efforts[0::2], nodal_efforts[1::2]
+        # Same singularity functions of beam.getInternalShearStrength and beam.getInternalMomentumStrength
+        if effort == "shear":
+            return cond_array(sections[:, np.newaxis]-nodes_x, order=0) @ force + cond_array(sections[:, np.newaxis]-positions, order=0)
+        return (cond_array(sections[:, np.newaxis]-nodes_x, order=1) @ force
+                - cond_array(sections[:, np.newaxis]-nodes_x, singular=True) @ momentum
+                + cond_array(sections[:, np.newaxis]-positions, order=1))
+
+    def _getDisplacement(self, sections, positions, U):
+        """
+            Displacement in the sections: Hermite interpolation of the nodal displacements of each beam element,
+            plus the displacement of the double crimped beam element where the load is.
+        """
+        index = self.model.getBeamElementIndexInX(sections)
+        length = self.beam_elements.length[index][:, np.newaxis]
+        flexural_rigidity = self.beam_elements.flexural_rigidity[index][:, np.newaxis]
+        x_local = (sections - self.beam_elements.nodes.x[index])[:, np.newaxis]
+        xi = x_local/length
+        shape_functions = (1-3*xi**2+2*xi**3, length*(xi-2*xi**2+xi**3), 3*xi**2-2*xi**3, length*(xi**3-xi**2))
+        # The nodal loads of the model have the opposite sign of the forces, so U has the opposite sign of the displacement
+        displacement = -sum(shape_function*U[2*index+degree_of_freedom]
+                            for degree_of_freedom, shape_function in enumerate(shape_functions))
+
+        is_same_element = self.model.getBeamElementIndexInX(positions) == index[:, np.newaxis]
+        distance_a = positions - self.beam_elements.nodes.x[index][:, np.newaxis]
+        distance_b = length - distance_a
+        x_right = length - x_local
+        crimped_displacement = np.where(
+            x_local <= distance_a,
+            distance_b**2*x_local**2*(3*distance_a*length-(3*distance_a+distance_b)*x_local),
+            distance_a**2*x_right**2*(3*distance_b*length-(3*distance_b+distance_a)*x_right)
+        )/(6*flexural_rigidity*length**3)
+        return displacement + np.where(is_same_element, crimped_displacement, 0)
+
+    def getInfluenceLineDiagram(self, x, effort="momentum", division=1000):
+        """
+            Apply influence_line.getInfluenceLine for division positions of the load, equally spaced along the beam.
+
+            Returns
+            -------
+            positions : np.array
+                Positions of the load, in cm.
+
+            values : np.array
+                Effort in the section x for each position of the load.
+        """
+        positions = np.linspace(self.x_begin, self.x_end, division)
+        return positions, self.getInfluenceLine(x, positions, effort)
+
+    def getMovingLoadEnvelope(self, x, loads, effort="momentum", division=1000):
+        """
+            Minimum and maximum effort in the sections x while a train of PontualLoad crosses the beam.
+
+                Call signatures:
+
+                    influence_line.getMovingLoadEnvelope(x, loads, effort="momentum", division=1000)
+
+            Parameters
+            ----------
+            x : number or list of number
+                Position of the sections, in cm.
+
+            loads : [Load] or Loads
+                The PontualLoad of the train. Its x is the distance to the front of the train, in cm.
+
+            effort : str
+                "shear", "momentum" or "displacement". Default value is "momentum".
+
+            division : int
+                Number of positions of the train, equally spaced from when it enters the beam until it leaves it.
+                Default value is 1000.
+
+            Returns
+            -------
+            minimum, maximum : number or np.array
+                Envelope of the effort in each section.
+        """
+        loads = Loads.create(loads)
+        if (loads.order != 0).any(): raise Exception("The moving loads must be PontualLoad")
+        forces, offsets = loads.force, loads.x
+        # The train moves from the front entering the beam to the back leaving it
+        front = np.linspace(self.x_begin - offsets.max(), self.x_end - offsets.min(), division)
+        positions = (front + offsets[:, np.newaxis]).ravel()
+        influence_lines = np.atleast_2d(self.getInfluenceLine(x, positions, effort))
+        values = (forces[:, np.newaxis]*influence_lines.reshape(-1, len(forces), division)).sum(axis=1)
+        minimum, maximum = values.min(axis=1), values.max(axis=1)
+        if np.ndim(x) == 0: return minimum[0], maximum[0]
+        return minimum, maximum
+
+    def getMovingLoadEnvelopeDiagram(self, loads, effort="momentum", division=100, load_division=1000):
+        """
+            Apply influence_line.getMovingLoadEnvelope for division sections equally spaced along the beam,
+            from x_begin+e to x_end-e like the other diagrams.
+
+            Returns
+            -------
+            x : np.array
+                Position of the sections, in cm.
+
+            minimum, maximum : np.array
+                Envelope of the effort in each section.
+        """
+        x = np.linspace(self.x_begin+e, self.x_end-e, division)
+        return (x, *self.getMovingLoadEnvelope(x, loads, effort, load_division))
+
+    def __repr__(self):
+        return str(self.__dict__)
@@ -1,10 +1,12 @@
 import numpy as np
-from fconcrete.helpers import to_unit
+from fconcrete.helpers import to_unit, slots_dict, ColumnarList
 
 class Load:
     """
         Class that defines a load.
     """
+    __slots__ = ("x", "x_begin", "x_end", "force", "momentum", "q", "order", "displacement")
+    
     def __init__(self, force, momentum, x_begin, x_end, q=0, order=0, displacement=0):
         force = to_unit(force, "kN")
         momentum = to_unit(momentum, "kNcm")
@@ -89,41 +91,75 @@ class Load:
     #    return cls(0, 0, x, x, displacement=displacement)
     
     def __repr__(self):
-        return str(self.__dict__)+'\n'
+        return str(slots_dict(self))+'\n'
 
 
-class Loads:
+class Loads(ColumnarList):
     """
         Class that defines a load list with easy to work properties and methods.
     """
+    _columns = (("x", "x"), ("x_begin", "x_begin"), ("x_end", "x_end"), ("force", "force"),
+                ("momentum", "momentum"), ("q", "q"), ("order", "order"))
+    _elements_name = "_loads"
+    
     def __init__(self, loads):
-        loads = np.array(loads)
-        self.loads = loads
-        self.x = np.array([ load.x for load in loads ])
-        self.x_begin = np.array([ load.x_begin for load in loads ])
-        self.x_end = np.array([ load.x_end for load in loads ])
-        self.force = np.array([ load.force for load in loads ])
-        self.momentum = np.array([ load.momentum for load in loads ])
-        self.q = np.array([ load.q for load in loads ])
-        self.order = np.array([ load.order for load in loads ])
+        self._setColumns(loads)
     
     @classmethod
     def create(cls, loads):
         """
             Creates a instance of Loads with array of Load.
         """
-        loads = np.array(loads)
-        x_start = np.array([ load.x_begin for load in loads ])
-        load_sort_position = np.argsort(x_start)
-        return cls(loads[load_sort_position])
+        loads = loads if isinstance(loads, Loads) else cls(loads)
+        return loads.take(np.argsort(loads.x_begin))
+    
+    @classmethod
+    def fromArrays(cls, force, momentum, x_begin, x_end, q=0, order=0):
+        """
+            Creates a instance of Loads from the properties of each load, without creating a Load for each one.
+            The Load instances are only created if loads.loads is used.
+            
+                Call signatures:
+
+                    fc.Loads.fromArrays(force, momentum, x_begin, x_end, q=0, order=0)
+
+                >>> reactions = fc.Loads.fromArrays(force=[5, 5], momentum=[0, 0], x_begin=[0, 400], x_end=[0, 400])
+            
+            Parameters
+            ----------
+            force, momentum, x_begin, x_end, q, order : number or list of number
+                Same as the arguments of Load, in kN, kNcm and cm. A number is used for all the loads.
+        """
+        force, momentum, x_begin, x_end, q, order = np.broadcast_arrays(
+            np.asarray(force, dtype=float), np.asarray(momentum, dtype=float),
+            np.asarray(x_begin, dtype=float), np.asarray(x_end, dtype=float),
+            np.asarray(q, dtype=float), np.asarray(order, dtype=int))
+        loads = cls.__new__(cls)
+        loads._loads = None
+        loads.x = x_begin + (x_end-x_begin)/2
+        loads.x_begin, loads.x_end = x_begin.copy(), x_end.copy()
+        loads.force, loads.momentum = force.copy(), momentum.copy()
+        loads.q, loads.order = q.copy(), order.copy()
+        return loads
     
+    @property
+    def loads(self):
+        """
+            Array of Load. Created only when it is used, if the instance was created by Loads.fromArrays.
+        """
+        if self._loads is None:
+            self._loads = np.array([ Load(force, momentum, x_begin, x_end, q=q, order=order)
+                                     for force, momentum, x_begin, x_end, q, order
+                                     in zip(self.force, self.momentum, self.x_begin, self.x_end, self.q, self.order) ])
+        return self._loads
     
     def add(self, loads):
         """
-            Add a array of Load in the Loads instance.
+            Add a array of Load (or a Loads instance) in the Loads instance.
+            The loads are merged by their properties in a single sort, keeping the order of the ones with the same x_begin.
         """
-        loads = np.concatenate((self.loads,loads))
-        return self.create(loads)
+        if not isinstance(loads, Loads): loads = Loads(loads)
+        return self.concatenate(loads).sort("x_begin")
     
     def __repr__(self):
         return str(self.loads)
@@ -131,6 +167,5 @@ class Loads:
     def __getitem__(self, key):
         return self.loads[key]
     
-    def __len__(self):
-        return len(self.loads)
-    
+    def __iter__(self):
+        return iter(self.loads)
@@ -0,0 +1,588 @@
+import numpy as np
+import itertools
+from fconcrete.Structural.Load import Load, Loads
+from fconcrete.Structural.PiecewisePolynomial import PiecewisePolynomial
+from fconcrete.config import e
+from fconcrete.helpers import adaptive_sampling
+
+
+class LoadCase:
+    """
+        Class that defines a named group of characteristic loads that act together.
+
+        Attributes
+        ----------
+        name : str
+            Name of the load case. Must be unique.
+
+        loads : list of Load
+            Characteristic loads of the case.
+
+        type : str
+            "permanent" or "variable".
+
+        gamma : number
+            Partial factor when the load case is unfavorable.
+
+        gamma_favorable : number
+            Partial factor when the load case is favorable.
+
+        psi0, psi1, psi2 : number
+            Reduction factors of a variable load case for the combination, frequent and quasi permanent values.
+
+        pattern : bool
+            If True, each span is loaded or not independently, whichever is unfavorable (pattern loading).
+    """
+    def __init__(self, name, loads, type="permanent", gamma=1.4, gamma_favorable=1, psi0=1, psi1=1, psi2=1, pattern=False):
+        """
+            Returns a load case. The recommended way is to use fc.LoadCase.Permanent or fc.LoadCase.Variable.
+        """
+        if type not in ("permanent", "variable"): raise Exception('type must be "permanent" or "variable"')
+        if pattern and type != "variable": raise Exception("Only variable load cases can have pattern loading")
+        self.name = name
+        self.loads = list(loads)
+        self.type = type
+        self.gamma = gamma
+        self.gamma_favorable = gamma_favorable
+        self.psi0 = psi0
+        self.psi1 = psi1
+        self.psi2 = psi2
+        self.pattern = pattern
+
+    @classmethod
+    def Permanent(cls, name, loads, gamma=1.4, gamma_favorable=1):
+        """
+            Define a permanent load case (own weight, walls, floor finishing, etc).
+
+                Call signatures:
+
+                    fc.LoadCase.Permanent(name, loads, gamma=1.4, gamma_favorable=1)
+
+                >>> walls = fc.LoadCase.Permanent("walls", [fc.Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=400)])
+
+            Parameters
+            ----------
+            name : str
+                Name of the load case.
+
+            loads : list of Load
+                Characteristic loads of the case.
+
+            gamma : number, optional
+                Partial factor when the load case is unfavorable. NBR 6118 normal combination value is 1.4.
+
+            gamma_favorable : number, optional
+                Partial factor when the load case is favorable. NBR 6118 normal combination value is 1.
+        """
+        return cls(name, loads, type="permanent", gamma=gamma, gamma_favorable=gamma_favorable)
+
+    @classmethod
+    def Variable(cls, name, loads, gamma=1.4, psi0=0.5, psi1=0.4, psi2=0.3, pattern=False):
+        """
+            Define a variable load case (use, wind, temperature, etc).
+            A variable load case is never considered when it is favorable.
+
+                Call signatures:
+
+                    fc.LoadCase.Variable(name, loads, gamma=1.4, psi0=0.5, psi1=0.4, psi2=0.3, pattern=False)
+
+                >>> use = fc.LoadCase.Variable("use", [fc.Load.UniformDistributedLoad(-0.05, x_begin=0, x_end=400)])
+                >>> use_in_alternate_spans = fc.LoadCase.Variable("use", [fc.Load.UniformDistributedLoad(-0.05, x_begin=0, x_end=1200)], pattern=True)
+
+            Parameters
+            ----------
+            name : str
+                Name of the load case.
+
+            loads : list of Load
+                Characteristic loads of the case.
+
+            gamma : number, optional
+                Partial factor when the load case is unfavorable. NBR 6118 normal combination value is 1.4.
+
+            psi0, psi1, psi2 : number, optional
+                Reduction factors for the combination, frequent and quasi permanent values.
+                Default values are the ones of NBR 6118 for residential buildings (0.5, 0.4 and 0.3).
+
+            pattern : bool, optional
+                If True, the loads of each span (between two supports) are considered or not independently, whichever is unfavorable.
+                It is the same as checking all the 2**(number of spans) patterns of loaded spans, but each span is solved only once.
+                Default value is False.
+        """
+        return cls(name, loads, type="variable", gamma=gamma, gamma_favorable=0, psi0=psi0, psi1=psi1, psi2=psi2, pattern=pattern)
+
+    def splitBySpans(self, spans):
+        """
+            Split the loads of the load case by span.
+
+            Parameters
+            ----------
+            spans : list of number
+                Sorted limits of the spans, in cm.
+
+            Returns
+            -------
+            loads_by_span : list of list of Load
+                The loads of each span. A pontual load in a support belongs to the span in its right.
+                A uniform distributed load is split in the supports, and its momentum (if any) is kept only in the first part.
+        """
+        spans = np.asarray(spans, dtype=float)
+        loads_by_span = [ [] for _ in range(len(spans)-1) ]
+        for load in self.loads:
+            if load.x_begin == load.x_end:
+                span = int(np.clip(np.searchsorted(spans, load.x_begin, side="right") - 1, 0, len(loads_by_span)-1))
+                loads_by_span[span].append(load)
+                continue
+            if load.order != 1: raise Exception("Only pontual and uniform distributed loads can be split by span, but the load case '{}' has a load of order {}".format(self.name, load.order))
+            momentum = load.momentum
+            for span in range(len(loads_by_span)):
+                x_begin, x_end = max(load.x_begin, spans[span]), min(load.x_end, spans[span+1])
+                if x_begin < x_end:
+                    loads_by_span[span].append(Load(load.q*(x_end-x_begin), momentum, x_begin, x_end, q=load.q, order=load.order))
+                    momentum = 0
+        return loads_by_span
+
+    def __repr__(self):
+        return str(self.__dict__)
+
+
+class LoadCombination:
+    """
+        Class that defines a combination of load cases: sum(factors[name]*load case).
+
+        Attributes
+        ----------
+        name : str
+            Name of the combination.
+
+        factors : dict
+            Factor of each load case, by the load case name. Missing load cases have factor 0.
+    """
+    def __init__(self, name, factors):
+        """
+            Returns a load combination.
+
+                Call signatures:
+
+                    fc.LoadCombination(name, factors)
+
+                >>> combination = fc.LoadCombination("ULS 1", {"walls": 1.4, "use": 1.4})
+
+            Parameters
+            ----------
+            name : str
+                Name of the combination.
+
+            factors : dict
+                Factor of each load case, by the load case name.
+        """
+        self.name = name
+        self.factors = dict(factors)
+
+    @classmethod
+    def NBR6118ULS(cls, load_cases):
+        """
+            Normal ultimate combinations of NBR 6118 (item 11.8.2.4):
+            sum(gamma_g*G) + gamma_q*(Q1 + sum(psi0*Qj)).
+            Each permanent load case is considered both unfavorable (gamma) and favorable (gamma_favorable),
+            and each variable load case is considered as the principal one, with all the other variable load cases.
+            Envelope only adds a variable load case where it is unfavorable, so there is no need of a combination for each subset
+            of them: there are 2**(number of permanent cases)*max(1, number of variable cases) combinations.
+
+                Call signatures:
+
+                    fc.LoadCombination.NBR6118ULS(load_cases)
+
+            Returns
+            -------
+            load_combinations : list of LoadCombination
+        """
+        permanent = [ load_case for load_case in load_cases if load_case.type == "permanent" ]
+        variable = [ load_case for load_case in load_cases if load_case.type == "variable" ]
+        load_combinations = []
+        for permanent_factors in itertools.product(*[ (load_case.gamma, load_case.gamma_favorable) for load_case in permanent ]):
+            factors = { load_case.name: factor for load_case, factor in zip(permanent, permanent_factors) }
+            variable_factors = [{ load_case.name: load_case.gamma if load_case is principal else load_case.gamma*load_case.psi0
+                                  for load_case in variable } for principal in variable ] or [{}]
+            for combination_variable_factors in variable_factors:
+                name = "ULS {}".format(len(load_combinations)+1)
+                load_combinations.append(cls(name, {**factors, **combination_variable_factors}))
+        return load_combinations
+
+    @classmethod
+    def NBR6118SLS(cls, load_cases, kind="quasi permanent"):
+        """
+            Service combinations of NBR 6118 (item 11.8.3):
+
+            - "quasi permanent": sum(G) + sum(psi2*Qj);
+            - "frequent": sum(G) + psi1*Q1 + sum(psi2*Qj);
+            - "rare": sum(G) + Q1 + sum(psi1*Qj).
+
+            For the frequent and rare combinations, each variable load case is considered as the principal one.
+
+                Call signatures:
+
+                    fc.LoadCombination.NBR6118SLS(load_cases, kind="quasi permanent")
+
+            Returns
+            -------
+            load_combinations : list of LoadCombination
+        """
+        permanent_factors = { load_case.name: 1 for load_case in load_cases if load_case.type == "permanent" }
+        variable = [ load_case for load_case in load_cases if load_case.type == "variable" ]
+        if kind == "quasi permanent":
+            return [cls("SLS quasi permanent", {**permanent_factors, **{ load_case.name: load_case.psi2 for load_case in variable }})]
+        if kind == "frequent":
+            principal_factor, secondary_factor = lambda load_case: load_case.psi1, lambda load_case: load_case.psi2
+        elif kind == "rare":
+            principal_factor, secondary_factor = lambda load_case: 1, lambda load_case: load_case.psi1
+        else:
+            raise Exception('kind must be "quasi permanent", "frequent" or "rare"')
+        if len(variable) == 0: return [cls("SLS {} 1".format(kind), permanent_factors)]
+        return [cls("SLS {} {}".format(kind, index+1), {
+                    **permanent_factors,
+                    **{ load_case.name: principal_factor(load_case) if load_case is principal else secondary_factor(load_case) for load_case in variable }
+                }) for index, principal in enumerate(variable) ]
+
+    def getLoads(self, load_cases):
+        """
+            Loads of the load cases multiplied by their factors in the combination.
+            The loads of the load cases without factor are kept with zero force, so a beam created with them
+            is split in the same positions as one created with all the loads of the load cases (see Envelope).
+
+                Call signatures:
+
+                    load_combination.getLoads(load_cases)
+
+                >>> quasi_permanent, = fc.LoadCombination.NBR6118SLS(load_cases)
+                >>> beam = fc.Beam(loads=quasi_permanent.getLoads(load_cases), beam_elements=beam_elements)
+
+            Returns
+            -------
+            loads : list of Load
+        """
+        return [ Load(factor*load.force, factor*load.momentum, load.x_begin, load.x_end, q=factor*load.q, order=load.order)
+                 for load_case in load_cases for factor in [self.factors.get(load_case.name, 0)] for load in load_case.loads ]
+
+    def __repr__(self):
+        return str(self.__dict__)
+
+
+class Envelope:
+    """
+        Maximum and minimum shear and momentum of a beam for a set of load combinations.
+        Each load case is solved only once (with the same factorization of the rigidity matrix)
+        and the combinations are made by linear superposition of the load cases diagrams.
+        A variable load case is never favorable, so in each position it is only added where its contribution is unfavorable.
+        The load cases with pattern loading are solved once for each span, and each span is added or not
+        in the same way, which is the governing pattern of loaded spans.
+
+        Attributes
+        ----------
+        load_cases : list of LoadCase
+
+        load_combinations : list of LoadCombination
+
+        factors : np.array
+            Array with shape (number of combinations, number of load cases) with the factor of each load case in each combination.
+
+        spans : np.array
+            Limits of the spans (supports and ends of the beam), in cm.
+
+        solved_cases : list of tuple
+            For each solved case, the index of its load case and the index of the span (None if the load case has no pattern loading).
+
+        nodal_efforts : np.array
+            Array with shape (degrees of freedom, number of solved cases) with the nodal efforts of each solved case.
+
+        shear_polynomials : list of PiecewisePolynomial
+            Exact shear diagram of each solved case.
+
+        momentum_polynomials : list of PiecewisePolynomial
+            Exact momentum diagram of each solved case.
+    """
+    def __init__(self, beam, load_cases, load_combinations=None):
+        """
+            Solve the load cases in the beam and combine them.
+
+                Call signatures:
+
+                    fc.Envelope(beam, load_cases, load_combinations=None)
+
+                >>> load_cases = [
+                >>>     fc.LoadCase.Permanent("walls", [fc.Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=800)]),
+                >>>     fc.LoadCase.Variable("use", [fc.Load.UniformDistributedLoad(-0.05, x_begin=0, x_end=400)]),
+                >>> ]
+                >>> beam = fc.Beam(loads=[load for load_case in load_cases for load in load_case.loads], beam_elements=[beam_element_1, beam_element_2])
+                >>> envelope = fc.Envelope(beam, load_cases)
+                >>> x, momentum_minimum, momentum_maximum = envelope.getMomentumEnvelopeDiagram()
+
+            Parameters
+            ----------
+            beam : Beam
+                Beam whose beam_elements are split in all loads of the load cases.
+                It happens if the beam is created with all the loads of the load cases.
+
+            load_cases : list of LoadCase
+                Load cases with characteristic loads.
+
+            load_combinations : list of LoadCombination, optional
+                Default is fc.LoadCombination.NBR6118ULS(load_cases).
+        """
+        load_combinations = LoadCombination.NBR6118ULS(load_cases) if load_combinations is None else load_combinations
+        names = [ load_case.name for load_case in load_cases ]
+        if len(set(names)) != len(names): raise Exception("The load cases must have different names")
+        for load_combination in load_combinations:
+            for name in load_combination.factors:
+                if name not in names: raise Exception("Load case '{}' of the combination '{}' does not exist".format(name, load_combination.name))
+
+        self.load_cases = load_cases
+        self.load_combinations = load_combinations
+        self.x_begin, self.x_end = beam.x_begin, beam.x_end
+        self.factors = np.array([[ load_combination.factors.get(name, 0) for name in names ]
+                                 for load_combination in load_combinations ], dtype=float).reshape(len(load_combinations), len(load_cases))
+
+        nodes = beam.beam_elements.nodes
+        is_support = np.array([ node.condition_boundary[0] == 0 for node in nodes ])
+        self.spans = np.unique(np.concatenate(([self.x_begin, self.x_end], nodes.x[is_support])))
+        self.solved_cases, solved_loads = [], []
+        for index, load_case in enumerate(load_cases):
+            if load_case.pattern:
+                for span, loads in enumerate(load_case.splitBySpans(self.spans)):
+                    self.solved_cases.append((index, span))
+                    solved_loads.append(loads)
+            else:
+                self.solved_cases.append((index, None))
+                solved_loads.append(load_case.loads)
+        self._parent = np.array([ index for index, _ in self.solved_cases ], dtype=int)
+        self._is_pattern = np.array([ span is not None for _, span in self.solved_cases ], dtype=bool)
+        # The solved cases that are only added where they are unfavorable
+        self._is_variable = np.array([ load_cases[index].type == "variable" for index in self._parent ], dtype=bool)
+
+        nodal_efforts, _ = beam._solveLoadCases(solved_loads)
+        self.nodal_efforts = nodal_efforts
+        breakpoints = beam._getBreakpoints()
+        self.shear_polynomials, self.momentum_polynomials = [], []
+        for index, loads in enumerate(solved_loads):
+            loads = Loads.create(loads).add(beam._getSupportLoads(nodal_efforts[:, index]))
+            self.shear_polynomials.append(PiecewisePolynomial.fromSingularityTerms(breakpoints, *beam._getSingularityTerms(0, loads)))
+            self.momentum_polynomials.append(PiecewisePolynomial.fromSingularityTerms(breakpoints, *beam._getSingularityTerms(1, loads)))
+
+    def getCombinationValues(self, x, effort="momentum"):
+        """
+            Value of the effort ("shear" or "momentum") of each combination in each x, with all the variable load cases in all the spans.
+
+            Returns
+            -------
+            values : np.array
+                Array with shape (number of combinations, len(x)).
+        """
+        return self._getWeights() @ self._getSolvedCasesValues(x, effort)
+
+    def _getSolvedCasesValues(self, x, effort):
+        polynomials = self._getPolynomials(effort)
+        return np.array([ polynomial(np.atleast_1d(x)) for polynomial in polynomials ]).reshape(len(polynomials), -1)
+
+    def _getWeights(self):
+        """
+            Factor of each solved case in each combination. Array with shape (number of combinations, number of solved cases).
+        """
+        return self.factors[:, self._parent]
+
+    def getCombinationPolynomial(self, name, effort="momentum"):
+        """
+            Exact diagram of the effort ("shear" or "momentum") for the combination with the given name,
+            with all the variable load cases in all the spans, as a PiecewisePolynomial.
+        """
+        names = [ load_combination.name for load_combination in self.load_combinations ]
+        if name not in names: raise Exception("Load combination '{}' does not exist".format(name))
+        polynomials = self._getPolynomials(effort)
+        coefficients = np.tensordot(self._getWeights()[names.index(name)], self._stackCoefficients(polynomials), axes=1)
+        return PiecewisePolynomial(polynomials[0].breakpoints, coefficients)
+
+    @staticmethod
+    def _stackCoefficients(polynomials):
+        """
+            Coefficients of polynomials with the same breakpoints as an array with shape (number of polynomials, number of segments, degree+1).
+        """
+        degree = max(polynomial.degree for polynomial in polynomials)
+        coefficients = np.zeros((len(polynomials), len(polynomials[0].coefficients), degree+1))
+        for index, polynomial in enumerate(polynomials):
+            coefficients[index, :, :polynomial.degree+1] = polynomial.coefficients
+        return coefficients
+
+    def _getPolynomials(self, effort):
+        if effort == "shear": return self.shear_polynomials
+        if effort == "momentum": return self.momentum_polynomials
+        raise Exception('effort must be "shear" or "momentum"')
+
+    def getShearEnvelope(self, x):
+        """
+            Minimum and maximum shear (in kN) of all combinations in x (number or list of number).
+        """
+        return self._getEnvelope(x, "shear")
+
+    def getMomentumEnvelope(self, x):
+        """
+            Minimum and maximum momentum (in kNcm) of all combinations in x (number or list of number).
+        """
+        return self._getEnvelope(x, "momentum")
+
+    def _getEnvelope(self, x, effort):
+        values = self._getSolvedCasesValues(x, effort)
+        weights = self._getWeights()
+        fixed = (weights*~self._is_variable) @ values
+        # Contribution of each variable solved case, with shape (combinations, variable solved cases, x)
+        variable = weights[:, self._is_variable, np.newaxis]*values[self._is_variable]
+        minimum = (fixed + np.clip(variable, None, 0).sum(axis=1)).min(axis=0)
+        maximum = (fixed + np.clip(variable, 0, None).sum(axis=1)).max(axis=0)
+        if np.ndim(x) == 0: return minimum[0], maximum[0]
+        return minimum, maximum
+
+    def getGoverningPattern(self, x, effort="momentum", extremum="maximum"):
+        """
+            Combination and loaded spans that give the maximum (or minimum) effort ("shear" or "momentum") in x.
+            The variable load cases of the combination that are not in loaded_spans are not added.
+
+                Call signatures:
+
+                    envelope.getGoverningPattern(x, effort="momentum", extremum="maximum")
+
+            Returns
+            -------
+            load_combination : LoadCombination
+                The governing combination.
+
+            loaded_spans : dict
+                For each variable load case of the combination, the list of the indexes of the loaded spans.
+                A variable load case without pattern loading has all the spans loaded, or none of them.
+        """
+        if extremum not in ("minimum", "maximum"): raise Exception('extremum must be "minimum" or "maximum"')
+        sign = 1 if extremum == "maximum" else -1
+        values = self._getSolvedCasesValues(x, effort)[:, 0]
+        contributions = sign*self._getWeights()*values
+        is_loaded = ~self._is_variable | (contributions > 0)
+        combination = int(np.argmax((contributions*is_loaded).sum(axis=1)))
+        load_combination = self.load_combinations[combination]
+        loaded_spans = { self.load_cases[index].name: [] for index in np.unique(self._parent[self._is_variable])
+                         if load_combination.factors.get(self.load_cases[index].name, 0) != 0 }
+        for (index, span), is_case_loaded in zip(self.solved_cases, is_loaded[combination]):
+            name = self.load_cases[index].name
+            if name not in loaded_spans or not is_case_loaded: continue
+            loaded_spans[name] += range(len(self.spans)-1) if span is None else [span]
+        return load_combination, loaded_spans
+
+    def getShearEnvelopeDiagram(self, **options):
+        """
+            Apply envelope.getShearEnvelope for options["division"] parts of the beam.
+
+            Parameters
+            ----------
+            **options
+
+                ``division``:
+                    Number of divisions equally spaced (`int`). With adaptive, the maximum number of divisions.
+                ``x_begin``:
+                    Begin of the x_axis (`number`).
+                ``x_end``:
+                    End of the x_axis (`number`).
+                ``adaptive``:
+                    If True, x is not equally spaced, as in beam.getMomentumDiagram (`bool`). Default is False.
+                ``tolerance``:
+                    Relative tolerance of the adaptive x (`number`). Default is 1e-3.
+
+            Returns
+            -------
+            x : list of number
+                The x position of the division in cm
+
+            minimum : list of number
+                The minimum shear for each x.
+
+            maximum : list of number
+                The maximum shear for each x.
+        """
+        return self._createEnvelopeDiagram("shear", **options)
+
+    def getMomentumEnvelopeDiagram(self, **options):
+        """
+            Apply envelope.getMomentumEnvelope for options["division"] parts of the beam.
+
+            Parameters
+            ----------
+            **options
+
+                ``division``:
+                    Number of divisions equally spaced (`int`). With adaptive, the maximum number of divisions.
+                ``x_begin``:
+                    Begin of the x_axis (`number`).
+                ``x_end``:
+                    End of the x_axis (`number`).
+                ``adaptive``:
+                    If True, x is not equally spaced, as in beam.getMomentumDiagram (`bool`). Default is False.
+                ``tolerance``:
+                    Relative tolerance of the adaptive x (`number`). Default is 1e-3.
+
+            Returns
+            -------
+            x : list of number
+                The x position of the division in cm
+
+            minimum : list of number
+                The minimum momentum for each x.
+
+            maximum : list of number
+                The maximum momentum for each x.
+        """
+        return self._createEnvelopeDiagram("momentum", **options)
+
+    def _createEnvelopeDiagram(self, effort, division=1000, x_begin="begin", x_end="end", adaptive=False, tolerance=1e-3, **options):
+        x_begin = self.x_begin+e if x_begin=="begin" else x_begin
+        x_end = self.x_end-e if x_end=="end" else x_end
+        if adaptive:
+            breakpoints = self.momentum_polynomials[0].breakpoints
+            breakpoints = breakpoints[(breakpoints > x_begin) & (breakpoints < x_end)]
+            x, (minimum, maximum) = adaptive_sampling(lambda x: np.array(self._getEnvelope(x, effort)),
+                                                      np.concatenate(([x_begin], breakpoints, [x_end])), division, tolerance)
+            return x, minimum, maximum
+        x = np.linspace(x_begin, x_end, division)
+        minimum, maximum = self._getEnvelope(x, effort)
+        return x, minimum, maximum
+
+    def getMaximumAbsoluteMomentum(self, x_begin="begin", x_end="end"):
+        """
+            Exact maximum absolute value of the momentum (in kNcm) of all combinations between x_begin and x_end (in cm).
+        """
+        return self._getMaximumAbsolute("momentum", x_begin, x_end)
+
+    def getMaximumAbsoluteShear(self, x_begin="begin", x_end="end"):
+        """
+            Exact maximum absolute value of the shear (in kN) of all combinations between x_begin and x_end (in cm).
+        """
+        return self._getMaximumAbsolute("shear", x_begin, x_end)
+
+    def _getMaximumAbsolute(self, effort, x_begin, x_end):
+        x_begin = self.x_begin if x_begin=="begin" else x_begin
+        x_end = self.x_end if x_end=="end" else x_end
+        polynomials = self._getPolynomials(effort)
+        # The loaded spans of the governing pattern only change where the contribution of a variable solved case changes its sign.
+        # Between these points, the envelope of each combination is a polynomial, whose extrema are exact.
+        sign_changes = [ polynomial.getRoots() for polynomial, is_variable in zip(polynomials, self._is_variable) if is_variable ]
+        breakpoints = np.concatenate(([x_begin, x_end], *sign_changes))
+        polynomials = [ polynomial.refine(breakpoints) for polynomial in polynomials ]
+        breakpoints = polynomials[0].breakpoints
+        coefficients = self._stackCoefficients(polynomials)
+        middle_values = self._getSolvedCasesValues((breakpoints[:-1]+breakpoints[1:])/2, effort)
+        
+        maximum = 0
+        for weights in self._getWeights():
+            contributions = weights[:, np.newaxis]*middle_values
+            for is_unfavorable in (contributions > 0, contributions < 0):
+                is_loaded = ~self._is_variable[:, np.newaxis] | is_unfavorable
+                envelope_coefficients = np.einsum("ki,kij->ij", weights[:, np.newaxis]*is_loaded, coefficients)
+                minimum_value, maximum_value = PiecewisePolynomial(breakpoints, envelope_coefficients).getExtrema(x_begin, x_end)
+                maximum = max(maximum, abs(minimum_value), abs(maximum_value))
+        return maximum
+
+    def __repr__(self):
+        return str(self.__dict__)
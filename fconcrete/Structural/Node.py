@@ -1,7 +1,9 @@
 import numpy as np
-from fconcrete.helpers import to_unit
+from fconcrete.helpers import to_unit, slots_dict, ColumnarList
 
 class Node:
+    __slots__ = ("x", "condition_boundary", "length")
+    
     def __init__(self, x, condition_boundary, length=0):
         """
             Represents a generical node.
@@ -113,21 +115,19 @@ class Node:
         return cls(x, [0, 0], length)
     
     def __repr__(self):
-        return str(self.__dict__)+'\n'
+        return str(slots_dict(self))+'\n'
 
 
-class Nodes:
+class Nodes(ColumnarList):
+    _columns = (("x", "x"), ("condition_boundary", "condition_boundary"))
+    _elements_name = "nodes"
+    
     def __init__(self, nodes):
-        self.nodes = np.array(nodes)
-        self.x = np.array([ node.x for node in nodes ])
-        self.condition_boundary = np.array([ node.condition_boundary for node in nodes ])
+        self._setColumns(nodes)
     
     def __repr__(self):
         return str(self.nodes)
     
     def __getitem__(self, key):
         return self.nodes[key]
-    
-    def __len__(self):
-        return len(self.nodes)
     
\ No newline at end of file
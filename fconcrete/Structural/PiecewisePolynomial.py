@@ -0,0 +1,322 @@
+import numpy as np
+from fconcrete.config import max_broadcast_size
+
+
+class PiecewisePolynomial:
+    """
+        Polynomial defined by parts.
+        The segment i goes from breakpoints[i] to breakpoints[i+1] and its value is
+        sum(coefficients[i, j]*(x-breakpoints[i])**j).
+
+        In a breakpoint, the value of the segment in its left is used (except in the first one).
+        It is the same convention of the singularity functions used by the Beam, where a load in x only acts after x.
+        Outside the breakpoints the value is 0.
+
+        Attributes
+        ----------
+        breakpoints : np.array of number
+            Sorted limits of the segments. There are len(breakpoints)-1 segments.
+
+        coefficients : np.array
+            Array with shape (number of segments, degree+1).
+            Row i has the coefficients of the segment i, from the lowest to the highest power of (x-breakpoints[i]).
+    """
+    def __init__(self, breakpoints, coefficients):
+        """
+            Creates a polynomial defined by parts.
+
+                Call signatures:
+
+                    fc.PiecewisePolynomial(breakpoints, coefficients)
+
+                >>> # f(x) = x between 0 and 1 and f(x) = 1 between 1 and 3
+                >>> polynomial = fc.PiecewisePolynomial([0, 1, 3], [[0, 1], [1, 0]])
+                >>> polynomial(2)
+                1.0
+                >>> polynomial.integrate(0, 3)
+                2.5
+
+            Parameters
+            ----------
+            breakpoints : list of number
+                Sorted limits of the segments.
+
+            coefficients : list of list of number
+                For each segment, the coefficients from the lowest to the highest power of (x-breakpoint).
+        """
+        breakpoints = np.asarray(breakpoints, dtype=float)
+        coefficients = np.asarray(coefficients, dtype=float)
+        if coefficients.ndim == 1: coefficients = coefficients[:, np.newaxis]
+        if len(breakpoints) != len(coefficients)+1: raise Exception("There must be one row of coefficients for each segment (len(breakpoints)-1 rows)")
+        self.breakpoints = breakpoints
+        self.coefficients = coefficients
+
+    @classmethod
+    def fromSingularityTerms(cls, breakpoints, weights, positions, orders):
+        """
+            Creates the polynomial sum(weights*cond(x-positions, order=orders)).
+            Every position inside the beam must be one of the breakpoints.
+            When (number of segments)*(number of terms) is bigger than config.max_broadcast_size,
+            the coefficients are accumulated by prefix sums (see PiecewisePolynomial.sumSingularityTerms).
+
+            Parameters
+            ----------
+            breakpoints : list of number
+                Sorted limits of the segments.
+
+            weights, positions, orders : list of number
+                Each term of the sum.
+        """
+        breakpoints = np.asarray(breakpoints, dtype=float)
+        weights = np.asarray(weights, dtype=float)
+        positions = np.asarray(positions, dtype=float)
+        orders = np.asarray(orders, dtype=int)
+        degree = int(orders.max(initial=0))
+        segments_begin = breakpoints[:-1]
+        # A term only acts in the segments that begin after it
+        if len(segments_begin)*len(weights) > max_broadcast_size:
+            return cls(breakpoints, cls.sumSingularityTerms(segments_begin, weights, positions, orders, side="right"))
+
+        pascal = cls._getPascalTriangle(degree)
+        coefficients = np.zeros((len(segments_begin), degree+1))
+        s = segments_begin[:, np.newaxis] - positions
+        active_weights = np.where(s >= 0, weights, 0)
+        for j in range(degree+1):
+            power = np.clip(orders-j, 0, None)
+            coefficients[:, j] = (active_weights*pascal[orders, j]*np.where(s >= 0, s, 0)**power).sum(axis=1)
+
+        return cls(breakpoints, coefficients)
+
+    @staticmethod
+    def _getPascalTriangle(degree):
+        # (t+s)**n = sum(comb(n, j)*s**(n-j)*t**j)
+        pascal = np.zeros((degree+1, degree+1))
+        pascal[:, 0] = 1
+        for n in range(1, degree+1):
+            pascal[n, 1:n+1] = pascal[n-1, :n] + pascal[n-1, 1:n+1]
+        return pascal
+
+    @classmethod
+    def sumSingularityTerms(cls, x, weights, positions, orders, side="left"):
+        """
+            Taylor coefficients of sum(weights*cond(x-positions, order=orders)) in each x, in O((len(x)+len(weights))*log) time and memory.
+            The terms are sorted by position and each x only reads the prefix sums of the terms before it,
+            instead of the broadcast of every term with every x.
+
+            Parameters
+            ----------
+            x : list of number
+                Where the coefficients are calculated. Does not need to be sorted.
+
+            weights, positions, orders : list of number
+                Each term of the sum.
+
+            side : str
+                "left" uses only the terms with position < x, so the column 0 is the value in x.
+                "right" also uses the terms with position == x, so each row is the polynomial just after x.
+
+            Returns
+            -------
+            coefficients : np.array
+                Array with shape (len(x), degree+1), where row i has the coefficients of the powers of (t-x[i]).
+        """
+        x = np.asarray(x, dtype=float)
+        weights = np.asarray(weights, dtype=float)
+        positions = np.asarray(positions, dtype=float)
+        orders = np.asarray(orders, dtype=int)
+        degree = int(orders.max(initial=0))
+        coefficients = np.zeros((len(x), degree+1))
+        if len(weights) == 0: return coefficients
+
+        sort_position = np.argsort(positions, kind="stable")
+        weights, positions, orders = weights[sort_position], positions[sort_position], orders[sort_position]
+        active_quantity = np.searchsorted(positions, x, side=side)
+        # Origin near the terms, so the powers of the expansion stay small
+        origin = positions[0]
+        u_powers = (x - origin)[:, np.newaxis]**np.arange(degree+1)
+        minus_v = origin - positions
+        pascal = cls._getPascalTriangle(degree)
+
+        # (u-v)**k = sum(comb(k, m)*u**(k-m)*(-v)**m) and the coefficient j of (t-x)**k is comb(k, j)*(u-v)**(k-j)
+        for order in np.unique(orders):
+            order_weights = np.where(orders == order, weights, 0)
+            for m in range(order+1):
+                prefix_sum = np.concatenate(([0], np.cumsum(order_weights*minus_v**m)))[active_quantity]
+                for j in range(order-m+1):
+                    coefficients[:, j] += pascal[order, j]*pascal[order-j, m]*u_powers[:, order-j-m]*prefix_sum
+        return coefficients
+
+    @property
+    def degree(self):
+        return self.coefficients.shape[1]-1
+
+    def getSegmentIndex(self, x):
+        """
+            Get the index of the segment used to evaluate x.
+        """
+        index = np.searchsorted(self.breakpoints, x, side="left") - 1
+        return np.clip(index, 0, len(self.coefficients)-1)
+
+    def __call__(self, x):
+        """
+            Evaluate the polynomial in x (number or list of number).
+        """
+        is_scalar = np.ndim(x) == 0
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        index = self.getSegmentIndex(x)
+        f_value = self._evaluateSegments(index, x-self.breakpoints[index])
+        f_value[(x < self.breakpoints[0]) | (x > self.breakpoints[-1])] = 0
+        return f_value[0] if is_scalar else f_value
+
+    def _evaluateSegments(self, index, t):
+        # Horner's method in the local coordinate t
+        coefficients = self.coefficients[index]
+        f_value = coefficients[..., -1]*np.ones_like(t)
+        for j in range(self.degree-1, -1, -1):
+            f_value = f_value*t + coefficients[..., j]
+        return f_value
+
+    def derivative(self):
+        """
+            Returns the derivative as a PiecewisePolynomial.
+        """
+        if self.degree == 0:
+            return PiecewisePolynomial(self.breakpoints, np.zeros((len(self.coefficients), 1)))
+        powers = np.arange(1, self.degree+1)
+        return PiecewisePolynomial(self.breakpoints, self.coefficients[:, 1:]*powers)
+
+    def antiderivative(self):
+        """
+            Returns the continuous antiderivative, equal to 0 in the first breakpoint, as a PiecewisePolynomial.
+        """
+        powers = np.arange(1, self.degree+2)
+        coefficients = np.zeros((len(self.coefficients), self.degree+2))
+        coefficients[:, 1:] = self.coefficients/powers
+        segments_length = np.diff(self.breakpoints)
+        segments_integral = (coefficients[:, 1:]*segments_length[:, np.newaxis]**powers).sum(axis=1)
+        coefficients[:, 0] = np.concatenate(([0], np.cumsum(segments_integral)[:-1]))
+        return PiecewisePolynomial(self.breakpoints, coefficients)
+
+    def integrate(self, x_begin, x_end):
+        """
+            Exact integral between x_begin and x_end.
+        """
+        x_begin, x_end = np.clip([x_begin, x_end], self.breakpoints[0], self.breakpoints[-1])
+        antiderivative = self.antiderivative()
+        return antiderivative(x_end) - antiderivative(x_begin)
+
+    def getExtrema(self, x_begin=None, x_end=None):
+        """
+            Exact minimum and maximum values between x_begin and x_end.
+            Both sides of a discontinuity in a breakpoint are considered.
+
+                Call signatures:
+
+                    polynomial.getExtrema(x_begin=None, x_end=None)
+
+            Parameters
+            ----------
+            x_begin : number, optional
+                Default is the first breakpoint.
+
+            x_end : number, optional
+                Default is the last breakpoint.
+
+            Returns
+            -------
+            minimum : number
+
+            maximum : number
+        """
+        _, f_value = self._getCriticalValues(x_begin, x_end)
+        return f_value.min(), f_value.max()
+
+    def _getCriticalValues(self, x_begin=None, x_end=None):
+        """
+            Returns the positions and values of all candidates to extremum between x_begin and x_end:
+            the limits of each segment and the roots of the derivative.
+        """
+        breakpoints = self.breakpoints
+        x_begin = breakpoints[0] if x_begin is None else max(x_begin, breakpoints[0])
+        x_end = breakpoints[-1] if x_end is None else min(x_end, breakpoints[-1])
+        if x_begin > x_end: raise Exception("x_begin must be smaller than x_end")
+
+        first_segment = int(np.clip(np.searchsorted(breakpoints, x_begin, side="right") - 1, 0, len(self.coefficients)-1))
+        last_segment = max(int(self.getSegmentIndex(x_end)), first_segment)
+        index = np.arange(first_segment, last_segment+1)
+        t_begin = np.maximum(x_begin, breakpoints[index]) - breakpoints[index]
+        t_end = np.minimum(x_end, breakpoints[index+1]) - breakpoints[index]
+
+        roots_index, roots_t = self._getDerivativeRoots(index)
+        is_inside = (roots_t > t_begin[roots_index]) & (roots_t < t_end[roots_index])
+
+        index = np.concatenate((index, index, index[roots_index[is_inside]]))
+        t = np.concatenate((t_begin, t_end, roots_t[is_inside]))
+        return breakpoints[index] + t, self._evaluateSegments(index, t)
+
+    def _getDerivativeRoots(self, index):
+        """
+            Real roots of the derivative of the given segments.
+            Returns the position (in index) of the segment of each root and the root in local coordinate.
+        """
+        return self._getSegmentsRoots(self.derivative().coefficients[index], np.diff(self.breakpoints)[index])
+
+    @staticmethod
+    def _getSegmentsRoots(coefficients, segments_length):
+        """
+            Real roots of polynomials with the given coefficients (one row for each segment).
+            Returns the row of each root and the root in local coordinate.
+        """
+        segments_length = np.where(segments_length > 0, segments_length, 1)
+        # Scale to a coordinate between 0 and 1 in each segment to get a well conditioned problem
+        coefficients = coefficients*segments_length[:, np.newaxis]**np.arange(coefficients.shape[1])
+        scale = abs(coefficients).max(axis=1, initial=0)
+        is_significant = abs(coefficients) > 1e-12*scale[:, np.newaxis]
+        effective_degree = np.where(is_significant.any(axis=1), coefficients.shape[1]-1-np.argmax(is_significant[:, ::-1], axis=1), 0)
+
+        roots_index, roots_t = [np.array([], dtype=int)], [np.array([])]
+        for degree in range(1, coefficients.shape[1]):
+            segments = np.where(effective_degree == degree)[0]
+            if len(segments) == 0: continue
+            # Eigenvalues of the companion matrix of the monic polynomial
+            monic = coefficients[segments, :degree]/coefficients[segments, degree:degree+1]
+            companion = np.zeros((len(segments), degree, degree))
+            companion[:, np.arange(1, degree), np.arange(0, degree-1)] = 1
+            companion[:, :, -1] = -monic
+            roots = np.linalg.eigvals(companion)
+            is_real = abs(roots.imag) < 1e-9
+            roots_index.append(np.repeat(segments, degree)[is_real.ravel()])
+            roots_t.append((roots.real*segments_length[segments, np.newaxis])[is_real])
+        return np.concatenate(roots_index), np.concatenate(roots_t)
+
+    def getRoots(self):
+        """
+            Sorted real roots strictly inside the segments.
+            Segments that are identically 0 have no roots.
+        """
+        index = np.arange(len(self.coefficients))
+        roots_index, roots_t = self._getSegmentsRoots(self.coefficients, np.diff(self.breakpoints))
+        is_inside = (roots_t > 0) & (roots_t < np.diff(self.breakpoints)[index[roots_index]])
+        return np.unique(self.breakpoints[roots_index[is_inside]] + roots_t[is_inside])
+
+    def refine(self, breakpoints):
+        """
+            Returns the same polynomial with the given breakpoints added.
+        """
+        breakpoints = np.union1d(self.breakpoints, np.clip(breakpoints, self.breakpoints[0], self.breakpoints[-1]))
+        index = self.getSegmentIndex((breakpoints[:-1]+breakpoints[1:])/2)
+        shift = breakpoints[:-1] - self.breakpoints[index]
+        # Taylor expansion around the new breakpoint: c_k = sum(comb(j, k)*a_j*shift**(j-k))
+        coefficients = np.zeros((len(index), self.degree+1))
+        for k, derivative in enumerate(self._getDerivatives()):
+            coefficients[:, k] = derivative._evaluateSegments(index, shift)/np.prod(np.arange(1, k+1))
+        return PiecewisePolynomial(breakpoints, coefficients)
+
+    def _getDerivatives(self):
+        derivatives = [self]
+        for _ in range(self.degree):
+            derivatives.append(derivatives[-1].derivative())
+        return derivatives
+
+    def __repr__(self):
+        return str(self.__dict__)
@@ -8,4 +8,9 @@ from fconcrete.Structural.Load import *
 from fconcrete.Structural.Node import *
 from fconcrete.Structural.Section import *
 from fconcrete.Structural.Material import *
-from fconcrete.Structural.BeamElement import *
\ No newline at end of file
+from fconcrete.Structural.BeamElement import *
+from fconcrete.Structural.PiecewisePolynomial import *
+from fconcrete.Structural.BandedMatrix import *
+from fconcrete.Structural.BeamModel import *
+from fconcrete.Structural.LoadCombination import *
+from fconcrete.Structural.InfluenceLine import *
\ No newline at end of file
@@ -1,13 +1,15 @@
 from fconcrete.Structural.Beam import Beam
 from fconcrete.StructuralConcrete import AvailableLongConcreteSteelBar, AvailableTransvConcreteSteelBar, AvailableConcrete
 from fconcrete.Structural.BeamElement import BeamElement, BeamElements
-from fconcrete.helpers import timeit, make_dxf, to_pandas
+from fconcrete.helpers import make_dxf, to_pandas, Profiler, profiled
 import fconcrete as fc
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 import time
 from fconcrete.StructuralConcrete.AvailableMaterials import solve_cost
 import datetime
+import warnings
 
 class ConcreteBeam(Beam):
     """
@@ -88,6 +90,14 @@ class ConcreteBeam(Beam):
             The beam will be divided in equally spaced points and all results (displacement, momentum, shear) will be calculated to these points.
             Default value is 1.4.
             
+        adaptive : bool
+            Same constant from input.
+            If True, the points are not equally spaced: division is their maximum number and they are refined only where the diagrams are curved.
+            
+        envelope : Envelope
+            Envelope of the load combinations, used in the design of the steel bars.
+            None if load_cases is not given.
+            
         lifetime_structure : number
             The time, in months, when the value of the deferred arrow is desired;
             Default value is 70.
@@ -109,6 +119,16 @@ class ConcreteBeam(Beam):
         processing_time : number
             Time for resolution of the concrete beam.
 
+        profiler : Profiler
+            Wall time, CPU time, calls and peak memory of each stage of the solution:
+            "structural", "envelope", "transv_steel", "stirrups", "long_steel", "decalaged_diagram", "comercial_area", "interspaces",
+            "anchoring", "ELS", "displacement", "cost", "steel_height" and "precheck". The stages solved again by the steel height (d) check are also counted in it.
+            A Profiler shared by many beams can be given with the profiler option.
+
+        steel_height_history : list of dict
+            One item for each check of the steel height (d) made by concrete_beam.checkRecalculationOfD, with the keys
+            "iteration", "relative_positive_diff", "relative_negative_diff" and "beam_elements" (number of beam elements of the check).
+
         subtotal_table : number
             Table with each type of material and their costs.
 
@@ -128,10 +148,50 @@ class ConcreteBeam(Beam):
             Information about the solution for transversal steels used in the beam.
             More information in the :doc:`TransvSteelBarSolve Class <../fconcrete.StructuralConcrete.TransvSteelBar.TransvSteelBarSolve>` documentation.
 
+        lazy : bool
+            Same value from input.
+            If True, the design results are solved on their first access.
+
+        precheck : bool
+            Same value from input.
+            If True, concrete_beam.getFeasibilityReport is checked before the steel bars are solved.
+
+        solved_stages : set of str
+            Stages of the design already solved (see concrete_beam.solve_design).
+
         verbose : `bool`
             Print the the steps and their durations.
             Default value is False.
     """
+    # Stages of the design, in the order they are solved.
+    # Each one has its name, the method that solves it, the stages whose results it uses, the parameters it uses
+    # and the option of ConcreteBeam that can turn it off.
+    _stages = (
+        ("transv_steel", "solve_transv_steel", (),
+         ("design_factor", "division", "adaptive", "available_transv_steel_bars", "tilt_angle_of_compression_struts"), "solve_transv_steel"),
+        ("long_steel", "solve_long_steel", (),
+         ("design_factor", "division", "adaptive", "available_long_steel_bars", "available_transv_steel_bars",
+          "bar_steel_removal_step", "bar_steel_max_removal"), "solve_long_steel"),
+        ("ELS", "solve_ELS", ("long_steel",),
+         ("available_long_steel_bars", "maximum_displacement_allowed", "time_begin_long_duration", "lifetime_structure"), "solve_ELS"),
+        ("cost", "solve_cost", ("transv_steel", "long_steel"), (), "solve_cost"),
+        ("steel_height", "checkRecalculationOfD", ("transv_steel", "long_steel", "ELS", "cost"),
+         ("max_relative_diff_of_steel_height", "max_iterations_of_steel_height"), "solve_cost"),
+    )
+    # Stage that solves each result, used by the lazy option
+    _stage_results = {
+        "transv_steel_bars": "transv_steel",
+        "transv_steel_bars_solution_info": "transv_steel",
+        "long_steel_bars": "long_steel",
+        "long_steel_bars_solution_info": "long_steel",
+        "cost": "cost",
+        "cost_table": "cost",
+        "subtotal_table": "cost",
+        "pd_cost_table": "cost",
+        "pd_subtotal_table": "cost",
+        "steel_height_history": "steel_height",
+    }
+    
     def __init__(self,
                  loads,
                  beam_elements=None,
@@ -139,6 +199,7 @@ class ConcreteBeam(Beam):
                  section=None,
                  design_factor=1.4,
                  division=200,
+                 adaptive=False,
                  maximum_displacement_allowed=lambda beam_element_length : beam_element_length/250,
                  available_long_steel_bars=AvailableLongConcreteSteelBar(),
                  bar_steel_removal_step=2,
@@ -150,7 +211,12 @@ class ConcreteBeam(Beam):
                  lifetime_structure=70,
                  verbose = False,
                  max_relative_diff_of_steel_height = 0.02,
+                 max_iterations_of_steel_height = 10,
                  consider_own_weight = True,
+                 load_cases = None,
+                 load_combinations = None,
+                 lazy = False,
+                 precheck = False,
                  **options):
         """
             Returns a concrete_beam element.
@@ -165,6 +231,7 @@ class ConcreteBeam(Beam):
                                 bar_steel_max_removal=100,
                                 design_factor=1.4,
                                 division=1000,
+                                adaptive=False,
                                 maximum_displacement_allowed=lambda beam_element_length : beam_element_length/250,
                                 tilt_angle_of_compression_struts=45,
                                 available_long_steel_bars=AvailableLongConcreteSteelBar(),
@@ -213,6 +280,12 @@ class ConcreteBeam(Beam):
                 The beam will be divided in equally spaced points and all results (displacement, momentum, shear) will be calculated to these points.
                 Default value is 1.4.
             
+            adaptive : bool, optional
+                If True, the points have the nodes and the limits of the loads (both sides of each one)
+                and are refined only where the diagrams are curved, up to division points.
+                The steel bars are designed with these non uniform points.
+                Default value is False.
+            
             maximum_displacement_allowed : number, optional
                 For each beam element, compare its maximum displacement with maximum_displacement_allowed(beam_element_length).
                 This is used to solve the ELS shown in NBR 6118.
@@ -291,9 +364,39 @@ class ConcreteBeam(Beam):
                 The initial value of d is set to be 0.8*height.
                 Default value is 0.02.
             
+            max_iterations_of_steel_height: int, optional
+                Maximum number of recalculations of the steel bars with a new value of d.
+                If d still changes more than max_relative_diff_of_steel_height after them, a warning is given.
+                Default value is 10.
+            
             consider_own_weight : bool, optional
                 Consider the load generated by the weight of the concrete.
                 Default value is True.
+            
+            load_cases : [LoadCase], optional
+                Named groups of characteristic loads. If given, the steel bars are designed with the envelope of load_combinations
+                and design_factor is not used in the momentum and shear diagrams.
+                The loads argument and the own weight are considered as a permanent load case named "permanent loads".
+                The structural beam, used in the displacement (ELS) check, is solved with the quasi permanent combination
+                fc.LoadCombination.NBR6118SLS(load_cases), instead of the sum of the loads.
+                Default value is None.
+            
+            load_combinations : [LoadCombination], optional
+                Combinations of the load_cases.
+                Default value is fc.LoadCombination.NBR6118ULS(load_cases).
+            
+            lazy : bool, optional
+                If True, only the structural beam is solved on creation.
+                The steel bars, the cost and the concrete displacement are solved on their first access, with the stages they depend on,
+                and kept for the next ones. The options solve_transv_steel, solve_long_steel, solve_ELS and solve_cost are respected:
+                as the steel height (d) check changes all of them, it is also solved on the first access, unless solve_cost is False.
+                Default value is False.
+            
+            precheck : bool, optional
+                If True, the limits of concrete_beam.getFeasibilityReport are checked after the structural solution.
+                If any of them fails, an exception with the failed limits is raised before the steel bars are solved,
+                which is much faster to reject the candidates of fc.Analysis.getBestSolution.
+                Default value is False.
         """
         start = time.time()
         
@@ -305,13 +408,23 @@ class ConcreteBeam(Beam):
             consider_own_weight = consider_own_weight,
             loads=loads
         )
+        if load_cases is not None:
+            load_cases = [*load_cases, fc.LoadCase.Permanent("permanent loads", loads)] if len(loads) else list(load_cases)
+            quasi_permanent, = fc.LoadCombination.NBR6118SLS(load_cases)
+            loads = quasi_permanent.getLoads(load_cases)
         
-        timeit(verbose, "Solve structural beam")(Beam.__init__(self, loads, beam_elements, solve_displacement=False, **options))
+        options["profiler"] = options.get("profiler") or Profiler(verbose)
+        Beam.__init__(self, loads, beam_elements, solve_displacement=False, **options)
+        self.envelope = None
+        if load_cases is not None:
+            with self.profiler.stage("envelope"):
+                self.envelope = fc.Envelope(self, load_cases, load_combinations)
         
         self.bar_steel_removal_step = bar_steel_removal_step
         self.bar_steel_max_removal = bar_steel_max_removal
         self.design_factor = design_factor
         self.division = division
+        self.adaptive = adaptive
         self.maximum_displacement_allowed = maximum_displacement_allowed
         self.tilt_angle_of_compression_struts = tilt_angle_of_compression_struts
         self.available_long_steel_bars = available_long_steel_bars
@@ -321,20 +434,17 @@ class ConcreteBeam(Beam):
         self.lifetime_structure = lifetime_structure
         self.verbose = verbose
         self.max_relative_diff_of_steel_height = max_relative_diff_of_steel_height
-            
-        if options.get("solve_transv_steel") != False:
-            timeit(verbose, "Solve transv steel")(self.solve_transv_steel)()
-            
-        if options.get("solve_long_steel") != False:
-            self.solve_long_steel()
+        self.max_iterations_of_steel_height = max_iterations_of_steel_height
+        self._design_diagrams = {}
+        self.solved_stages = set()
+        self.lazy = lazy
+        self.precheck = precheck
+        self._enabled_stages = [ stage for stage, _, _, _, option in self._stages if options.get(option) != False ]
         
-        if options.get("solve_ELS") != False:
-            timeit(verbose, "Solve ELS")(self.solve_ELS)()
+        if precheck: self._checkFeasibility()
         
-        if options.get("solve_cost") != False:
-            self.solve_cost()
-            # d value is the initially with 0.8*height. This function check if initial guess is ok.
-            self.checkRecalculationOfD()
+        # d value is the initially with 0.8*height. The steel_height stage checks if initial guess is ok.
+        if not lazy: self.solve_design(self._enabled_stages)
         
         end = time.time()
         self.processing_time = end-start
@@ -363,8 +473,12 @@ class ConcreteBeam(Beam):
                 Vertical displacement value in cm.
                 
         """ 
+        if self.lazy: self.solve_design(self._getRequiredStages("ELS"))
         x, y = self.getDisplacementDiagram(**options)
-        return x, y*(self._time_function_coefficient(self.lifetime_structure)-self._time_function_coefficient(self.time_begin_long_duration))
+        return x, y*self._getLongDurationCoefficient()
+    
+    def _getLongDurationCoefficient(self):
+        return self._time_function_coefficient(self.lifetime_structure)-self._time_function_coefficient(self.time_begin_long_duration)
     
     def plotConcreteDisplacementDiagram(self, **options):
         """
@@ -390,6 +504,7 @@ class ConcreteBeam(Beam):
                 The value of displacement for each x.
         """
         options["division"] = options["division"] if options.get("division") else self.division
+        options["adaptive"] = options.get("adaptive", self.adaptive)
         x, y = self.getConcreteDisplacementDiagram(**options)
         _, ax = plt.subplots()
         ax.plot(x, y)
@@ -400,20 +515,24 @@ class ConcreteBeam(Beam):
         if t>70: return 2
         return 0.68*(0.996**t)*t**0.32 
     
+    @profiled("ELS")
     def solve_ELS(self):
         """
             Starts the process of solution for ELS (Estado Limite de Serviço)
         """
         self.initial_beam_elements = self._toConcreteBeamElements(self.initial_beam_elements)
+        # The beam elements that were not split in the limits of the loads are the same as the initial ones
+        self.beam_elements.refreshColumns("I", "flexural_rigidity")
         self.solve_displacement()
+        long_duration_coefficient = abs(self._getLongDurationCoefficient())
         for beam_element in self.initial_beam_elements:
             x_begin = beam_element.n1.x
             x_end = beam_element.n2.x
-            _, y = self.getConcreteDisplacementDiagram(x_begin=x_begin, x_end=x_end, division=200)
+            displacement = long_duration_coefficient*self.getMaximumAbsoluteDisplacement(x_begin, x_end)
             max_disp = self.maximum_displacement_allowed(beam_element.length)
-            if max(abs(y)) > max_disp:
+            if displacement > max_disp:
                 raise Exception("Displacement too big between x={}cm and x={}cm. Maximum allowed is {}cm, but the beam lement reached {}cm".format(
-                    x_begin, x_end, max_disp, max(abs(y))))
+                    x_begin, x_end, max_disp, displacement))
     
     def getShearDesignDiagram(self, **options):
         """
@@ -440,9 +559,197 @@ class ConcreteBeam(Beam):
                 The value of shear for each x.
         """
         options["division"] = options["division"] if options.get("division") else self.division
+        options["adaptive"] = options.get("adaptive", self.adaptive)
+        return self._getDesignDiagram("shear", self._getShearDesignDiagram, **options)
+    
+    def _getShearDesignDiagram(self, **options):
+        if self.envelope is not None:
+            # The sign of the shear with the biggest absolute value
+            x, minimum, maximum = self.envelope.getShearEnvelopeDiagram(**options)
+            return x, np.where(abs(maximum) >= abs(minimum), maximum, minimum)
         x, shear_diagram = self.getShearDiagram(**options)
         return x, self.design_factor*shear_diagram
     
+    def getMomentumDesignEnvelopeDiagram(self, **options):
+        """
+            Minimum and maximum design momentum for options["division"] parts of the beam.
+            If there is no load_cases, both are beam.getMomentumDiagram multiplied by concrete_beam.design_factor.
+            
+            Parameters
+            ----------
+            **options
+                
+                ``division``:
+                    Number of divisions equally spaced (`int`). Default concrete_beam.division.
+                ``x_begin``:
+                    Begin of the x_axis (`number`).
+                ``x_end``:
+                    End of the x_axis (`number`).
+                
+            Returns
+            -------
+            x : list of number
+                The x position of the division in cm
+            
+            minimum : list of number
+                The minimum design momentum for each x.
+            
+            maximum : list of number
+                The maximum design momentum for each x.
+        """
+        options["division"] = options["division"] if options.get("division") else self.division
+        options["adaptive"] = options.get("adaptive", self.adaptive)
+        return self._getDesignDiagram("momentum", self._getMomentumDesignEnvelopeDiagram, **options)
+    
+    def _getMomentumDesignEnvelopeDiagram(self, **options):
+        if self.envelope is not None:
+            return self.envelope.getMomentumEnvelopeDiagram(**options)
+        x, momentum_diagram = self.getMomentumDiagram(**options)
+        return x, self.design_factor*momentum_diagram, self.design_factor*momentum_diagram
+    
+    def _getDiagramColumns(self, **options):
+        """
+            Columns of concrete_beam.saveDiagrams: the ones of the Beam plus the design diagrams,
+            "shear_design", "momentum_design_minimum", "momentum_design_maximum", "concrete_displacement"
+            and, if the longitudinal steel is solved, "x_decalaged", "momentum_decalaged_positive" and "momentum_decalaged_negative".
+        """
+        options["division"] = options["division"] if options.get("division") else self.division
+        # All the columns share the same x
+        options["adaptive"] = False
+        columns = Beam._getDiagramColumns(self, **options)
+        _, columns["shear_design"] = self.getShearDesignDiagram(**options)
+        _, columns["momentum_design_minimum"], columns["momentum_design_maximum"] = self.getMomentumDesignEnvelopeDiagram(**options)
+        if "displacement" in columns:
+            columns["concrete_displacement"] = columns["displacement"]*self._getLongDurationCoefficient()
+        if "long_steel" in self.solved_stages:
+            decalaged_diagram = self.long_steel_bars_solution_info.getDecalagedMomentumDesignDiagram()
+            columns["x_decalaged"], columns["momentum_decalaged_positive"], columns["momentum_decalaged_negative"] = decalaged_diagram
+        return columns
+    
+    def _getDesignDiagram(self, name, function, **options):
+        """
+            The design diagrams do not depend on the steel bars, so they are calculated once for each design_factor and options.
+            Returns copies, so the cached arrays are never changed.
+        """
+        key = (name, self.design_factor, tuple(sorted(options.items())))
+        if key not in self._design_diagrams:
+            self._design_diagrams[key] = function(**options)
+        return tuple(np.copy(values) for values in self._design_diagrams[key])
+    
+    def getMaximumAbsoluteMomentumDesign(self, x_begin="begin", x_end="end"):
+        """
+            Exact maximum absolute value of the design momentum between x_begin and x_end (in cm).
+        """
+        if self.envelope is not None:
+            return self.envelope.getMaximumAbsoluteMomentum(x_begin, x_end)
+        return self.design_factor*self.getMaximumAbsoluteMomentum(x_begin, x_end)
+    
+    def getFeasibilityReport(self):
+        """
+            Checks, from the structural solution and the sections only, the limits that make the steel bars solution fail:
+            
+            - "shear": maximum design shear and V_Rd2 (kN), as in concrete_beam.transv_steel_bars_solution_info.checkProbableCompressedConnectingRod;
+            - "momentum": design momentum and the maximum b*d²/1.5 allowed by kc (kNcm), as in LongSteelBar.getSteelArea;
+            - "steel_area": steel area needed and the maximum one of the section (cm²), as in concrete_beam.long_steel_bars_solution_info.getComercialSteelArea;
+            - "displacement": long duration displacement and maximum_displacement_allowed (cm), as in concrete_beam.solve_ELS.
+            
+            The steel height (d) is the current one (0.8*height before the steel bars are solved).
+            Before ELS is solved, the displacement is solved with the uncracked inertia of the sections, which is the biggest one,
+            so the real displacement is usually bigger. The momentum diagram is not decalaged, so a beam that passes can still fail near the changes of section.
+            
+                Call signatures:
+                    
+                    concrete_beam.getFeasibilityReport()
+                
+                >>> concrete_beam = fc.ConcreteBeam(loads, nodes=nodes, section=section, lazy=True)
+                >>> report = concrete_beam.getFeasibilityReport()
+                >>> report[~report["feasible"]]
+            
+            Returns
+            -------
+            report : pd.DataFrame
+                One row for each limit, with the columns "x" (where it is the closest to fail, in cm), "value", "maximum",
+                "ratio" (value/maximum) and "feasible" (ratio <= 1).
+                Where "momentum" fails, "steel_area" is the one needed by the biggest momentum allowed by kc.
+        """
+        rows = { "shear": self._getShearFeasibility(), **self._getMomentumFeasibility(), "displacement": self._getDisplacementFeasibility() }
+        report = pd.DataFrame.from_dict(rows, orient="index", columns=("x", "value", "maximum")).rename_axis("limit")
+        report["ratio"] = [ self._getFeasibilityRatio(row) if np.isfinite(row[1]) else np.nan for row in rows.values() ]
+        report["feasible"] = ~(report["ratio"] > 1)
+        return report
+    
+    @profiled("precheck")
+    def _checkFeasibility(self):
+        """
+            Raises an exception with the limits of concrete_beam.getFeasibilityReport that fail.
+        """
+        report = self.getFeasibilityReport()
+        failed = report[~report["feasible"]]
+        if len(failed):
+            raise Exception("The concrete beam is not feasible. " + "; ".join(
+                "{} is {:.3g} times the maximum in x={}cm ({:.4g} > {:.4g})".format(limit, row.ratio, row.x, row.value, row.maximum)
+                for limit, row in failed.iterrows()))
+    
+    def _getShearFeasibility(self):
+        """
+            Worst point of V_Sd/V_Rd2, with the V_Rd2 of the beam element of each x.
+        """
+        x, shear = self.getShearDesignDiagram()
+        shear = abs(shear)
+        theta = np.radians(self.tilt_angle_of_compression_struts)
+        alpha = np.radians(self.available_transv_steel_bars.inclination_angle)
+        v_rd2 = np.array([ fc.TransvSteelBarSolve._getV_rd2(beam_element, theta, alpha) for beam_element in self.beam_elements ])
+        v_rd2 = v_rd2[self.getBeamElementIndexInX(x)]
+        worst = np.argmax(shear/v_rd2)
+        return x[worst], shear[worst], v_rd2[worst]
+    
+    def _getMomentumFeasibility(self):
+        """
+            Worst point of the kc limit and of the maximum steel area, for both signs of the momentum.
+        """
+        x, momentum_minimum, momentum_maximum = self.getMomentumDesignEnvelopeDiagram()
+        index = self.getBeamElementIndexInX(x)
+        sections = [ beam_element.section for beam_element in self.beam_elements ]
+        width = np.array([ section.width() for section in sections ])[index]
+        positive_steel_height = np.array([ section.positive_steel_height for section in sections ])[index]
+        negative_steel_height = np.array([ section.negative_steel_height for section in sections ])[index]
+        momentum_rows, area_rows = [], []
+        for momentum, steel_height in ((np.maximum(momentum_maximum, 0), positive_steel_height), (np.minimum(momentum_minimum, 0), negative_steel_height)):
+            # kc = b*d²/momentum must be at least 1.5
+            maximum_momentum = width*steel_height**2/1.5
+            with np.errstate(divide="ignore", invalid="ignore"):
+                worst = np.argmax(np.where(momentum != 0, abs(momentum)/maximum_momentum, 0))
+            momentum_rows.append((x[worst], abs(momentum[worst]), maximum_momentum[worst]))
+            # The steel area grows with the momentum, so only the biggest one of each beam element is checked
+            for element_index in np.unique(index[momentum != 0]):
+                is_in_element = index == element_index
+                biggest = np.flatnonzero(is_in_element)[abs(momentum[is_in_element]).argmax()]
+                # Above the kc limit there is no steel area, so the one of the limit is checked, which is smaller than the needed one
+                limited_momentum = np.sign(momentum[biggest])*min(abs(momentum[biggest]), maximum_momentum[biggest])
+                beam_element = self.beam_elements[element_index]
+                area = fc.LongSteelBar.getSteelArea(beam_element.section, beam_element.material, self.available_long_steel_bars, limited_momentum)
+                _, max_area = fc.LongSteelBar.getMinimumAndMaximumSteelArea(beam_element.section.area, beam_element.material.fck)
+                area_rows.append((x[biggest], abs(area), max_area))
+        momentum_row = max(momentum_rows, key=self._getFeasibilityRatio)
+        area_row = max(area_rows, key=self._getFeasibilityRatio) if area_rows else (np.nan, np.nan, np.nan)
+        return { "momentum": momentum_row, "steel_area": area_row }
+    
+    def _getDisplacementFeasibility(self):
+        if "ELS" not in self.solved_stages: self.solve_displacement()
+        long_duration_coefficient = abs(self._getLongDurationCoefficient())
+        rows = []
+        for beam_element in self.initial_beam_elements:
+            x_begin, x_end = beam_element.n1.x, beam_element.n2.x
+            displacement = long_duration_coefficient*self.getMaximumAbsoluteDisplacement(x_begin, x_end)
+            rows.append(((x_begin+x_end)/2, displacement, self.maximum_displacement_allowed(beam_element.length)))
+        return max(rows, key=self._getFeasibilityRatio)
+    
+    @staticmethod
+    def _getFeasibilityRatio(row):
+        _, value, maximum = row
+        if value == 0: return 0
+        return value/maximum if maximum > 0 else np.inf
+    
     def plotShearDesignDiagram(self, **options):
         """
             Simply applies the beam.getShearDesignDiagram method results (x,y) to a plot with plt.plot(x, y).
@@ -493,6 +800,94 @@ class ConcreteBeam(Beam):
         ax, _ = negative_bars.plotTransversal(self, x, ax=ax)
         return make_dxf(ax, **options)
 
+    def solve_design(self, stages=None):
+        """
+            Solves the stages of the design that are not solved yet, in order:
+            "transv_steel", "long_steel", "ELS", "cost" and "steel_height" (concrete_beam.checkRecalculationOfD).
+            The results of each stage are kept until a parameter it uses is changed by concrete_beam.update.
+            
+                Call signatures:
+                    
+                    concrete_beam.solve_design(stages=None)
+            
+            Parameters
+            ----------
+            stages : list of str, optional
+                Stages to solve. Default is all of them.
+        """
+        stages = [ stage for stage, *_ in self._stages ] if stages is None else stages
+        for stage, method, _, _, _ in self._stages:
+            if stage in stages and stage not in self.solved_stages:
+                getattr(self, method)()
+                self.solved_stages.add(stage)
+    
+    def _getRequiredStages(self, stage):
+        """
+            The stage and the ones whose results it uses. Also the steel_height stage if it is enabled, because it changes all the results.
+        """
+        stages = { stage }
+        if "steel_height" in self._enabled_stages: stages.add("steel_height")
+        for name, _, stages_used, _, _ in reversed(self._stages):
+            if name in stages: stages.update(stages_used)
+        return stages
+    
+    def __getattr__(self, name):
+        """
+            Solves the results of the lazy option on their first access.
+        """
+        stage = ConcreteBeam._stage_results.get(name)
+        if stage is None or not self.__dict__.get("lazy"):
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+        self.solve_design(self._getRequiredStages(stage))
+        return self.__dict__[name]
+    
+    def _getDependentStages(self, parameters):
+        """
+            Stages that use any of the parameters, plus the ones that use their results.
+        """
+        dependent_stages = set()
+        for stage, _, stages_used, parameters_used, _ in self._stages:
+            if set(parameters_used) & set(parameters) or set(stages_used) & dependent_stages:
+                dependent_stages.add(stage)
+        return dependent_stages
+    
+    def update(self, **parameters):
+        """
+            Changes parameters of the design and solves again only the stages that use them, and the ones that use their results.
+            The structural solution, the design diagrams and the other stages are kept.
+            The steel height (d) iteration starts from the current one.
+            With the lazy option, the results of the changed stages are removed and solved again on their next access.
+            
+                Call signatures:
+                    
+                    concrete_beam.update(**parameters)
+                
+                >>> concrete_beam.update(bar_steel_removal_step=3, available_long_steel_bars=fc.AvailableLongConcreteSteelBar(diameters=[10, 12.5]))
+            
+            Parameters
+            ----------
+            **parameters
+                Any parameter of ConcreteBeam used by the design stages:
+                design_factor, division, adaptive, available_long_steel_bars, available_transv_steel_bars, bar_steel_removal_step,
+                bar_steel_max_removal, tilt_angle_of_compression_struts, maximum_displacement_allowed, time_begin_long_duration,
+                lifetime_structure, max_relative_diff_of_steel_height and max_iterations_of_steel_height.
+                The other ones change the structural solution, so a new ConcreteBeam must be created.
+        """
+        parameters_used = { parameter for *_, stage_parameters, _ in self._stages for parameter in stage_parameters }
+        for parameter in parameters:
+            if parameter not in parameters_used: raise Exception("{} cannot be updated. Create a new ConcreteBeam instead.".format(parameter))
+        stages = self.solved_stages.copy()
+        dependent_stages = self._getDependentStages(parameters)
+        for parameter, value in parameters.items():
+            setattr(self, parameter, value)
+        self.solved_stages -= dependent_stages
+        if self.lazy:
+            for name, stage in self._stage_results.items():
+                if stage in dependent_stages: self.__dict__.pop(name, None)
+            return
+        self.solve_design(stages)
+    
+    @profiled("transv_steel")
     def solve_transv_steel(self):
         """
             Starts the process of solution for the used transversal steel.
@@ -503,11 +898,18 @@ class ConcreteBeam(Beam):
                                                                         alpha_in_degree = self.available_transv_steel_bars.inclination_angle)
         self.transv_steel_bars = self.transv_steel_bars_solution_info.steel_bars
     
-    def solve_long_steel(self):
+    @profiled("long_steel")
+    def solve_long_steel(self, previous_solution=None):
         """
             Starts the process of solution for the used longitudinal steel.
+            
+            Parameters
+            ----------
+            previous_solution : LongSteelBarSolve, optional
+                Solution of the same concrete_beam with other steel height (d).
+                Its momentum design diagram and the steel area of the points where d and the momentum did not change are reused.
         """
-        self.long_steel_bars_solution_info = fc.LongSteelBarSolve(concrete_beam=self)
+        self.long_steel_bars_solution_info = fc.LongSteelBarSolve(concrete_beam=self, previous_solution=previous_solution)
         self.long_steel_bars = self.long_steel_bars_solution_info.steel_bars
     
     @staticmethod
@@ -541,6 +943,10 @@ class ConcreteBeam(Beam):
         return beam_elements, loads
     
     def _toConcreteBeamElements(self, beam_elements):
+        """
+            Set the inertia of the cracked section (Branson) and its flexural rigidity in each beam element.
+        """
+        inertias, flexural_rigidities = [], []
         for beam_element in beam_elements:
             x_begin = beam_element.n1.x
             x_end = beam_element.n2.x
@@ -574,8 +980,7 @@ class ConcreteBeam(Beam):
             y_t = y_cg if max_area==max_positive_area else h-y_cg
             alpha = 1.5
             M_r = alpha*fctm*I/y_t
-            _, momentum_diagram = self.getMomentumDiagram(x_begin=x_begin, x_end=x_end, division=200)
-            M_a = self.design_factor*max(abs(momentum_diagram))
+            M_a = self.getMaximumAbsoluteMomentumDesign(x_begin, x_end)
             
             mra3 = (M_r/M_a)**3
             alpha_e = E_s/E_cs
@@ -585,11 +990,14 @@ class ConcreteBeam(Beam):
             I2 = bw*x2**3/3+a2*(x2-d)**2
             
             new_I = min((mra3*I+(1-mra3)*I2),I)
-            beam_element.I = new_I
-            beam_element.flexural_rigidity = E_cs * new_I
-            
+            inertias.append(new_I)
+            flexural_rigidities.append(E_cs * new_I)
+        
+        beam_elements.setColumn("I", inertias)
+        beam_elements.setColumn("flexural_rigidity", flexural_rigidities)
         return beam_elements
     
+    @profiled("cost")
     def solve_cost(self):
         """
             Starts the process of solution for the cost table.
@@ -597,11 +1005,16 @@ class ConcreteBeam(Beam):
         self.cost, self.cost_table, self.subtotal_table = solve_cost(self)
         self.pd_cost_table, self.pd_subtotal_table = to_pandas(self.cost_table), to_pandas(self.subtotal_table)
         
+    @profiled("steel_height")
     def checkRecalculationOfD(self):
         """
-            Recalculate all beam with the true value of steel height (d)
+            Recalculate the steel bars with the true value of steel height (d), until it changes at most max_relative_diff_of_steel_height
+            or max_iterations_of_steel_height recalculations are made. Each check is recorded in concrete_beam.steel_height_history.
+            d does not change the structural solution, so only the steel bars are recalculated:
+            the momentum design diagram is reused and the longitudinal steel area is solved again only where d changed.
         """
-        while True:
+        self.steel_height_history = []
+        for iteration in range(self.max_iterations_of_steel_height+1):
             x_changes = np.concatenate((self.long_steel_bars.long_begins, self.long_steel_bars.long_ends))
             x_changes = x_changes[np.isin(x_changes, self.beam_elements.nodes.x, invert=True)]
             x_changes = np.unique(x_changes[(x_changes>=0) & (x_changes<=self.length)])
@@ -653,15 +1066,21 @@ class ConcreteBeam(Beam):
             
             relative_positive_diff = diff_positive/previous_ds_positive if previous_ds_positive else 0
             relative_negative_diff = diff_negative/previous_ds_negative if previous_ds_negative else 0
+            self.steel_height_history.append({ "iteration": iteration,
+                                               "relative_positive_diff": relative_positive_diff,
+                                               "relative_negative_diff": relative_negative_diff,
+                                               "beam_elements": len(beam_elements) })
             
-            if max(relative_positive_diff, relative_negative_diff) > self.max_relative_diff_of_steel_height:
-                self.beam_elements = fc.BeamElements(beam_elements)
-                self.solve_long_steel()
-                self.solve_transv_steel()
-                self.solve_ELS()
-                self.solve_cost()
-            else:
+            if max(relative_positive_diff, relative_negative_diff) <= self.max_relative_diff_of_steel_height: break
+            if iteration == self.max_iterations_of_steel_height:
+                warnings.warn("The steel height (d) still changes {:.2%} after {} recalculations".format(
+                    max(relative_positive_diff, relative_negative_diff), iteration))
                 break
+            self.beam_elements = fc.BeamElements(beam_elements)
+            self.solve_long_steel(previous_solution=self.long_steel_bars_solution_info)
+            self.solve_transv_steel()
+            self.solve_ELS()
+            self.solve_cost()
     
     def saveas(self,
                file_name=False,
@@ -677,7 +1096,7 @@ class ConcreteBeam(Beam):
         max_height = max([ section.height for section in self.beam_elements.sections ])
 
         # Positive Long bar draw
-        positive_long_steel_bar = fc.LongSteelBars(self.long_steel_bars[self.long_steel_bars.areas > 0])
+        positive_long_steel_bar = self.long_steel_bars.take(self.long_steel_bars.areas > 0)
         start_y_bottom = -abs(positive_long_steel_bar.areas).max(initial=0)*scale_y_long_bar - 2*gap - max_height
         _, msp = self.long_steel_bars.plot(scale_y=scale_y_long_bar, xy_position=(0,start_y_bottom))
 
@@ -691,7 +1110,7 @@ class ConcreteBeam(Beam):
         _, msp = self.plot(msp=msp, column_height=column_height, xy_position=(0,start_y))
 
         # Negative Long Bar draw
-        negative_long_steel_bar = fc.LongSteelBars(self.long_steel_bars[self.long_steel_bars.areas < 0])
+        negative_long_steel_bar = self.long_steel_bars.take(self.long_steel_bars.areas < 0)
         start_y += max_height + abs(negative_long_steel_bar.areas).max(initial=0)*scale_y_long_bar + gap
         _, msp = negative_long_steel_bar.plot(msp=msp, scale_y=scale_y_long_bar, xy_position=(0,start_y))
 
@@ -1,9 +1,12 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import copy
-from fconcrete.helpers import getAxis, make_dxf
+from fconcrete.helpers import getAxis, make_dxf, slots_dict, ColumnarList
 
 class LongSteelBar():
+    __slots__ = ("long_begin", "long_end", "quantity", "diameter", "interspace", "quantity_accumulated",
+                 "area_accumulated", "area", "fyd", "length", "cost")
+    
     def __init__(self, long_begin, long_end, quantity, quantity_accumulated, diameter, area, area_accumulated, fyd, interspace, length, cost):
         self.long_begin = long_begin
         self.long_end = long_end
@@ -59,26 +62,23 @@ class LongSteelBar():
         return ([self.long_begin, self.long_end]), ([y,y])
     
     def __repr__(self):
-        return str(self.__dict__)+'\n'
+        return str(slots_dict(self))+'\n'
     
     
-class LongSteelBars():
+class LongSteelBars(ColumnarList):
     """
         Class that defines a LongSteelBar list with easy to work properties and methods.
     """
+    _columns = (("long_begins", "long_begin"), ("long_ends", "long_end"), ("quantities", "quantity"),
+                ("diameters", "diameter"), ("interspaces", "interspace"), ("quantities_accumulated", "quantity_accumulated"),
+                ("areas_accumulated", "area_accumulated"), ("areas", "area"), ("fyds", "fyd"),
+                ("costs", "cost"), ("lengths", "length"))
+    _elements_name = "steel_bars"
+    
     def __init__(self, steel_bars=[]):
-        self.steel_bars = np.array(steel_bars)
-        self.long_begins = np.array([ steel_bar.long_begin for steel_bar in self.steel_bars ])
-        self.long_ends = np.array([ steel_bar.long_end for steel_bar in self.steel_bars ])
-        self.quantities = np.array([ steel_bar.quantity for steel_bar in self.steel_bars ])
-        self.diameters = np.array([ steel_bar.diameter for steel_bar in self.steel_bars ])
-        self.interspaces = np.array([ steel_bar.interspace for steel_bar in self.steel_bars ])
-        self.quantities_accumulated = np.array([ steel_bar.quantity_accumulated for steel_bar in self.steel_bars ])
-        self.areas_accumulated = np.array([ steel_bar.area_accumulated for steel_bar in self.steel_bars ])
-        self.areas = np.array([ steel_bar.area for steel_bar in self.steel_bars ])
-        self.fyds = np.array([ steel_bar.fyd for steel_bar in self.steel_bars ])
-        self.costs = np.array([ steel_bar.cost for steel_bar in self.steel_bars ])
-        self.lengths = np.array([ steel_bar.length for steel_bar in self.steel_bars ])
+        self._setColumns(steel_bars)
+    
+    def _setDerived(self):
         self.length = sum(self.lengths)
         self.cost = sum(self.costs)
         
@@ -86,15 +86,12 @@ class LongSteelBars():
         """
             Add a LongSteelBar to the LongSteelBars instance.
         """
-        previous_steel_bars = self.steel_bars
-        if str(type(new_steel_bars)) == "<class 'fconcrete.StructuralConcrete.LongSteelBar.LongSteelBar.LongSteelBars'>":
-            concatenation = list(np.concatenate((previous_steel_bars,new_steel_bars.steel_bars)))
-            concatenation.sort(key=lambda x: x.long_begin, reverse=False)
-            new_steel_bars = np.array(concatenation)
-            
-        elif str(type(new_steel_bars)) == "<class 'fconcrete.StructuralConcrete.LongSteelBar.LongSteelBar.LongSteelBar'>":
-            new_steel_bars = np.append(previous_steel_bars,new_steel_bars)
-        self.__init__(new_steel_bars)
+        if isinstance(new_steel_bars, LongSteelBars):
+            new_steel_bars = self.concatenate(new_steel_bars).sort("long_begins")
+        elif isinstance(new_steel_bars, LongSteelBar):
+            new_steel_bars = self.concatenate(LongSteelBars([new_steel_bars]))
+        else: return
+        self.__dict__.update(new_steel_bars.__dict__)
     
     def changeProperty(self, prop, function, conditional=lambda x:True):
         """
@@ -119,17 +116,8 @@ class LongSteelBars():
             negative_steel_bar_in_x : LongSteelBars
                 The negative steel bar found in x.
         """
-        positive_steel_bar_in_x = np.array([steel_bar if condition else None 
-                               for condition, steel_bar
-                               in zip((self.long_begins<=x) & (self.long_ends>=x) & (self.areas>0), self.steel_bars)])
-
-        negative_steel_bar_in_x = np.array([steel_bar if condition else None 
-                                for condition, steel_bar
-                                in zip((self.long_begins<=x) & (self.long_ends>=x) & (self.areas<0), self.steel_bars)])
-        
-        positive_steel_bar_in_x = LongSteelBars(positive_steel_bar_in_x[positive_steel_bar_in_x!=None])
-        negative_steel_bar_in_x = LongSteelBars(negative_steel_bar_in_x[negative_steel_bar_in_x!=None])
-        return positive_steel_bar_in_x, negative_steel_bar_in_x
+        is_in_x = (self.long_begins<=x) & (self.long_ends>=x)
+        return self.take(is_in_x & (self.areas>0)), self.take(is_in_x & (self.areas<0))
     
     
     def getBarTransversalPosition(self, concrete_beam, x):
@@ -4,42 +4,45 @@ import warnings
 #from scipy.signal import find_peaks
 from .find_peaks import detect_peaks as find_peaks
 from math import radians, sin, tan
-from fconcrete.helpers import timeit, make_dxf, getAxis
+from fconcrete.helpers import make_dxf, getAxis, profiled
 import matplotlib.pyplot as plt
 
 class LongSteelBarSolve():
-    def __init__(self, concrete_beam):
-        verbose = concrete_beam.verbose
-        self.verbose = verbose
+    def __init__(self, concrete_beam, previous_solution=None):
+        self.verbose = concrete_beam.verbose
         self.available = concrete_beam.available_long_steel_bars
         self.concrete_beam = concrete_beam
+        # The momentum design diagram does not depend on the steel height, so it is reused from the previous solution
+        self._previous_solution = previous_solution
+        self._momentum_design_envelope = (previous_solution._momentum_design_envelope if previous_solution is not None
+                                          else concrete_beam.getMomentumDesignEnvelopeDiagram(division=concrete_beam.division))
         
         self.bar_steel_removal_step = self.concrete_beam.bar_steel_removal_step
         self.bar_steel_max_removal = self.concrete_beam.bar_steel_max_removal
         
-        x, positive_areas_info, negative_areas_info = timeit(verbose)(self.getComercialSteelAreaDiagram)(division=concrete_beam.division)
+        x, positive_areas_info, negative_areas_info = self.getComercialSteelAreaDiagram(division=concrete_beam.division)
         self.x = x
         self.positive_areas_info = positive_areas_info
         self.negative_areas_info = negative_areas_info
         
-        interspace_between_momentum_positive = self._getInterspaceBetweenMomentum(x, area=positive_areas_info[2])
-        interspace_between_momentum_negative = self._getInterspaceBetweenMomentum(x, area=negative_areas_info[2])
-        
-        self.interspace_between_momentum_positive = interspace_between_momentum_positive
-        self.interspace_between_momentum_negative = interspace_between_momentum_negative
-        
-        steel_bars_positive = self._getBarsInInterspaces(x, positive_areas_info, interspace_between_momentum_positive)
-        steel_bars_negative = self._getBarsInInterspaces(x, negative_areas_info, interspace_between_momentum_negative)
+        with concrete_beam.profiler.stage("interspaces"):
+            interspace_between_momentum_positive = self._getInterspaceBetweenMomentum(x, area=positive_areas_info[2])
+            interspace_between_momentum_negative = self._getInterspaceBetweenMomentum(x, area=negative_areas_info[2])
+            
+            self.interspace_between_momentum_positive = interspace_between_momentum_positive
+            self.interspace_between_momentum_negative = interspace_between_momentum_negative
+            
+            steel_bars_positive = self._getBarsInInterspaces(x, positive_areas_info, interspace_between_momentum_positive)
+            steel_bars_negative = self._getBarsInInterspaces(x, negative_areas_info, interspace_between_momentum_negative)
         #steel_bars_negative = self._getBarsInInterspaces(x, negative_areas_info, interspace_between_momentum_negative)
         
-        concatenation = list(np.concatenate((steel_bars_positive.steel_bars,steel_bars_negative.steel_bars)))
-        concatenation.sort(key=lambda x: x.long_begin, reverse=False)
-        steel_bars = LongSteelBars(np.array(concatenation))
+        steel_bars = steel_bars_positive.concatenate(steel_bars_negative).sort("long_begins")
         
-        steel_bars_with_anchor_length_positive = timeit(verbose, "Anchor positive steel bar")(self._anchorSteelBars)(steel_bars, interspace_between_momentum_positive)
-        self.steel_bars = timeit(verbose, "Anchor negative steel bar")(self._anchorSteelBars)(steel_bars_with_anchor_length_positive, interspace_between_momentum_negative)
+        steel_bars_with_anchor_length_positive = self._anchorSteelBars(steel_bars, interspace_between_momentum_positive)
+        self.steel_bars = self._anchorSteelBars(steel_bars_with_anchor_length_positive, interspace_between_momentum_negative)
         
         
+    @profiled("decalaged_diagram", "concrete_beam.profiler")
     def getDecalagedMomentumDesignDiagram(self, **options_diagram):
         """
             Returns tuple with 3 np.array: x (axis), momentum_positive, momentum_negative.
@@ -57,17 +60,23 @@ class LongSteelBarSolve():
                 A high number means a more precise graph, but also you need more processing time.
             
         """
-        x, momentum_diagram = self.concrete_beam.getMomentumDiagram(division=self.concrete_beam.division)
+        x, momentum_minimum, momentum_maximum = self._momentum_design_envelope
         x_decalaged, decalaged_x_left, decalaged_x_right, join_decalaged_x_order = self.__decalageds_x_axis(x)
-        momentum_positive, momentum_negative = self.__decalaged_momentums(x_decalaged,
-                                                                    decalaged_x_left,
-                                                                    decalaged_x_right,
-                                                                    join_decalaged_x_order,
-                                                                    momentum_diagram)
+        # The positive steel comes from the maximum momentum and the negative one from the minimum
+        momentum_positive, _ = self.__decalaged_momentums(x_decalaged,
+                                                          decalaged_x_left,
+                                                          decalaged_x_right,
+                                                          join_decalaged_x_order,
+                                                          momentum_maximum)
+        _, momentum_negative = self.__decalaged_momentums(x_decalaged,
+                                                          decalaged_x_left,
+                                                          decalaged_x_right,
+                                                          join_decalaged_x_order,
+                                                          momentum_minimum)
         momentum_positive = self.__join_momentum_peak(momentum_positive)
         momentum_negative = self.__join_momentum_peak(momentum_negative)
         
-        return x_decalaged, self.concrete_beam.design_factor*momentum_positive, self.concrete_beam.design_factor*momentum_negative
+        return x_decalaged, momentum_positive, momentum_negative
     
     def plotDecalagedMomentumDesignDiagram(self, ax=None, fig=None, **options):
         """
@@ -83,16 +92,11 @@ class LongSteelBarSolve():
         return make_dxf(ax, **options)
     
     def __decalageds_x_axis(self, x):
-        decalaged_x_left = np.array([])
-        decalaged_x_right = np.array([])
-        
-        for beam_element in self.concrete_beam.beam_elements:
-            a_l = self.getDecalagedLength(beam_element)
-            position_in_beam_element = x[(x>=beam_element.n1.x) & (x<=beam_element.n2.x)]
-            decalaged_x_left_temp = position_in_beam_element - a_l
-            decalaged_x_right_temp = position_in_beam_element + a_l
-            decalaged_x_left = np.concatenate((decalaged_x_left, decalaged_x_left_temp))
-            decalaged_x_right = np.concatenate((decalaged_x_right, decalaged_x_right_temp))
+        # Each x is in a single beam element, so x can have non uniform points, including the nodes
+        a_l = np.array([ self.getDecalagedLength(beam_element) for beam_element in self.concrete_beam.beam_elements ])
+        a_l = a_l[self.concrete_beam.getBeamElementIndexInX(x)]
+        decalaged_x_left = x - a_l
+        decalaged_x_right = x + a_l
         
         join_decalaged_x = np.concatenate((decalaged_x_left, x, decalaged_x_right))
         join_decalaged_x_order = join_decalaged_x.argsort()
@@ -108,8 +112,10 @@ class LongSteelBarSolve():
                               momentum_diagram):
         #momentum_decalaged_diagram = np.concatenate((momentum_diagram, momentum_diagram, momentum_diagram))[join_decalaged_x_order]
 
-        momentum_left = np.interp(x_decalaged, decalaged_x_left, momentum_diagram)
-        momentum_right = np.interp(x_decalaged, decalaged_x_right, momentum_diagram)
+        # np.interp needs increasing positions, but the decalaged length changes between beam elements
+        order_left, order_right = np.argsort(decalaged_x_left, kind="stable"), np.argsort(decalaged_x_right, kind="stable")
+        momentum_left = np.interp(x_decalaged, decalaged_x_left[order_left], momentum_diagram[order_left])
+        momentum_right = np.interp(x_decalaged, decalaged_x_right[order_right], momentum_diagram[order_right])
 
         momentum_positive = np.max((momentum_left, momentum_right), axis=0)
         momentum_positive = np.where(momentum_positive<0, np.nan, momentum_positive)
@@ -153,6 +159,7 @@ class LongSteelBarSolve():
         
         
     
+    @profiled("comercial_area", "concrete_beam.profiler")
     def getComercialSteelAreaDiagram(self, **options_diagram):
         """
             Returns comercial steel area diagram.
@@ -166,13 +173,49 @@ class LongSteelBarSolve():
                 >>> x_decalaged, positive_areas_info, negative_areas_info = concrete_beam.long_steel_bars_solution_info.getComercialSteelAreaDiagram()
                 >>> x_decalaged, positive_areas_info, negative_areas_info = concrete_beam.long_steel_bars_solution_info.getComercialSteelAreaDiagram(division=5000)
         """ 
-        x_decalaged, momentum_positive, momentum_negative = timeit(self.verbose)(self.getDecalagedMomentumDesignDiagram)(**options_diagram)
-        positive_areas_info = [self.getComercialSteelArea(x, m) for x, m in zip(x_decalaged, momentum_positive)]
-        negative_areas_info = [self.getComercialSteelArea(x, m) for x, m in zip(x_decalaged, momentum_negative)]
-        
-        #positive_areas_info = timeit("positive_areas_info", self.verbose)([self.getComercialSteelArea(x, m) for x, m in zip(x_decalaged, momentum_positive)])
-        #negative_areas_info = timeit("negative_areas_info", self.verbose)([self.getComercialSteelArea(x, m) for x, m in zip(x_decalaged, momentum_negative)])
-        return x_decalaged, np.array(np.array(positive_areas_info).T), np.array(np.array(negative_areas_info).T)
+        x_decalaged, momentum_positive, momentum_negative = self.getDecalagedMomentumDesignDiagram(**options_diagram)
+        section_properties = self._getSectionProperties(x_decalaged)
+        # The positive steel area does not depend on the negative steel height, and vice versa
+        positive_section_properties, negative_section_properties = section_properties[:, [0, 1, 3, 4, 5]], section_properties[:, [0, 2, 3, 4, 5]]
+        previous = self._previous_solution._comercial_steel_area_inputs if self._previous_solution is not None else None
+        positive_areas_info = self._getComercialSteelAreas(x_decalaged, momentum_positive, positive_section_properties,
+                                                           None if previous is None else previous["positive"])
+        negative_areas_info = self._getComercialSteelAreas(x_decalaged, momentum_negative, negative_section_properties,
+                                                           None if previous is None else previous["negative"])
+        self._comercial_steel_area_inputs = {
+            "positive": (x_decalaged, momentum_positive, positive_section_properties, positive_areas_info),
+            "negative": (x_decalaged, momentum_negative, negative_section_properties, negative_areas_info),
+        }
+        return x_decalaged, positive_areas_info, negative_areas_info
+    
+    def _getSectionProperties(self, x):
+        """
+            Properties of the beam element in each x that change the steel area: width, positive and negative steel height, area, fck and fcd.
+        """
+        properties = np.array([ (beam_element.section.width(), beam_element.section.positive_steel_height, beam_element.section.negative_steel_height,
+                                 beam_element.section.area, beam_element.material.fck, beam_element.material.fcd)
+                                for beam_element in self.concrete_beam.beam_elements ], dtype=float)
+        return properties[self.concrete_beam.getBeamElementIndexInX(x)]
+    
+    def _getComercialSteelAreas(self, x, momentum, section_properties, previous=None):
+        """
+            Applies getComercialSteelArea in each x and momentum, as an array with the rows quantity, diameter and area.
+            The points with the same x, momentum and section properties of previous (x, momentum, section_properties, areas_info) are copied, not solved again.
+        """
+        areas_info = np.full((3, len(x)), np.nan)
+        is_solved = np.zeros(len(x), dtype=bool)
+        if previous is not None and len(previous[0]):
+            previous_x, previous_momentum, previous_section_properties, previous_areas_info = previous
+            # x is sorted, so the same x is found by a binary search
+            position = np.clip(np.searchsorted(previous_x, x), 0, len(previous_x)-1)
+            is_same_momentum = ((previous_momentum[position] == momentum)
+                                | (np.isnan(previous_momentum[position]) & np.isnan(momentum)))
+            is_solved = ((previous_x[position] == x) & is_same_momentum
+                         & (previous_section_properties[position] == section_properties).all(axis=1))
+            areas_info[:, is_solved] = previous_areas_info[:, position[is_solved]]
+        for index in np.flatnonzero(~is_solved):
+            areas_info[:, index] = self.getComercialSteelArea(x[index], momentum[index])
+        return areas_info
 
     
     def getComercialSteelArea(self, x, momentum):
@@ -218,6 +261,7 @@ class LongSteelBarSolve():
         quantity, diameter, area = values
         return quantity, diameter, area
     
+    @profiled("anchoring", "concrete_beam.profiler")
     def _anchorSteelBars(self, steel_bars, interspace_between_momentum):
         steel_bar_surface_type = self.concrete_beam.available_long_steel_bars.surface_type
         n1 = (2.25 if steel_bar_surface_type == "ribbed"
@@ -226,7 +270,7 @@ class LongSteelBarSolve():
         else 0)
                 
         for interspace in interspace_between_momentum:
-            steel_bars_in_insterspace = LongSteelBars(steel_bars[(interspace == steel_bars.interspaces).sum(axis=1)== 2])
+            steel_bars_in_insterspace = steel_bars.take((interspace == steel_bars.interspaces).sum(axis=1)== 2)
             major_steel_bar = steel_bars_in_insterspace[abs(steel_bars_in_insterspace.areas_accumulated) == abs(steel_bars_in_insterspace.areas_accumulated).max()][0]
             diameter = major_steel_bar.diameter
             begin, end = major_steel_bar.long_begin, major_steel_bar.long_end
@@ -418,11 +462,11 @@ class LongSteelBarSolve():
         """ 
         bw = beam_element.section.bw
         d = beam_element.section.maximum_steel_height
-        _, s = self.concrete_beam.getShearDiagram(x_begin=beam_element.n1.x, x_end=beam_element.n2.x)
         alpha = radians(self.concrete_beam.available_transv_steel_bars.inclination_angle)
         if alpha==radians(90):
             return 0.5*d
-        vsd_max = max(abs(s))
+        minimum_shear, maximum_shear = self.concrete_beam.shear_polynomial.getExtrema(beam_element.n1.x, beam_element.n2.x)
+        vsd_max = max(abs(minimum_shear), abs(maximum_shear))
         fctd = beam_element.material.fctd
         v_c0 = 0.6*fctd*bw*d
         al_formula = min(d*((vsd_max*(1+tan(alpha)**(-1)))/(2*(vsd_max-v_c0))-tan(alpha)**(-1)), d)
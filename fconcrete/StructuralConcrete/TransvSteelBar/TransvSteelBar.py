@@ -1,9 +1,11 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import copy
-from fconcrete.helpers import getAxis, make_dxf
+from fconcrete.helpers import getAxis, make_dxf, slots_dict, ColumnarList
 
 class TransvSteelBar():
+    __slots__ = ("x", "height", "width", "diameter", "space_after", "area", "as_per_cm", "anchor", "length", "cost")
+    
     def __init__(self, x, height, width, diameter, space_after, area, as_per_cm, anchor, length, cost):
         self.x = x
         self.height = height
@@ -17,7 +19,7 @@ class TransvSteelBar():
         self.cost =  cost
         
     def __repr__(self):
-        return str(self.__dict__)+'\n'
+        return str(slots_dict(self))+'\n'
     
     def plot(self, c=2, ax=None, fig=None, color_plot="blue", **options):
         """
@@ -43,37 +45,32 @@ class TransvSteelBar():
         return make_dxf(ax, **options) # if return_ax else None
         
 
-class TransvSteelBars():
+class TransvSteelBars(ColumnarList):
     """
         Class that defines a the TransvSteelBar list with easy to work properties and methods.
     """
+    _columns = (("x", "x"), ("heights", "height"), ("widths", "width"), ("diameters", "diameter"),
+                ("space_afters", "space_after"), ("areas", "area"), ("as_per_cms", "as_per_cm"),
+                ("lengths", "length"), ("costs", "cost"))
+    _elements_name = "steel_bars"
+    
     def __init__(self, steel_bars=[]):
-        self.steel_bars = np.array(steel_bars)
-        self.x = np.array([ steel_bar.x for steel_bar in self.steel_bars ])
-        self.heights = np.array([ steel_bar.height for steel_bar in self.steel_bars ])
-        self.widths = np.array([ steel_bar.width for steel_bar in self.steel_bars ])
-        self.diameters = np.array([ steel_bar.diameter for steel_bar in self.steel_bars ])
-        self.space_afters = np.array([ steel_bar.space_after for steel_bar in self.steel_bars ])
-        self.areas = np.array([ steel_bar.area for steel_bar in self.steel_bars ])
-        self.as_per_cms = np.array([ steel_bar.as_per_cm for steel_bar in self.steel_bars ])
-        self.lengths = np.array([ steel_bar.length for steel_bar in self.steel_bars ])
-        self.costs = np.array([ steel_bar.cost for steel_bar in self.steel_bars ])
+        self._setColumns(steel_bars)
+    
+    def _setDerived(self):
         self.length = sum(self.lengths)
         self.cost = sum(self.costs)
 
     def add(self, new_steel_bars):
         """
-            Add a array of Load in the Loads instance.
+            Add a TransvSteelBar (or a TransvSteelBars instance) in the TransvSteelBars instance.
         """
-        previous_steel_bars = self.steel_bars
-        if str(type(new_steel_bars)) == "<class 'fconcrete.StructuralConcrete.TransvSteelBar.TransvSteelBar.TransvSteelBars'>":
-            concatenation = list(np.concatenate((previous_steel_bars,new_steel_bars.steel_bars)))
-            concatenation.sort(key=lambda x: x.long_begin, reverse=False)
-            new_steel_bars = np.array(concatenation)
-            
-        elif str(type(new_steel_bars)) == "<class 'fconcrete.StructuralConcrete.TransvSteelBar.TransvSteelBar.TransvSteelBar'>":
-            new_steel_bars = np.append(previous_steel_bars,new_steel_bars)
-        self.__init__(new_steel_bars)
+        if isinstance(new_steel_bars, TransvSteelBars):
+            new_steel_bars = self.concatenate(new_steel_bars).sort("x")
+        elif isinstance(new_steel_bars, TransvSteelBar):
+            new_steel_bars = self.concatenate(TransvSteelBars([new_steel_bars]))
+        else: return
+        self.__dict__.update(new_steel_bars.__dict__)
     
     def getTransversalBarAfterX(self, x):
         """
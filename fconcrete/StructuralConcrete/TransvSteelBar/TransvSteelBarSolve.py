@@ -1,6 +1,7 @@
 import numpy as np
 from .TransvSteelBar import TransvSteelBar, TransvSteelBars
 from math import radians, sin, tan
+from fconcrete.helpers import profiled
 
 class TransvSteelBarSolve():
     def __init__(self, concrete_beam, fyk=50, theta_in_degree=45, alpha_in_degree = 90):
@@ -57,13 +58,20 @@ class TransvSteelBarSolve():
         """
             Giving a beam element, calculates the shear related to the ruin of compressed concrete diagonals in kN.
         """
+        return self._getV_rd2(single_beam_element, self.theta, self.alpha)
+    
+    @staticmethod
+    def _getV_rd2(single_beam_element, theta, alpha):
+        """
+            Same as getV_rd2, with the angles theta and alpha in radians. Used before the transversal steel is solved (see concrete_beam.getFeasibilityReport).
+        """
         fck = single_beam_element.material.fck
         bw = single_beam_element.section.bw
         d = single_beam_element.section.minimum_steel_height
         
         fcd = single_beam_element.material.fcd
         alpha_v2 = (1-fck/25)
-        v_rd2 = 0.54*alpha_v2*fcd*bw*d*(sin(self.theta))*(tan(self.alpha)**(-1)+tan(self.theta)**(-1))
+        v_rd2 = 0.54*alpha_v2*fcd*bw*d*(sin(theta))*(tan(alpha)**(-1)+tan(theta)**(-1))
         return v_rd2
     
     def getMinimumSteelAreaPerCm(self,single_beam_element):
@@ -80,12 +88,10 @@ class TransvSteelBarSolve():
         """
             Calculates the shear steel area (cmˆ2) per cm considering the restrictions.
         """
-        # can be optimized
         _, single_beam_element = self.concrete_beam.getBeamElementInX(x)
         v_rd2 = self.getV_rd2(single_beam_element)
         As_per_cm_min = self.getMinimumSteelAreaPerCm(single_beam_element)
         
-        _, single_beam_element = self.concrete_beam.getBeamElementInX(x)
         bw = single_beam_element.section.bw
         d = single_beam_element.section.minimum_steel_height
         fctd = single_beam_element.material.fctd
@@ -138,6 +144,7 @@ class TransvSteelBarSolve():
         diameter, space, area, as_per_cm = comercial_info[0]
         return diameter, space, area, as_per_cm
     
+    @profiled("stirrups", "concrete_beam.profiler")
     def getStirrupsInfo(self):
         """
             Format all informations and return a TransvSteelBars instance.
@@ -149,7 +156,8 @@ class TransvSteelBarSolve():
 
         while x<self.concrete_beam.x_end:
             x_loop = ((x_array>x) & (x_array<x+s_max))
-            shear = max(abs(shear_area_per_cm[x_loop]))
+            # Non uniform x can have no point between x and x+s_max
+            shear = max(abs(shear_area_per_cm[x_loop])) if x_loop.any() else max(abs(np.interp([x, x+s_max], x_array, shear_area_per_cm)))
             diameter, space, area, as_per_cm = self.getComercialInfo(shear)
             single_beam_element = self.concrete_beam.getBeamElementInX(x)[1]
             height = single_beam_element.section.height
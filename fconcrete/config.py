@@ -5,4 +5,16 @@ ureg.define('kNcm = kilonewton * centimeter = kncm')
 ureg.define('kNm = kilonewton * meter = knm')
 _Q = ureg.Quantity
 
-e = 0.00001
\ No newline at end of file
+e = 0.00001
+
+# Maximum number of elements of a single (positions x loads) broadcast.
+# Bigger inputs are evaluated in chunks.
+max_broadcast_size = 2**20
+
+# Systems of equations with at least this number of degrees of freedom
+# are solved with the banded solver instead of the dense one.
+banded_solver_minimum_size = 512
+
+# Default number of points of each chunk yielded by
+# beam.iterShearDiagram, beam.iterMomentumDiagram and similar.
+diagram_chunk_size = 2**16
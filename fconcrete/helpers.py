@@ -2,6 +2,10 @@ import numpy as np
 from fconcrete import config as c
 import matplotlib.pyplot as plt
 import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from operator import attrgetter
 import ezdxf
 import pandas as pd
 
@@ -16,6 +20,17 @@ def cond(x, singular=False, order=0):
         return 1 if x>0 else 0
     return x**order if x>0 else 0
 
+def cond_array(x, singular=False, order=0):
+    """
+    Same as cond, but applied element-wise to a np.ndarray.
+    order can also be a np.ndarray that broadcasts with x.
+    """
+    x = np.asarray(x, dtype=float)
+    is_positive = x>0
+    if singular:
+        return is_positive.astype(float)
+    return np.where(is_positive, np.where(is_positive, x, 1)**order, 0)
+
 def integrate(f, a, b, N=100):
     """
     Integrate f from a to b in N steps
@@ -24,6 +39,45 @@ def integrate(f, a, b, N=100):
     y = np.apply_along_axis(f, 0, np.array([x]))
     return np.trapz(y, dx=(b-a)/(N-1))
 
+def adaptive_sampling(function, breakpoints, division=1000, tolerance=1e-3):
+    """
+    Non uniform positions between breakpoints[0] and breakpoints[-1] to draw a piecewise smooth function.
+    Starts with the breakpoints (where the function can change its polynomial or be discontinuous), the right side of each one and a few points between them.
+    Then splits only the intervals where the function is far from the straight line between its ends,
+    until the distance is smaller than tolerance times the biggest absolute value of the function or there are division points.
+    
+        >>> x, y = fc.adaptive_sampling(beam.getInternalMomentumStrength, [0, 200, 400], division=300)
+    
+    function receives an array of positions and returns one value for each (or many rows of them).
+    Returns the positions and the values of the function.
+    """
+    breakpoints = np.unique(breakpoints)
+    # The diagrams are continuous from the left, so the right side of a discontinuity is read a bit after it
+    right_side = breakpoints[1:-1] + c.e
+    x = np.unique(np.concatenate((breakpoints, right_side[right_side < breakpoints[-1]])))
+    is_wide = np.diff(x) > 2*c.e
+    x = np.unique(np.concatenate((x, (x[:-1, np.newaxis] + np.diff(x)[:, np.newaxis]*[0.25, 0.5, 0.75])[is_wide].ravel())))
+    values = function(x)
+    y = np.atleast_2d(values)
+    to_check = np.diff(x) > 2*c.e
+    while len(x) < division and to_check.any():
+        middle = ((x[:-1]+x[1:])/2)[to_check]
+        y_middle = np.atleast_2d(function(middle))
+        distance = np.abs(y_middle - ((y[:, :-1]+y[:, 1:])/2)[:, to_check]).max(axis=0)
+        # ndarray.max accepts initial since NumPy 1.15, np.nanmax only since 1.22
+        scale = np.abs(y[~np.isnan(y)]).max(initial=0)
+        is_far = distance > tolerance*scale
+        # The farthest ones first, when there is no room for all of them
+        new = np.flatnonzero(is_far)
+        new = new[np.argsort(-distance[new], kind="stable")][:division-len(x)]
+        if len(new) == 0: break
+        order = np.argsort(np.concatenate((x, middle[new])), kind="stable")
+        x = np.concatenate((x, middle[new]))[order]
+        y = np.concatenate((y, y_middle[:, new]), axis=1)[:, order]
+        is_new = order >= len(order)-len(new)
+        to_check = (is_new[:-1] | is_new[1:]) & (np.diff(x) > 2*c.e)
+    return x, (y[0] if np.ndim(values) == 1 else y)
+
 def duplicated(array):
     """
     Check if it is duplicated.
@@ -60,6 +114,8 @@ def to_unit(input, expected_unit, return_unit=False):
             The desired unit to return
 
     """
+    # A number is already in expected_unit, so there is nothing to parse
+    if not return_unit and isinstance(input, (int, float)): return float(input)
     try:
         input = float(input)
         value = _Q(input, expected_unit)
@@ -99,6 +155,118 @@ def timeit(do=True, name=""):
         return inner
     return inner0
 
+class Profiler:
+    """
+    Records the wall time, CPU time, number of calls and peak memory allocation of each stage of a solution.
+    Each Beam and ConcreteBeam has one in beam.profiler. The same Profiler can be shared by many beams with the profiler option,
+    or the ones of many beams can be summed with fc.Profiler.aggregate.
+    
+        >>> profiler = fc.Profiler(trace_memory=True)
+        >>> with profiler.stage("my stage"):
+        >>>     concrete_beam = fc.ConcreteBeam(loads, nodes=nodes, section=section, profiler=profiler)
+        >>> profiler.getTable()
+        >>> fc.Profiler.aggregate([ beam.profiler for beam in beams ])
+    
+    The stages can be nested, and the time of the inner ones is also counted in the outer ones.
+    The peak memory (in bytes, above the memory in use when the stage begins) is only recorded with trace_memory=True
+    (which makes everything slower) or if tracemalloc is already tracing. Otherwise it is nan.
+    If verbose is True, the duration of each stage is printed, like timeit.
+    The methods of the solution are recorded with the decorator fc.profiled, where they are defined.
+    """
+    _fields = ("calls", "wall_time", "cpu_time", "peak_memory")
+    
+    def __init__(self, verbose=False, trace_memory=False):
+        self.verbose = verbose
+        self.trace_memory = trace_memory
+        self.records = {}
+        self._stack = []
+        self._started_tracing = False
+    
+    @contextmanager
+    def stage(self, name):
+        """
+        Context manager that records a call of the stage.
+        """
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        is_tracing = tracemalloc.is_tracing()
+        frame = { "memory": np.nan, "peak": np.nan }
+        if is_tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # The peak of the outer stage until now is kept before the peak is reset for this stage
+            if self._stack: self._stack[-1]["peak"] = np.fmax(self._stack[-1]["peak"], peak)
+            # Before Python 3.9 the peak cannot be reset, so it can also include the peak of the previous stages
+            if hasattr(tracemalloc, "reset_peak"): tracemalloc.reset_peak()
+            frame = { "memory": current, "peak": current }
+        self._stack.append(frame)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield self
+        finally:
+            wall_time, cpu_time = time.perf_counter()-start_wall, time.process_time()-start_cpu
+            self._stack.pop()
+            if is_tracing and tracemalloc.is_tracing():
+                frame["peak"] = np.fmax(frame["peak"], tracemalloc.get_traced_memory()[1])
+                if self._stack: self._stack[-1]["peak"] = np.fmax(self._stack[-1]["peak"], frame["peak"])
+            if self._started_tracing and not self._stack:
+                tracemalloc.stop()
+                self._started_tracing = False
+            record = self.records.setdefault(name, { "calls": 0, "wall_time": 0., "cpu_time": 0., "peak_memory": np.nan })
+            record["calls"] += 1
+            record["wall_time"] += wall_time
+            record["cpu_time"] += cpu_time
+            record["peak_memory"] = np.fmax(record["peak_memory"], frame["peak"]-frame["memory"])
+            if self.verbose: print("{} executed in {}s".format(name, wall_time))
+    
+    def toDict(self):
+        """
+        Returns a copy of the records: a dict with the name of each stage and a dict with its calls, wall_time, cpu_time and peak_memory.
+        """
+        return { name: dict(record) for name, record in self.records.items() }
+    
+    def getTable(self):
+        """
+        Returns the records as a pd.DataFrame with one row for each stage.
+        """
+        return pd.DataFrame.from_dict(self.toDict(), orient="index", columns=self._fields).rename_axis("stage")
+    
+    @staticmethod
+    def aggregate(profilers):
+        """
+        Sums the calls, wall_time and cpu_time of the same stage of many profilers and keeps the biggest peak_memory.
+        Returns a pd.DataFrame with one row for each stage, plus the column "profilers" with the number of profilers where it happened.
+        """
+        tables = [ profiler.getTable().reset_index() for profiler in profilers ]
+        table = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=("stage", *Profiler._fields))
+        return table.groupby("stage", sort=False).agg(
+            profilers=("calls", "size"),
+            calls=("calls", "sum"),
+            wall_time=("wall_time", "sum"),
+            cpu_time=("cpu_time", "sum"),
+            peak_memory=("peak_memory", "max"),
+        )
+    
+    def __repr__(self):
+        return str(self.records)
+
+def profiled(name, profiler="profiler"):
+    """
+    Decorator of methods that records each call as a call of the stage name, in the Profiler of the instance.
+    profiler is the attribute with the Profiler, which can be dotted, like "concrete_beam.profiler".
+    
+        >>> @profiled("structural")
+        >>> def solve_structural(self):
+    """
+    get_profiler = attrgetter(profiler)
+    def inner0(method):
+        @wraps(method)
+        def inner(self, *args, **kw):
+            with get_profiler(self).stage(name):
+                return method(self, *args, **kw)
+        return inner
+    return inner0
+
 # https://gist.github.com/snakers4/91fa21b9dda9d055a02ecd23f24fbc3d
 def printProgressBar (iteration, total, prefix = '', suffix = '', decimals = 1, length = 100, fill = '█', printEnd = "\r"):
     """
@@ -154,3 +322,131 @@ def to_pandas(array_table):
     df_table.columns = df_table.iloc[0]
     df_table = df_table.drop(df_table.index[0])
     return df_table
+
+def slots_dict(instance):
+    """
+    Same as instance.__dict__, for a class that uses __slots__.
+    """
+    return { name: getattr(instance, name) for name in instance.__slots__ if hasattr(instance, name) }
+
+def save_columns(file, columns):
+    """
+    Saves named columns (np.array of any length) in a single .npy file.
+    Each column is a field of a structured array with one record, so it is stored contiguous and can be read alone by load_columns with memory mapping.
+    
+        >>> fc.save_columns("beam.npy", {"x": x, "momentum": momentum})
+    """
+    columns = { name: np.asarray(column, dtype=float) for name, column in columns.items() }
+    table = np.zeros((), dtype=[ (name, float, column.shape) for name, column in columns.items() ])
+    for name, column in columns.items():
+        table[name] = column
+    np.save(file, table)
+
+def load_columns(file, mmap_mode="r"):
+    """
+    Loads the columns saved by save_columns as a dict of np.array.
+    With mmap_mode (default "r") the columns are views of the memory mapped file: no data is read until it is used.
+    
+        >>> columns = fc.load_columns("beam.npy")
+        >>> maximum = columns["momentum"].max()
+    """
+    table = np.load(file, mmap_mode=mmap_mode)
+    return { name: table[name] for name in table.dtype.names }
+
+class ColumnarList:
+    """
+    Base of the lists of elements with easy to work properties (Loads, Nodes, BeamElements, LongSteelBars and TransvSteelBars).
+    Each property of the elements is a column (np.array), extracted in a single pass.
+    Slicing, filtering, sorting and concatenation index the columns and the elements together, without extracting the properties again.
+    The columns are the values used in the calculations, so the properties must be changed with setColumn, which also changes the elements.
+    If the elements are shared with other instance, it must use refreshColumns after the change.
+    
+    Subclasses define:
+        _columns: tuple of (column name, element attribute). The attribute can be dotted, like "n1.x".
+        _elements_name: name of the attribute with the np.array of elements.
+        _setDerived: optional method to calculate the attributes that depend on all the columns.
+    """
+    _columns = ()
+    _elements_name = "elements"
+    
+    def _setColumns(self, elements):
+        if isinstance(elements, ColumnarList): elements = list(elements)
+        elements = np.array(elements)
+        setattr(self, self._elements_name, elements)
+        getters = [ attrgetter(attribute) for _, attribute in self._columns ]
+        rows = [ tuple(getter(element) for getter in getters) for element in elements ]
+        columns = zip(*rows) if len(rows) else [ () for _ in self._columns ]
+        for (name, _), column in zip(self._columns, columns):
+            setattr(self, name, np.array(column))
+        self._setDerived()
+    
+    def _setDerived(self):
+        pass
+    
+    def setColumn(self, name, values, index=slice(None)):
+        """
+            Set the values of the column name in index (a slice, a boolean mask or an array of positions), and the attribute of these elements.
+            The other instances with the same elements are not changed.
+            
+                Call signatures:
+
+                    columnar_list.setColumn(name, values, index=slice(None))
+
+                >>> beam_elements.setColumn("flexural_rigidity", [2e8, 1e8], [0, 2])
+        """
+        attribute = dict(self._columns)[name]
+        if "." in attribute: raise Exception("Column {} is a property of other element ({}) and cannot be set".format(name, attribute))
+        column = getattr(self, name).copy()
+        column[index] = values
+        setattr(self, name, column)
+        elements = getattr(self, self._elements_name)
+        if elements is None: return
+        for element, value in zip(elements[index], column[index]):
+            setattr(element, attribute, value)
+    
+    def refreshColumns(self, *names):
+        """
+            Extract the columns names again from the elements, after they were changed by other instance with the same elements.
+        """
+        attributes = dict(self._columns)
+        elements = getattr(self, self._elements_name)
+        for name in names:
+            getter = attrgetter(attributes[name])
+            setattr(self, name, np.array([ getter(element) for element in elements ]))
+    
+    def take(self, index):
+        """
+            Returns a new instance with only the elements in index (a slice, a boolean mask or an array of positions).
+        """
+        new = self.__class__.__new__(self.__class__)
+        elements = getattr(self, self._elements_name)
+        setattr(new, self._elements_name, None if elements is None else elements[index])
+        for name, _ in self._columns:
+            setattr(new, name, getattr(self, name)[index])
+        new._setDerived()
+        return new
+    
+    def sort(self, column):
+        """
+            Returns a new instance sorted by the column, keeping the order of the elements with the same value.
+        """
+        return self.take(np.argsort(getattr(self, column), kind="stable"))
+    
+    def concatenate(self, other):
+        """
+            Returns a new instance with the elements of both instances.
+        """
+        new = self.__class__.__new__(self.__class__)
+        elements, other_elements = getattr(self, self._elements_name), getattr(other, other._elements_name)
+        setattr(new, self._elements_name, None if elements is None or other_elements is None
+                else np.concatenate((np.array(elements, dtype=object), np.array(other_elements, dtype=object))))
+        for name, _ in self._columns:
+            column, other_column = getattr(self, name), getattr(other, name)
+            if len(column) == 0: setattr(new, name, other_column.copy())
+            elif len(other_column) == 0: setattr(new, name, column.copy())
+            else: setattr(new, name, np.concatenate((column, other_column)))
+        new._setDerived()
+        return new
+    
+    def __len__(self):
+        return len(getattr(self, self._columns[0][0]))
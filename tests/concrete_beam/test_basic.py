@@ -1,4 +1,5 @@
 from pytest import approx
+import pytest
 import numpy as np
 import os
 import fconcrete as fc
@@ -8,15 +9,16 @@ np.set_printoptions(precision=3, suppress=True, linewidth=3000)
 def approx01(x):
     return approx(x, abs=0.1)
 
-def create_concrete_beam():
-    material = fc.Concrete(fck='30 MPa', aggressiveness=2)
-    section = fc.Rectangle(25,60)
-
-    #Design
+def create_loads():
     f1 = fc.Load.UniformDistributedLoad(-0.1622, x_begin=0, x_end=113)
     f2 = fc.Load.UniformDistributedLoad(-0.4994, x_begin=113, x_end=583)
     f3 = fc.Load.UniformDistributedLoad(-0.4196, x_begin=583, x_end=1188)
+    return [f1, f2, f3]
 
+def create_beam_elements():
+    material = fc.Concrete(fck='30 MPa', aggressiveness=2)
+    section = fc.Rectangle(25,60)
+    
     n1 = fc.Node.SimpleSupport(x=0, length=20)
     n2 = fc.Node.SimpleSupport(x=113, length=20)
     n3 = fc.Node.SimpleSupport(x=583, length=20)
@@ -25,16 +27,173 @@ def create_concrete_beam():
     bar1 = fc.BeamElement([n1, n2], section, material)
     bar2 = fc.BeamElement([n2, n3], section, material)
     bar3 = fc.BeamElement([n3, n4], section, material)
-        
+    return [bar1, bar2, bar3]
+
+def create_concrete_beam(**options):
+    #Design
+    options = { "loads": create_loads(), "bar_steel_max_removal": 2, "consider_own_weight": False, **options }
     beam = fc.ConcreteBeam(
-        loads = [f1, f2, f3],
-        beam_elements = [bar1, bar2, bar3],
-        bar_steel_max_removal = 2,
-        consider_own_weight = False
+        beam_elements = create_beam_elements(),
+        **options
     )
     return beam
+
+def create_simply_supported_concrete_beam(loads, sections, **options):
+    # Beam of 600cm with one beam element of each section, all with the same length
+    material = fc.Concrete(fck='30 MPa', aggressiveness=2)
+    x = np.linspace(0, 600, len(sections)+1)
+    nodes = [fc.Node.SimpleSupport(x=0, length=20), *[ fc.Node.MiddleNode(x=x_node) for x_node in x[1:-1] ], fc.Node.SimpleSupport(x=600, length=20)]
+    return fc.ConcreteBeam(
+        loads = loads,
+        beam_elements = [fc.BeamElement(nodes[i:i+2], section, material) for i, section in enumerate(sections)],
+        consider_own_weight = False,
+        **options
+    )
     
 def test_create_concrete_beam():
     beam = create_concrete_beam()
     assert beam.processing_time>0
-    
\ No newline at end of file
+    
+def test_concrete_beam_load_cases():
+    beam = create_concrete_beam()
+    load_case_beam = create_concrete_beam(loads=[], load_cases=[fc.LoadCase.Permanent("dead", create_loads())])
+    # 1.4*dead is the unfavorable combination in all the beam, as the design_factor.
+    # The envelope is only interpolated differently near the points of zero momentum.
+    assert load_case_beam.cost == approx(beam.cost, rel=1e-3)
+    x, minimum, maximum = load_case_beam.getMomentumDesignEnvelopeDiagram()
+    _, momentum = beam.getMomentumDiagram(division=beam.division)
+    assert np.max((minimum, maximum), axis=0) == approx(np.where(momentum > 0, 1.4*momentum, momentum))
+
+def test_concrete_beam_load_cases_service_combination():
+    f1, f2, f3 = create_loads()
+    service_beam = create_concrete_beam(loads=[], load_cases=[fc.LoadCase.Permanent("dead", [f1, f2, f3]), fc.LoadCase.Variable("use", [f2])], lazy=True)
+    # The structural beam (used by ELS) has the quasi permanent combination: dead + 0.3*use
+    expected = fc.Beam(loads=[f1, fc.Load.UniformDistributedLoad(-0.4994*1.3, x_begin=113, x_end=583), f3], beam_elements=create_beam_elements())
+    x = np.linspace(1, 1187, 50)
+    assert service_beam.getInternalMomentumStrength(x) == approx(expected.getInternalMomentumStrength(x))
+
+def test_concrete_beam_save_diagrams(tmp_path):
+    beam = create_concrete_beam()
+    file = str(tmp_path / "beam.npy")
+    beam.saveDiagrams(file)
+    columns = fc.Beam.loadDiagrams(file)
+    assert isinstance(columns["momentum"], np.memmap)
+    x, momentum = beam.getMomentumDiagram(division=beam.division)
+    assert np.array(columns["x"]) == approx(x)
+    assert np.array(columns["momentum"]) == approx(momentum)
+    _, shear_design = beam.getShearDesignDiagram()
+    assert np.array(columns["shear_design"]) == approx(shear_design)
+    x_decalaged, momentum_positive, _ = beam.long_steel_bars_solution_info.getDecalagedMomentumDesignDiagram()
+    assert np.array(columns["x_decalaged"]) == approx(x_decalaged)
+    assert np.array(columns["momentum_decalaged_positive"]) == approx(momentum_positive, nan_ok=True)
+    assert set(fc.Beam.loadDiagrams(file, mmap_mode=None)) == set(columns)
+
+def test_concrete_beam_adaptive():
+    beam = create_concrete_beam()
+    adaptive_beam = create_concrete_beam(adaptive=True)
+    x, _, _ = adaptive_beam.getMomentumDesignEnvelopeDiagram()
+    assert np.isin([113, 583], x).all()
+    assert adaptive_beam.cost == approx(beam.cost, rel=1e-2)
+
+def test_concrete_beam_steel_height_iterations(monkeypatch):
+    beam = create_concrete_beam()
+    history = beam.steel_height_history
+    assert [item["iteration"] for item in history] == list(range(len(history)))
+    assert max(history[-1]["relative_positive_diff"], history[-1]["relative_negative_diff"]) <= beam.max_relative_diff_of_steel_height
+    # With the same steel height, all the steel areas are reused
+    solution = beam.long_steel_bars_solution_info
+    monkeypatch.setattr(fc.LongSteelBarSolve, "getComercialSteelArea", lambda *args: pytest.fail("steel area solved again"))
+    new_solution = fc.LongSteelBarSolve(beam, previous_solution=solution)
+    assert new_solution.positive_areas_info == approx(solution.positive_areas_info, nan_ok=True)
+    assert new_solution.negative_areas_info == approx(solution.negative_areas_info, nan_ok=True)
+    assert new_solution.steel_bars.long_begins == approx(solution.steel_bars.long_begins)
+    monkeypatch.undo()
+    
+    with pytest.warns(UserWarning):
+        capped_beam = create_concrete_beam(loads=[fc.Load.UniformDistributedLoad(-0.4, x_begin=0, x_end=1188)], max_iterations_of_steel_height=0)
+    assert len(capped_beam.steel_height_history) == 1
+
+def test_concrete_beam_update(monkeypatch):
+    beam = create_concrete_beam()
+    # The design diagrams are reused, only the steel is solved again
+    monkeypatch.setattr(beam, "_getShearDesignDiagram", lambda **options: pytest.fail("shear design solved again"))
+    monkeypatch.setattr(beam, "_getMomentumDesignEnvelopeDiagram", lambda **options: pytest.fail("momentum design solved again"))
+    beam.update(bar_steel_max_removal=1)
+    assert beam.solved_stages == {"transv_steel", "long_steel", "ELS", "cost", "steel_height"}
+    monkeypatch.undo()
+    
+    new_beam = create_concrete_beam(bar_steel_max_removal=1)
+    assert beam.cost == approx(new_beam.cost, rel=1e-2)
+    with pytest.raises(Exception):
+        beam.update(available_concrete=fc.Concrete(fck='30 MPa', aggressiveness=2))
+
+def test_concrete_beam_lazy():
+    beam = create_concrete_beam()
+    lazy_beam = create_concrete_beam(lazy=True)
+    assert lazy_beam.solved_stages == set()
+    x, shear = lazy_beam.getShearDesignDiagram()
+    assert lazy_beam.solved_stages == set()
+    assert lazy_beam.cost == approx(beam.cost)
+    assert lazy_beam.solved_stages == {"transv_steel", "long_steel", "ELS", "cost", "steel_height"}
+    assert lazy_beam.long_steel_bars.long_begins == approx(beam.long_steel_bars.long_begins)
+    lazy_beam.update(bar_steel_max_removal=1)
+    assert "long_steel_bars" not in lazy_beam.__dict__
+    assert lazy_beam.solved_stages == {"transv_steel"}
+    assert len(lazy_beam.long_steel_bars) > 0
+    with pytest.raises(AttributeError):
+        lazy_beam.missing_attribute
+
+def test_concrete_beam_profiler():
+    beam = create_concrete_beam()
+    records = beam.profiler.toDict()
+    for stage in ("structural", "transv_steel", "stirrups", "long_steel", "decalaged_diagram", "comercial_area",
+                  "interspaces", "anchoring", "ELS", "displacement", "cost", "steel_height"):
+        assert records[stage]["calls"] >= 1
+        assert records[stage]["wall_time"] >= 0
+    # The steel height check solves the steel again inside it
+    iterations = len(beam.steel_height_history)
+    assert records["long_steel"]["calls"] == iterations
+    assert np.isnan(records["cost"]["peak_memory"])
+    
+    profiler = fc.Profiler(trace_memory=True)
+    with profiler.stage("batch"):
+        with profiler.stage("allocation"):
+            bytes_array = np.ones(10**6)
+    assert profiler.records["allocation"]["peak_memory"] >= bytes_array.nbytes
+    assert profiler.records["batch"]["peak_memory"] >= bytes_array.nbytes
+    
+    table = fc.Profiler.aggregate([beam.profiler, create_concrete_beam().profiler, profiler])
+    assert table.loc["structural", "profilers"] == 2
+    assert table.loc["structural", "calls"] == 2*records["structural"]["calls"]
+    assert table.loc["batch", "calls"] == 1
+    assert list(beam.profiler.getTable().columns) == ["calls", "wall_time", "cpu_time", "peak_memory"]
+
+def test_concrete_beam_feasibility_report():
+    beam = create_concrete_beam()
+    report = beam.getFeasibilityReport()
+    assert list(report.index) == ["shear", "momentum", "steel_area", "displacement"]
+    assert report["feasible"].all()
+    assert report.loc["shear", "maximum"] == approx(beam.transv_steel_bars_solution_info.checkProbableCompressedConnectingRod()[0])
+
+def test_concrete_beam_feasibility_report_failures():
+    loads = [fc.Load.UniformDistributedLoad(-0.5, x_begin=0, x_end=600)]
+    report = create_simply_supported_concrete_beam(loads, [fc.Rectangle(20, 40)], lazy=True).getFeasibilityReport()
+    assert list(report["feasible"]) == [True, False, False, True]
+    # kc = b*d²/M must be at least 1.5, with d = 0.8*height and the maximum momentum 1.4*0.5*600²/8
+    assert report.loc["momentum", "ratio"] == approx(1.5*1.4*0.5*600**2/8/(20*32**2), rel=1e-3)
+
+def test_concrete_beam_precheck():
+    loads = [fc.Load.UniformDistributedLoad(-0.5, x_begin=0, x_end=600)]
+    with pytest.raises(Exception, match="momentum"):
+        create_simply_supported_concrete_beam(loads, [fc.Rectangle(20, 40)], precheck=True)
+    with pytest.raises(Exception, match="Too much steel"):
+        create_simply_supported_concrete_beam(loads, [fc.Rectangle(20, 40)])
+
+def test_concrete_beam_shear_feasibility_of_each_beam_element():
+    # The biggest shear is in the big section, but the small section fails with a smaller shear
+    beam = create_simply_supported_concrete_beam([fc.Load.PontualLoad(-1200, 100)], [fc.Rectangle(40, 100), fc.Rectangle(12, 30)], lazy=True)
+    shear = beam.getFeasibilityReport().loc["shear"]
+    assert not shear["feasible"]
+    assert shear["x"] > 300
+    assert shear["value"] == approx(1.4*1200/6)
+    assert shear["maximum"] == approx(fc.TransvSteelBarSolve._getV_rd2(beam.getBeamElementInX(450)[1], np.radians(45), np.radians(90)))
@@ -1,7 +1,9 @@
-from fconcrete import config, duplicated, Material, Beam, Load, Node, ConcreteBeam, BeamElement, Rectangle, Concrete, Section
+from fconcrete import config, duplicated, Material, Beam, Load, Node, ConcreteBeam, BeamElement, Rectangle, Concrete, Section, PiecewisePolynomial, BandedMatrix, LoadCase, LoadCombination, Envelope, InfluenceLine, BeamElements, Loads, BeamModel
 e = config.e
 from pytest import approx
+import pytest
 import numpy as np
+import itertools
 import os
 
 def approx01(x):
@@ -173,4 +175,450 @@ def test_structural__crimped_simplesupported_simplesupported_beam():
     assert beam.getInternalMomentumStrength(100) == approx(-12400, abs=10)
     assert beam.getInternalMomentumStrength(800) == approx(10190, abs=10)
     assert beam.getInternalMomentumStrength(1200) == approx(-10580, abs=10)
-    assert beam.getInternalMomentumStrength(1500-e) == approx(0, abs=10)
\ No newline at end of file
+    assert beam.getInternalMomentumStrength(1500-e) == approx(0, abs=10)
+
+
+def test_structural_vectorized_diagrams_equal_scalar():
+    material = Material(E=1, poisson=0.3, alpha=1)
+    section = Rectangle(12,1)
+    f1 = Load.PontualLoad(-200, x=700)
+    f2 = Load.UniformDistributedLoad(-0.3, x_begin=200, x_end=1300)
+    n1 = Node.Crimp(x=0)
+    n2 = Node.SimpleSupport(x=1000)
+    n3 = Node.SimpleSupport(x=1500)
+    bar1 = BeamElement([n1, n2], section, material)
+    bar2 = BeamElement([n2, n3], section, material)
+    beam = Beam(
+        loads = [f1, f2],
+        beam_elements = [bar1, bar2],
+    )
+    x = np.linspace(-10, 1510, 77)
+    assert beam.getInternalShearStrength(x) == approx([beam.getInternalShearStrength(float(x_i)) for x_i in x])
+    assert beam.getInternalMomentumStrength(x) == approx([beam.getInternalMomentumStrength(float(x_i)) for x_i in x])
+    assert beam.getInternalMomentumStrength(list(x)) == approx(beam.getInternalMomentumStrength(x))
+    assert beam.getDisplacement(x) == approx([beam.getDisplacement(float(x_i)) for x_i in x])
+    assert beam.getRotation(x) == approx([beam.getRotation(float(x_i)) for x_i in x])
+
+def test_structural_piecewise_polynomial():
+    polynomial = PiecewisePolynomial([0, 1, 3], [[0, 1], [1, 0]])
+    assert polynomial(2) == approx(1)
+    assert polynomial(-1) == 0
+    assert polynomial.integrate(0, 3) == approx(2.5)
+    assert polynomial.derivative()(0.5) == approx(1)
+    assert polynomial.getExtrema(0.5, 3) == approx((0.5, 1))
+
+def test_structural_diagram_polynomials():
+    material = Material(E=1, poisson=0.3, alpha=1)
+    section = Rectangle(12,1)
+    f1 = Load.PontualLoad(-200, x=700)
+    f2 = Load.UniformDistributedLoad(-0.3, x_begin=200, x_end=1300)
+    n1 = Node.Crimp(x=0)
+    n2 = Node.SimpleSupport(x=1000)
+    n3 = Node.SimpleSupport(x=1500)
+    bar1 = BeamElement([n1, n2], section, material)
+    bar2 = BeamElement([n2, n3], section, material)
+    beam = Beam(
+        loads = [f1, f2],
+        beam_elements = [bar1, bar2],
+    )
+    x = np.linspace(e, 1500, 301)
+    for polynomial, function in ((beam.shear_polynomial, beam.getInternalShearStrength),
+                                 (beam.momentum_polynomial, beam.getInternalMomentumStrength),
+                                 (beam.rotation_polynomial, beam.getRotation),
+                                 (beam.displacement_polynomial, beam.getDisplacement)):
+        expected = function(x)
+        assert polynomial(x) == approx(expected, abs=1e-12*abs(expected).max())
+    
+    minimum, maximum = beam.momentum_polynomial.getExtrema(0, 1000)
+    _, sampled_momentum = beam.getMomentumDiagram(x_begin=0, x_end=1000, division=10000)
+    assert maximum >= sampled_momentum.max()
+    assert maximum == approx(sampled_momentum.max(), abs=1)
+    assert minimum == approx(beam.getInternalMomentumStrength(e), abs=1)
+    assert beam.shear_polynomial.integrate(0, 1000) == approx(beam.getInternalMomentumStrength(1000.0)-beam.getInternalMomentumStrength(e), abs=1)
+
+def test_structural_maximum_absolute_values():
+    material = Material(E=1, poisson=0.3, alpha=1)
+    section = Rectangle(12,1)
+    f1 = Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=1000)
+    n1 = Node.SimpleSupport(x=0)
+    n2 = Node.SimpleSupport(x=1000)
+    bar1 = BeamElement([n1, n2], section, material)
+    beam = Beam(
+        loads = [f1],
+        beam_elements = [bar1],
+    )
+    inertia = section.I
+    assert beam.getMaximumAbsoluteShear() == approx(50)
+    assert beam.getMaximumAbsoluteMomentum() == approx(0.1*1000**2/8)
+    assert beam.getMaximumAbsoluteMomentum(0, 250) == approx(abs(beam.getInternalMomentumStrength(250.0)))
+    assert beam.getMaximumAbsoluteDisplacement() == approx(5*0.1*1000**4/(384*inertia), rel=1e-6)
+
+def test_structural_banded_matrix():
+    dense = np.array([[4, 1, 0, 0], [1, 4, 1, 0], [0, 1, 4, 1], [0, 0, 1, 4]], dtype=float)
+    matrix = BandedMatrix.fromDense(dense, 1)
+    vector = np.array([1, 2, 3, 4], dtype=float)
+    assert matrix.toDense() == approx(dense)
+    assert matrix @ vector == approx(dense @ vector)
+    assert matrix.solve(vector) == approx(np.linalg.solve(dense, vector))
+    assert matrix.solve(np.vstack((vector, 2*vector)).T)[:, 1] == approx(np.linalg.solve(dense, 2*vector))
+    condition = np.array([True, False, True, True])
+    assert matrix.submatrix(condition).toDense() == approx(dense[condition][:, condition])
+
+def test_structural_banded_solver_equal_dense():
+    nodes = [Node.SimpleSupport(x=100*i) for i in range(301)]
+    beam_elements = [BeamElement([n1, n2]) for n1, n2 in zip(nodes[:-1], nodes[1:])]
+    loads = [Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=30000), Load.PontualLoad(-10, x=15030)]
+    beam = Beam(loads=loads, beam_elements=beam_elements, solve_displacement=False)
+    condition_boundary = beam.beam_elements.condition_boundary
+    assert len(condition_boundary) >= config.banded_solver_minimum_size
+    matrix_rigidity_global = beam.matrix_rigidity_global()
+    assert beam.matrix_rigidity_global_banded().toDense() == approx(matrix_rigidity_global)
+    U = np.linalg.solve(matrix_rigidity_global[condition_boundary][:, condition_boundary], beam._get_beams_efforts()[condition_boundary])
+    assert beam.U[condition_boundary] == approx(U)
+
+def test_structural_vectorized_matrix_rigidity():
+    material = Material(E=3000, poisson=0.2, alpha=1)
+    n1 = Node.SimpleSupport(x=0)
+    n2 = Node.Crimp(x=250)
+    n3 = Node.SimpleSupport(x=600)
+    bar1 = BeamElement([n1, n2], Rectangle(20, 50), material)
+    bar2 = BeamElement([n2, n3], Rectangle(15, 40), material)
+    beam = Beam(
+        loads = [Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=600), Load.PontualLoad(-5, x=100)],
+        beam_elements = [bar1, bar2],
+    )
+    matrices = beam.beam_elements.get_matrix_rigidity_unitary()
+    assert matrices.shape == (3, 4, 4)
+    for beam_element, matrix in zip(beam.beam_elements, matrices):
+        assert matrix == approx(beam_element.get_matrix_rigidity_unitary())
+    expected = np.zeros((8, 8))
+    for beam_n, beam_element in enumerate(beam.beam_elements):
+        expected[beam_n*2:beam_n*2+4, beam_n*2:beam_n*2+4] += beam_element.get_matrix_rigidity_unitary()
+    assert beam.matrix_rigidity_global() == approx(expected)
+    assert beam.matrix_rigidity_global_banded().toDense() == approx(expected)
+
+def test_structural_beam_model_load_cases():
+    n1 = Node.Crimp(x=0)
+    n2 = Node.SimpleSupport(x=400)
+    n3 = Node.SimpleSupport(x=1000)
+    beam_elements = [BeamElement([n1, n2]), BeamElement([n2, n3])]
+    load_cases = [
+        [Load.PontualLoad(-10, x=150)],
+        [Load.UniformDistributedLoad(-0.2, x_begin=400, x_end=1000)],
+        [Load.PontualLoad(-5, x=700), Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=400)],
+    ]
+    all_loads = [load for loads in load_cases for load in loads]
+    model = Beam(loads=all_loads, beam_elements=beam_elements, solve_structural=False).model
+    nodal_efforts, U = model.solveLoadCases(load_cases)
+    assert nodal_efforts.shape == U.shape == (len(model.condition_boundary), 3)
+    for index, loads in enumerate(load_cases):
+        beam = Beam(loads=loads, beam_elements=model.beam_elements, solve_displacement=False)
+        # The nodal efforts of the free degrees of freedom are 0, up to the round-off of the other ones
+        assert nodal_efforts[:, index] == approx(beam.nodal_efforts, abs=1e-9)
+        assert U[:, index] == approx(beam.U)
+    assert nodal_efforts.sum(axis=1) == approx(Beam(loads=all_loads, beam_elements=beam_elements).nodal_efforts)
+
+def test_structural_beam_model_factorized_once(monkeypatch):
+    nodes = [Node.Crimp(x=0), Node.SimpleSupport(x=400), Node.SimpleSupport(x=1000)]
+    model = BeamModel([BeamElement([nodes[0], nodes[1]]), BeamElement([nodes[1], nodes[2]])])
+    factorize = model._factorize
+    calls = []
+    monkeypatch.setattr(model, "_factorize", lambda condition: calls.append(condition) or factorize(condition))
+    nodal_efforts, U = model.solveLoadCases([[Load.PontualLoad(-10, x=150)]])
+    monkeypatch.setattr(np.linalg, "solve", lambda *args: pytest.fail("factorized again"))
+    second_nodal_efforts, second_U = model.solveLoadCases([[Load.PontualLoad(-10, x=150)], [Load.PontualLoad(-20, x=150)]])
+    assert len(calls) == 1
+    assert second_U[:, 1] == approx(2*U[:, 0])
+    assert second_nodal_efforts[:, 0] == approx(nodal_efforts[:, 0])
+
+def test_structural_load_combination_envelope():
+    n1 = Node.SimpleSupport(x=0)
+    n2 = Node.SimpleSupport(x=400)
+    n3 = Node.SimpleSupport(x=1000)
+    beam_elements = [BeamElement([n1, n2]), BeamElement([n2, n3])]
+    load_cases = [
+        LoadCase.Permanent("dead", [Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=1000)]),
+        LoadCase.Variable("use", [Load.UniformDistributedLoad(-0.2, x_begin=400, x_end=1000)]),
+        LoadCase.Variable("machine", [Load.PontualLoad(-20, x=200)], psi0=0.7),
+    ]
+    load_combinations = LoadCombination.NBR6118ULS(load_cases)
+    assert len(load_combinations) == 2*2
+    assert load_combinations[0].factors == approx({"dead": 1.4, "use": 1.4, "machine": 1.4*0.7})
+    assert load_combinations[1].factors == approx({"dead": 1.4, "use": 1.4*0.5, "machine": 1.4})
+    beam = Beam(loads=[load for load_case in load_cases for load in load_case.loads], beam_elements=beam_elements)
+    envelope = Envelope(beam, load_cases, load_combinations)
+    
+    # Brute force: every combination with every subset of its variable load cases
+    x = np.linspace(e, 1000-e, 101)
+    momentums, shears = [], []
+    for load_combination, has_use, has_machine in itertools.product(load_combinations, (True, False), (True, False)):
+        factors = load_combination.factors
+        loads = [Load.UniformDistributedLoad(-0.1*factors["dead"], x_begin=0, x_end=1000),
+                 Load.UniformDistributedLoad(-0.2*factors["use"]*has_use, x_begin=400, x_end=1000),
+                 Load.PontualLoad(-20*factors["machine"]*has_machine, x=200)]
+        combination_beam = Beam(loads=loads, beam_elements=beam_elements)
+        momentums.append(combination_beam.getInternalMomentumStrength(x))
+        shears.append(combination_beam.getInternalShearStrength(x))
+    
+    minimum, maximum = envelope.getMomentumEnvelope(x)
+    assert minimum == approx(np.min(momentums, axis=0))
+    assert maximum == approx(np.max(momentums, axis=0))
+    minimum, maximum = envelope.getShearEnvelope(x)
+    assert minimum == approx(np.min(shears, axis=0))
+    assert maximum == approx(np.max(shears, axis=0))
+    assert envelope.getMaximumAbsoluteMomentum() == approx(abs(np.array(momentums)).max(), rel=1e-3)
+    
+    many_load_cases = [LoadCase.Permanent(str(index), []) for index in range(4)] + [LoadCase.Variable(str(index), []) for index in range(4, 14)]
+    assert len(LoadCombination.NBR6118ULS(many_load_cases)) == 2**4*10
+    
+    quasi_permanent, = LoadCombination.NBR6118SLS(load_cases)
+    assert quasi_permanent.factors == approx({"dead": 1, "use": 0.3, "machine": 0.3})
+
+def test_structural_load_combination_favorable_variable():
+    nodes = [Node.SimpleSupport(x=x) for x in (0, 400, 800)]
+    beam_elements = [BeamElement([nodes[0], nodes[1]]), BeamElement([nodes[1], nodes[2]])]
+    load_cases = [
+        LoadCase.Permanent("dead", [Load.UniformDistributedLoad(-0.01, x_begin=0, x_end=800)]),
+        LoadCase.Variable("first span", [Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=400)]),
+        LoadCase.Variable("second span", [Load.UniformDistributedLoad(-0.1, x_begin=400, x_end=800)]),
+    ]
+    beam = Beam(loads=[load for load_case in load_cases for load in load_case.loads], beam_elements=beam_elements)
+    envelope = Envelope(beam, load_cases)
+    # The second span is favorable to the sagging momentum of the first one, so it is not added: 1.4*dead + 1.4*first span
+    _, maximum = envelope.getMomentumEnvelope(160)
+    assert maximum == approx(2284.8)
+    load_combination, loaded_spans = envelope.getGoverningPattern(160)
+    assert load_combination.factors["first span"] == 1.4 and loaded_spans == {"first span": [0, 1], "second span": []}
+    pattern_envelope = Envelope(beam, [load_cases[0], LoadCase.Variable("use", load_cases[1].loads+load_cases[2].loads, pattern=True)],
+                                [LoadCombination("ULS", {"dead": 1.4, "use": 1.4})])
+    assert pattern_envelope.getMomentumEnvelope(160)[1] == approx(maximum)
+
+def test_structural_pattern_loading_envelope():
+    spans = [0, 400, 1000, 1300]
+    nodes = [Node.SimpleSupport(x=x) for x in spans]
+    beam_elements = [BeamElement([nodes[i], nodes[i+1]]) for i in range(3)]
+    dead_loads = [Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=1300)]
+    use_loads = [Load.UniformDistributedLoad(-0.3, x_begin=0, x_end=1300), Load.PontualLoad(-10, x=400)]
+    load_cases = [LoadCase.Permanent("dead", dead_loads, gamma_favorable=1.4), LoadCase.Variable("use", use_loads, pattern=True)]
+    load_combinations = [LoadCombination("ULS", {"dead": 1.4, "use": 1.4})]
+    beam = Beam(loads=dead_loads+use_loads, beam_elements=beam_elements)
+    envelope = Envelope(beam, load_cases, load_combinations)
+    assert len(envelope.solved_cases) == 1+3
+    
+    # Brute force: every one of the 2**3 patterns of loaded spans
+    x = np.linspace(e, 1300-e, 131)
+    momentums, shears = [], []
+    for pattern in range(2**3):
+        loaded_spans = [span for span in range(3) if pattern >> span & 1]
+        loads = [Load.UniformDistributedLoad(-0.1*1.4, x_begin=0, x_end=1300)]
+        loads += [Load.UniformDistributedLoad(-0.3*1.4, x_begin=spans[span], x_end=spans[span+1]) for span in loaded_spans]
+        if 1 in loaded_spans: loads.append(Load.PontualLoad(-10*1.4, x=400))
+        pattern_beam = Beam(loads=loads, beam_elements=beam_elements)
+        momentums.append(pattern_beam.getInternalMomentumStrength(x))
+        shears.append(pattern_beam.getInternalShearStrength(x))
+    
+    minimum, maximum = envelope.getMomentumEnvelope(x)
+    assert minimum == approx(np.min(momentums, axis=0))
+    assert maximum == approx(np.max(momentums, axis=0))
+    minimum, maximum = envelope.getShearEnvelope(x)
+    assert minimum == approx(np.min(shears, axis=0))
+    assert maximum == approx(np.max(shears, axis=0))
+    assert envelope.getMaximumAbsoluteMomentum() == approx(abs(np.array(momentums)).max(), rel=1e-3)
+    assert envelope.getMaximumAbsoluteShear() == approx(abs(np.array(shears)).max(), rel=1e-3)
+    
+    # All spans loaded gives the same values as the combination without pattern loading
+    assert envelope.getCombinationValues(x)[0] == approx(momentums[-1])
+    load_combination, loaded_spans = envelope.getGoverningPattern(200, extremum="maximum")
+    assert load_combination.name == "ULS" and loaded_spans == {"use": [0, 2]}
+
+def test_structural_load_case_split_by_spans():
+    load_case = LoadCase.Variable("use", [Load(-60, 10, 200, 800, q=-0.1, order=1), Load.PontualLoad(-10, x=400)], pattern=True)
+    first, second, third = load_case.splitBySpans([0, 400, 700, 1000])
+    assert [(load.x_begin, load.x_end) for load in first] == [(200, 400)]
+    assert [(load.x_begin, load.x_end) for load in second] == [(400, 700), (400, 400)]
+    assert [(load.x_begin, load.x_end) for load in third] == [(700, 800)]
+    assert [load.force for load in first+second[:1]+third] == approx([-20, -30, -10])
+    assert [load.momentum for load in first+second[:1]+third] == [10, 0, 0]
+    with pytest.raises(Exception, match="order 2"):
+        LoadCase.Variable("use", [Load(-60, 0, 200, 800, q=-0.1, order=2)]).splitBySpans([0, 400, 1000])
+
+def test_structural_influence_line():
+    def create_beam_elements():
+        nodes = [Node.Crimp(x=0), Node.SimpleSupport(x=400), Node.SimpleSupport(x=900), Node.SimpleSupport(x=1300)]
+        return [BeamElement([nodes[i], nodes[i+1]]) for i in range(3)]
+    influence_line = InfluenceLine(create_beam_elements())
+    sections = np.array([100, 400, 650, 1100, 1300])
+    positions = np.array([0, 100, 400, 500, 1250, 1300])
+    beams = [Beam(loads=[Load.PontualLoad(1, x=position)], beam_elements=create_beam_elements()) for position in positions]
+    assert influence_line.getInfluenceLine(sections, positions, "shear") == approx(np.array([beam.getInternalShearStrength(sections) for beam in beams]).T)
+    assert influence_line.getInfluenceLine(sections, positions, "momentum") == approx(np.array([beam.getInternalMomentumStrength(sections) for beam in beams]).T)
+    assert influence_line.getInfluenceLine(sections, positions, "displacement") == approx(np.array([beam.getDisplacement(sections) for beam in beams]).T, abs=1e-12)
+    assert influence_line.getInfluenceLine(650, [-100, 1400]) == approx([0, 0])
+    
+    truck = [Load.PontualLoad(-60, x=0), Load.PontualLoad(-40, x=150)]
+    minimum, maximum = influence_line.getMovingLoadEnvelope(sections, truck, division=131)
+    momentums = []
+    for front in np.linspace(0-150, 1300, 131):
+        loads = [Load.PontualLoad(load.force, x=front+load.x) for load in truck if 0 <= front+load.x <= 1300]
+        momentums.append(Beam(loads=loads, beam_elements=create_beam_elements()).getInternalMomentumStrength(sections) if loads else np.zeros(len(sections)))
+    assert minimum == approx(np.min(momentums, axis=0), abs=1e-6)
+    assert maximum == approx(np.max(momentums, axis=0), abs=1e-6)
+    
+    x, minimum, maximum = influence_line.getMovingLoadEnvelopeDiagram(truck, division=11, load_division=131)
+    assert x[0] == approx(e) and x[-1] == approx(1300-e)
+    expected_minimum, expected_maximum = influence_line.getMovingLoadEnvelope(x, truck, division=131)
+    assert minimum == approx(expected_minimum) and maximum == approx(expected_maximum)
+
+def test_structural_create_intermediate_beams():
+    nodes = [Node.SimpleSupport(x=0), Node.SimpleSupport(x=400), Node.SimpleSupport(x=1000)]
+    beam_elements = BeamElements.create([BeamElement([nodes[0], nodes[1]]), BeamElement([nodes[1], nodes[2]])])
+    loads = Loads.create([Load.PontualLoad(-1, x=x) for x in [700, 100, 400, 1000, 700, 250]]
+                         + [Load.UniformDistributedLoad(-0.1, x_begin=50, x_end=600)])
+    split_beam_elements = beam_elements
+    for load in loads:
+        split_beam_elements = split_beam_elements.split(load.x_begin).split(load.x_end)
+    intermediate_beams = Beam._createIntermediateBeams(loads, beam_elements)
+    assert intermediate_beams.nodes.x == approx(split_beam_elements.nodes.x)
+    assert intermediate_beams.condition_boundary.tolist() == split_beam_elements.condition_boundary.tolist()
+    assert Beam._createIntermediateBeams(Loads.create([Load.PontualLoad(-1, x=400)]), beam_elements) is beam_elements
+
+def test_structural_beam_elements_set_column():
+    nodes = [Node.SimpleSupport(x=0), Node.SimpleSupport(x=400), Node.SimpleSupport(x=1000)]
+    beam_elements = BeamElements.create([BeamElement([nodes[0], nodes[1]]), BeamElement([nodes[1], nodes[2]])])
+    sorted_beam_elements = beam_elements.sort("x_start")
+    flexural_rigidity = beam_elements.flexural_rigidity[0]
+    beam_elements.setColumn("flexural_rigidity", 2, [1])
+    assert beam_elements.flexural_rigidity.tolist() == [flexural_rigidity, 2] and beam_elements[1].flexural_rigidity == 2
+    assert beam_elements.get_matrix_rigidity_unitary()[1] == approx(beam_elements[1].get_matrix_rigidity_unitary())
+    # The other instances with the same elements keep their columns until refreshed
+    assert sorted_beam_elements.flexural_rigidity.tolist() == [flexural_rigidity, flexural_rigidity]
+    sorted_beam_elements.refreshColumns("flexural_rigidity")
+    assert sorted_beam_elements.flexural_rigidity.tolist() == [flexural_rigidity, 2]
+    with pytest.raises(Exception):
+        beam_elements.setColumn("x_start", 0)
+
+def test_structural_loads_from_arrays():
+    external_loads = Loads.create([Load.PontualLoad(-10, x=300), Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=400)])
+    reactions = Loads.fromArrays(force=[5, 20, 25], momentum=[-100, 0, 0], x_begin=[0, 400, 1000], x_end=[0, 400, 1000])
+    merged = external_loads.add(reactions)
+    expected = Loads.create([*external_loads.loads, *[Load(force, momentum, x, x) for force, momentum, x in [(5, -100, 0), (20, 0, 400), (25, 0, 1000)]]])
+    assert len(merged) == 5
+    assert merged.x_begin == approx(expected.x_begin)
+    for name in ("x", "x_end", "force", "momentum", "q", "order"):
+        assert np.sort(getattr(merged, name)) == approx(np.sort(getattr(expected, name)))
+    assert [load.force for load in merged.loads] == approx(merged.force)
+
+def test_structural_columnar_lists():
+    loads = Loads.create([Load.PontualLoad(-10, x=300), Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=400), Load.PontualLoad(-5, x=100)])
+    assert loads.x_begin == approx([0, 100, 300])
+    assert [load.x_begin for load in loads] == approx(loads.x_begin)
+    pontual_loads = loads.take(loads.order == 0)
+    assert len(pontual_loads) == 2 and pontual_loads.force == approx([-5, -10])
+    assert pontual_loads.concatenate(loads.take(slice(0, 1))).sort("x_begin").x_begin == approx([0, 100, 300])
+    assert "x_begin" in repr(loads[0]) and not hasattr(loads[0], "__dict__")
+    
+    nodes = [Node.SimpleSupport(x=0), Node.Free(x=400), Node.Crimp(x=1000)]
+    beam_elements = BeamElements.create([BeamElement([nodes[1], nodes[2]]), BeamElement([nodes[0], nodes[1]])])
+    assert beam_elements.nodes.x == approx([0, 400, 1000])
+    assert beam_elements.condition_boundary.tolist() == [False, True, True, True, False, False]
+    assert beam_elements.take(slice(1, None)).nodes.x == approx([400, 1000])
+
+def test_structural_beam_element_in_x():
+    beam = create_crimped_beam()
+    x = np.array([beam.x_begin-10, beam.x_begin, *np.linspace(beam.x_begin+e, beam.x_end-e, 50), *beam.beam_elements.nodes.x[1:-1]])
+    index, beam_elements = beam.getBeamElementInX(x)
+    for x_value, index_value, beam_element in zip(x, index, beam_elements):
+        scalar_index, scalar_beam_element = beam.getBeamElementInX(float(x_value))
+        assert scalar_index == index_value and scalar_beam_element is beam_element
+    assert beam.getBeamElementInX(float(beam.x_end))[0] == -1
+    assert beam.getBeamElementIndexInX([beam.x_end, beam.x_end+10]).tolist() == [len(beam.beam_elements)-1]*2
+
+def test_structural_nodal_loads():
+    nodes = [Node.Crimp(x=0), Node.MiddleNode(x=200), Node.SimpleSupport(x=400), Node.SimpleSupport(x=1000)]
+    model = BeamModel([BeamElement([nodes[i], nodes[i+1]]) for i in range(3)])
+    loads = [Load.PontualLoad(-10, x=150), Load.PontualLoad(-5, x=1000), Load.PontualLoad(-3, x=400),
+             Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=1000), Load.UniformDistributedLoad(-0.2, x_begin=200, x_end=400)]
+    nodal_loads = model.getNodalLoads(loads)
+    assert nodal_loads == approx(sum(model.getNodalLoads([load]) for load in loads))
+    # Opposite of the reactions of a double crimped beam element
+    momentum_a, momentum_b = -10*150*50**2/200**2, 10*50*150**2/200**2
+    reaction_a = (-10*50+momentum_a+momentum_b)/200
+    assert model.getNodalLoads([Load.PontualLoad(-10, x=150)])[:4] == approx([-reaction_a, -momentum_a, -(-10-reaction_a), -momentum_b])
+    assert model.getNodalLoads([Load.UniformDistributedLoad(-0.1, x_begin=400, x_end=1000)])[4:] == approx([30, 3000, 30, -3000])
+    # A distributed load inside the beam elements has the same nodal efforts of the model split in its limits
+    partial_loads = [Load.UniformDistributedLoad(-0.1, x_begin=100, x_end=700), Load.UniformDistributedLoad(-0.3, x_begin=450, x_end=600)]
+    split_nodes = [nodes[0], Node.MiddleNode(x=100), *nodes[1:3], Node.MiddleNode(x=450), Node.MiddleNode(x=600), Node.MiddleNode(x=700), nodes[3]]
+    split_model = BeamModel([BeamElement([split_nodes[i], split_nodes[i+1]]) for i in range(7)])
+    nodal_efforts, U = model.solve(model.getNodalLoads(partial_loads))
+    split_nodal_efforts, split_U = split_model.solve(split_model.getNodalLoads(partial_loads))
+    assert nodal_efforts == approx(split_nodal_efforts.reshape(-1, 2)[[0, 2, 3, 7]].ravel(), abs=1e-9)
+    assert U == approx(split_U.reshape(-1, 2)[[0, 2, 3, 7]].ravel())
+
+def test_structural_prefix_sum_singularity_terms():
+    nodes = [Node.Crimp(x=0), Node.SimpleSupport(x=400), Node.SimpleSupport(x=1000)]
+    loads = [Load.PontualLoad(-10, x=150), Load.PontualLoad(-5, x=700), Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=1000),
+             Load.UniformDistributedLoad(-0.2, x_begin=250, x_end=650)]
+    beam = Beam(loads=loads, beam_elements=[BeamElement([nodes[0], nodes[1]]), BeamElement([nodes[1], nodes[2]])])
+    x = np.linspace(beam.x_begin, beam.x_end, 301)
+    for n, function in ((0, beam.getInternalShearStrength), (1, beam.getInternalMomentumStrength)):
+        weights, positions, orders = beam._getSingularityTerms(n)
+        coefficients = PiecewisePolynomial.sumSingularityTerms(x, weights, positions, orders)
+        assert coefficients[:, 0] == approx(function(x), abs=1e-9)
+    polynomial = beam.momentum_polynomial
+    coefficients = PiecewisePolynomial.sumSingularityTerms(polynomial.breakpoints[:-1], *beam._getSingularityTerms(1), side="right")
+    assert coefficients == approx(polynomial.coefficients, abs=1e-9)
+    
+    # Big enough to not fit in config.max_broadcast_size
+    x = np.linspace(beam.x_begin, beam.x_end, config.max_broadcast_size//len(beam._getSingularityTerms(3)[0])+10)
+    assert beam.getDisplacement(x)[::1000] == approx(beam.getDisplacement(x[::1000]), rel=1e-9, abs=1e-12)
+
+def test_structural_iter_diagram():
+    nodes = [Node.Crimp(x=0), Node.SimpleSupport(x=400), Node.SimpleSupport(x=1000)]
+    loads = [Load.PontualLoad(-10, x=150), Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=1000)]
+    beam = Beam(loads=loads, beam_elements=[BeamElement([nodes[0], nodes[1]]), BeamElement([nodes[1], nodes[2]])])
+    for get_diagram, iter_diagram in ((beam.getShearDiagram, beam.iterShearDiagram), (beam.getMomentumDiagram, beam.iterMomentumDiagram),
+                                      (beam.getDisplacementDiagram, beam.iterDisplacementDiagram), (beam.getRotationDiagram, beam.iterRotationDiagram)):
+        x, y = get_diagram(division=1001)
+        chunks = list(iter_diagram(chunk_size=300, division=1001))
+        assert [len(chunk_x) for chunk_x, _ in chunks] == [300, 300, 300, 101]
+        assert np.concatenate([chunk_x for chunk_x, _ in chunks]) == approx(x)
+        assert np.concatenate([chunk_y for _, chunk_y in chunks]) == approx(y)
+    x, y = beam.getMomentumDiagram(division=50, x_begin=100, x_end=300)
+    assert max(chunk_y.max() for _, chunk_y in beam.iterMomentumDiagram(chunk_size=7, division=50, x_begin=100, x_end=300)) == approx(y.max())
+
+def test_structural_adaptive_diagram():
+    nodes = [Node.Crimp(x=0), Node.SimpleSupport(x=400), Node.SimpleSupport(x=1000)]
+    loads = [Load.PontualLoad(-10, x=150), Load.UniformDistributedLoad(-0.1, x_begin=0, x_end=1000)]
+    beam = Beam(loads=loads, beam_elements=[BeamElement([nodes[0], nodes[1]]), BeamElement([nodes[1], nodes[2]])])
+    x, momentum = beam.getMomentumDiagram(adaptive=True, division=1000)
+    assert len(x) < 200
+    assert (np.diff(x) > 0).all()
+    assert np.isin([150, 150+config.e, 400, 400+config.e], x).all()
+    assert momentum == approx(beam.getInternalMomentumStrength(x))
+    x_uniform, momentum_uniform = beam.getMomentumDiagram(division=10000)
+    assert np.interp(x_uniform, x, momentum) == approx(momentum_uniform, abs=1e-3*abs(momentum_uniform).max())
+    # Shear is linear between the breakpoints, so it does not need more divisions
+    x, shear = beam.getShearDiagram(adaptive=True, division=1000)
+    assert len(x) == 6+3*3
+    x, momentum = beam.getMomentumDiagram(adaptive=True, division=50)
+    assert len(x) == 50
+
+def test_structural_condensed_beam():
+    loads = [Load.PontualLoad(-10, x=150), Load.PontualLoad(-5, x=700), Load.UniformDistributedLoad(-0.1, x_begin=50, x_end=900),
+             Load.UniformDistributedLoad(-0.2, x_begin=250, x_end=650)]
+    def create_beam(**options):
+        nodes = [Node.Crimp(x=0), Node.SimpleSupport(x=400), Node.SimpleSupport(x=1000)]
+        return Beam(loads=loads, beam_elements=[BeamElement([nodes[0], nodes[1]]), BeamElement([nodes[1], nodes[2]])], **options)
+    beam, condensed_beam = create_beam(), create_beam(condensed=True)
+    assert beam.condensed_model is None
+    assert len(condensed_beam.condensed_model.condition_boundary) == 6
+    assert len(condensed_beam.model.condition_boundary) == len(beam.model.condition_boundary)
+    assert condensed_beam.nodal_efforts == approx(beam.nodal_efforts, abs=1e-9)
+    assert condensed_beam.momentum_polynomial.coefficients == approx(beam.momentum_polynomial.coefficients, abs=1e-9)
+    assert condensed_beam.getDisplacement(np.linspace(0, 1000, 101)) == approx(beam.getDisplacement(np.linspace(0, 1000, 101)), abs=1e-12)
+    # The middle nodes are recovered when U is used
+    assert condensed_beam.U == approx(beam.U, abs=1e-12)
+    
+    load_cases = [LoadCase.Permanent("dead", loads[2:]), LoadCase.Variable("live", loads[:2], pattern=True)]
+    envelope, condensed_envelope = Envelope(beam, load_cases), Envelope(condensed_beam, load_cases)
+    assert condensed_envelope.nodal_efforts == approx(envelope.nodal_efforts, abs=1e-9)